@@ -0,0 +1 @@
+"""Bancs d'essai de bout en bout (voir ``python -m benchmarks.run -h``)."""
@@ -0,0 +1,69 @@
+"""Compare deux résultats de ``benchmarks.run`` (référence, candidat).
+
+Affiche l'écart de chaque mesure, cycle par cycle, et sort en 1 si l'une
+d'elles se dégrade de plus de ``--threshold`` pour cent.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+# Mesures comparées (plus petit = meilleur)
+CYCLE_METRICS = (
+    "wall_seconds",
+    "sqlite_seconds",
+    "read_syscalls",
+    "write_syscalls",
+    "cpu_seconds",
+)
+RUN_METRICS = ("peak_rss_kib",)
+
+
+def _change(old: float, new: float) -> float:
+    if old == 0:
+        return 0.0 if new == 0 else float("inf")
+    return (new - old) / old * 100
+
+
+def compare(
+    baseline: dict[str, Any], candidate: dict[str, Any], threshold: float
+) -> list[str]:
+    """Lignes du rapport; celles qui commencent par ``!`` sont régressées."""
+    rows: list[tuple[str, float, float]] = []
+    for old, new in zip(baseline["cycles"], candidate["cycles"], strict=False):
+        rows.extend(
+            (f"cycle {old['cycle']} {name}", old[name], new[name])
+            for name in CYCLE_METRICS
+        )
+    rows.extend((name, baseline[name], candidate[name]) for name in RUN_METRICS)
+    lines = []
+    for name, old, new in rows:
+        change = _change(old, new)
+        flag = "!" if change > threshold else " "
+        lines.append(f"{flag} {name:<28} {old:>12} {new:>12} {change:+8.1f} %")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Point d'entrée ``python -m benchmarks.compare``."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args(argv)
+    baseline = json.loads(args.baseline.read_text())
+    candidate = json.loads(args.candidate.read_text())
+    if baseline["scenario"] != candidate["scenario"]:
+        print("Attention: scénarios différents", file=sys.stderr)
+    lines = compare(baseline, candidate, args.threshold)
+    print("\n".join(lines))
+    if any(line.startswith("!") for line in lines):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
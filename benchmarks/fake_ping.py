@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Faux ``ping`` pour les bancs d'essai.
+
+Copié sous le nom ``ping`` dans un répertoire placé en tête du ``PATH``.
+Accepte les options de ``ip_monitor.monitoring.ping`` et répond après
+``IPM_BENCH_PING_LATENCY`` secondes. Une part ``IPM_BENCH_PING_LOSS`` des
+adresses (toujours les mêmes, tirées d'un hachage de l'adresse) ne répond
+pas: comme le vrai ping, on attend alors la durée ``-w`` puis on sort en 1.
+Avec ``IPM_BENCH_PING_RSS``, la mémoire résidente maximale du ping est
+ajoutée à ce fichier en sortie (une ligne en Kio).
+Aucune bibliothèque tierce: le script est lancé avec ``python -S``.
+"""
+
+import os
+import sys
+import time
+import zlib
+
+_LOSS_BUCKETS = 10_000
+
+
+def main(argv: list[str]) -> int:
+    """Ping simulé de la dernière adresse de la ligne de commande."""
+    address = argv[-1]
+    deadline = 5.0
+    for arg in argv[:-1]:
+        if arg.startswith("-w"):
+            deadline = float(arg[2:])
+    latency = float(os.environ.get("IPM_BENCH_PING_LATENCY", "0"))
+    loss = float(os.environ.get("IPM_BENCH_PING_LOSS", "0"))
+    lost = zlib.crc32(address.encode()) % _LOSS_BUCKETS < loss * _LOSS_BUCKETS
+    if lost:
+        time.sleep(deadline)
+        return 1
+    time.sleep(latency)
+    print(f"1 packets transmitted, 1 received, 0% packet loss ({address})")
+    return 0
+
+
+def report_rss() -> None:
+    """Ajoute la mémoire résidente maximale du ping au fichier de relevé.
+
+    ``VmHWM`` est propre à l'image exécutée, contrairement à ``ru_maxrss``
+    qui garde celle du processus parent d'avant ``exec``.
+    """
+    path = os.environ.get("IPM_BENCH_PING_RSS")
+    if not path:
+        return
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                # Écriture courte en ajout: atomique entre pings concurrents
+                with open(path, "a") as report:
+                    report.write(f"{line.split()[1]}\n")
+                return
+
+
+if __name__ == "__main__":
+    code = main(sys.argv)
+    report_rss()
+    sys.exit(code)
@@ -0,0 +1,87 @@
+"""Ferme de serveurs HTTP locaux pour les bancs d'essai.
+
+Lance ``--servers`` serveurs aiohttp sur ``127.0.0.1`` (un port chacun, vus
+par le client comme autant d'hôtes distincts), écrit la liste des ports en
+JSON sur la sortie standard puis sert jusqu'à ``SIGTERM``. Chaque réponse
+est retardée de ``--delay`` secondes. ``--head reject`` répond 405 aux
+requêtes HEAD (le client retombe alors sur GET). Une part ``--error-rate``
+des chemins (toujours les mêmes, tirés d'un hachage) répond 503.
+
+La ferme tourne dans son propre processus pour que la mémoire et les appels
+système mesurés soient ceux du moniteur seul.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import zlib
+from http import HTTPStatus
+
+from aiohttp import web
+
+_ERROR_BUCKETS = 10_000
+
+
+def make_app(delay: float, head: str, error_rate: float) -> web.Application:
+    """Application qui répond à tous les chemins selon les réglages."""
+    threshold = error_rate * _ERROR_BUCKETS
+
+    async def handle(request: web.Request) -> web.Response:
+        if delay:
+            await asyncio.sleep(delay)
+        if zlib.crc32(request.path.encode()) % _ERROR_BUCKETS < threshold:
+            return web.Response(status=HTTPStatus.SERVICE_UNAVAILABLE)
+        if request.method == "HEAD" and head == "reject":
+            return web.Response(status=HTTPStatus.METHOD_NOT_ALLOWED)
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handle)
+    return app
+
+
+async def serve(
+    servers: int, delay: float, head: str, error_rate: float
+) -> None:
+    """Démarre la ferme, publie ses ports et sert jusqu'à SIGTERM."""
+    runners: list[web.AppRunner] = []
+    ports: list[int] = []
+    for _ in range(servers):
+        runner = web.AppRunner(
+            make_app(delay, head, error_rate), access_log=None
+        )
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, backlog=1024)
+        await site.start()
+        runners.append(runner)
+        ports.append(runner.addresses[-1][1])
+    print(json.dumps(ports), flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+    loop.add_signal_handler(signal.SIGINT, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Point d'entrée ``python -m benchmarks.farm``."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--head", choices=("ok", "reject"), default="ok")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.servers, args.delay, args.head, args.error_rate))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
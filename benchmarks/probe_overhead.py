@@ -0,0 +1,122 @@
+"""Micro-banc d'essai: coût d'un ping pour le processus ip-monitor.
+
+Lance ``--probes`` appels à ``ip_monitor.monitoring.ping`` (``--concurrency``
+à la fois) contre un faux ``ping`` en shell qui répond aussitôt: la durée
+mesurée est celle du lancement du sous-processus et du travail fait autour
+(environnement, capture et décodage de la sortie, journal). Chaque mesure
+est faite journal au niveau WARNING puis DEBUG (écrit dans ``/dev/null``);
+l'écart est le coût de la capture et du journal, payé seulement en DEBUG.
+
+Par ping: durée murale, temps CPU du processus (les pings eux-mêmes sont
+exclus), appels système de lecture et d'écriture. Est aussi mesurée la
+copie de l'environnement que ``ping`` faisait à chaque appel.
+
+Exemple: ``uv run python -m benchmarks.probe_overhead --probes 2000``
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import timeit
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from ip_monitor import monitoring
+
+from .run import Counters
+
+_SH_PING = """#!/bin/sh
+echo "1 packets transmitted, 1 received, 0% packet loss"
+"""
+
+
+@contextmanager
+def instant_ping() -> Iterator[None]:
+    """Met un ``ping`` en shell, sans latence, en tête du ``PATH``."""
+    saved = os.environ.get("PATH")
+    with tempfile.TemporaryDirectory(prefix="ipm-bench-") as bin_dir:
+        script = Path(bin_dir) / "ping"
+        script.write_text(_SH_PING)
+        script.chmod(0o755)
+        os.environ["PATH"] = f"{bin_dir}{os.pathsep}{saved or ''}"
+        # L'environnement des pings est préparé une fois: le recalculer
+        monitoring._ping_env.cache_clear()
+        try:
+            yield
+        finally:
+            if saved is None:
+                os.environ.pop("PATH", None)
+            else:
+                os.environ["PATH"] = saved
+            monitoring._ping_env.cache_clear()
+
+
+async def measure(probes: int, concurrency: int) -> dict[str, float]:
+    """Mesures par ping, au niveau de journal courant."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> bool:
+        async with semaphore:
+            return await monitoring.ping(f"10.0.{index // 256}.{index % 256}")
+
+    before = Counters.now()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(probes)))
+    wall = time.perf_counter() - start
+    delta = Counters.now().since(before)
+    if not all(results):
+        raise RuntimeError("le faux ping a échoué")
+    return {
+        "wall_us": wall / probes * 1e6,
+        "cpu_us": delta["cpu_seconds"] / probes * 1e6,
+        "syscalls": (delta["read_syscalls"] + delta["write_syscalls"]) / probes,
+    }
+
+
+def _env_copy_us(repeat: int = 10_000) -> float:
+    """Coût (µs) d'une copie de l'environnement en locale C."""
+
+    def copy() -> None:
+        env = os.environ.copy()
+        env.setdefault("LC_ALL", "C")
+        env.setdefault("LANG", "C")
+
+    return timeit.timeit(copy, number=repeat) / repeat * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Point d'entrée ``python -m benchmarks.probe_overhead``."""
+    parser = argparse.ArgumentParser(
+        description="Coût d'un ping pour le processus ip-monitor."
+    )
+    parser.add_argument("--probes", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args(argv)
+    root = logging.getLogger()
+    with (
+        open(os.devnull, "w", encoding="utf-8") as devnull,
+        instant_ping(),
+    ):
+        root.addHandler(logging.StreamHandler(devnull))
+        for level in (logging.WARNING, logging.DEBUG):
+            root.setLevel(level)
+            # Un tour à vide: lancement de la boucle, cache de l'environnement
+            asyncio.run(measure(args.concurrency, args.concurrency))
+            result = asyncio.run(measure(args.probes, args.concurrency))
+            print(
+                f"{logging.getLevelName(level):<7}"
+                f" {result['wall_us']:>8.0f} µs/ping,"
+                f" CPU {result['cpu_us']:>6.0f} µs/ping,"
+                f" {result['syscalls']:>5.1f} appels système E/S/ping"
+            )
+    print(f"Copie de l'environnement évitée: {_env_copy_us():.1f} µs/ping")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""Banc d'essai de bout en bout d'un cycle de vérifications.
+
+Génère un inventaire de ``--targets`` cibles (IP et URL), remplace ``ping``
+par ``benchmarks/fake_ping.py`` (latence et pertes réglables) et sert les
+URL depuis une ferme HTTP locale (``benchmarks/farm.py``). Chaque cycle de
+``_run_all_checks`` est mesuré: durée, temps passé dans SQLite, appels
+système de lecture et d'écriture, changements de contexte et temps CPU;
+puis la mémoire résidente maximale du processus et celle des pings, que
+le faux ``ping`` relève lui-même.
+Chaque taille d'inventaire est mesurée dans un processus neuf.
+
+Les notifications sont comptées, pas envoyées. Les résultats sont écrits
+en JSON (un fichier par taille d'inventaire), à comparer d'une version à
+l'autre avec ``python -m benchmarks.compare``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tomllib
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+
+from ip_monitor import monitoring
+from ip_monitor.config import Config, IpInfo, NotifyMethod, UrlInfo
+from ip_monitor.monitoring import RuntimeParams, _run_all_checks, init_db
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCH_DIR / "results"
+# Premier réseau des adresses IP générées (jamais réellement pingées)
+_IP_BASE = ipaddress.IPv4Address("10.0.0.1")
+
+
+@dataclass
+class Scenario:
+    """Réglages d'un banc d'essai."""
+
+    targets: int = 1000
+    # Part des cibles qui sont des URL (le reste: des IP)
+    url_share: float = 0.5
+    servers: int = 4
+    ping_latency: float = 0.01
+    ping_loss: float = 0.0
+    http_delay: float = 0.01
+    head: str = "ok"
+    error_rate: float = 0.0
+    concurrency: int = 20
+    http_connector_limit: int = 50
+    ping_timeout: float = 15.0
+    http_timeout: float = 7.0
+    cycles: int = 2
+    uvloop: bool = True
+
+
+@dataclass
+class SqliteTimer:
+    """Temps passé à exécuter des requêtes SQLite (fil d'aiosqlite)."""
+
+    seconds: float = 0.0
+    calls: int = 0
+
+    def attach(self, conn: aiosqlite.Connection) -> None:
+        """Chronomètre chaque appel exécuté par le fil de la connexion."""
+        execute = conn._execute
+
+        async def timed_execute(
+            fn: Callable[..., Any], *args: Any, **kwargs: Any
+        ) -> Any:
+            def timed() -> Any:
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.seconds += time.perf_counter() - start
+                    self.calls += 1
+
+            return await execute(timed)
+
+        conn._execute = timed_execute  # type: ignore[method-assign]
+
+
+@dataclass
+class Counters:
+    """Compteurs du processus à un instant donné."""
+
+    read_syscalls: int = 0
+    write_syscalls: int = 0
+    voluntary_switches: int = 0
+    involuntary_switches: int = 0
+    cpu_seconds: float = 0.0
+
+    @classmethod
+    def now(cls) -> Counters:
+        """Lit ``/proc/self/io`` (Linux) et ``getrusage``."""
+        io: dict[str, int] = {}
+        try:
+            for line in Path("/proc/self/io").read_text().splitlines():
+                key, _, value = line.partition(":")
+                io[key] = int(value)
+        except OSError:
+            pass
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return cls(
+            io.get("syscr", 0),
+            io.get("syscw", 0),
+            usage.ru_nvcsw,
+            usage.ru_nivcsw,
+            usage.ru_utime + usage.ru_stime,
+        )
+
+    def since(self, before: Counters) -> dict[str, float]:
+        """Différence avec un relevé antérieur."""
+        return {
+            "read_syscalls": self.read_syscalls - before.read_syscalls,
+            "write_syscalls": self.write_syscalls - before.write_syscalls,
+            "voluntary_switches": (
+                self.voluntary_switches - before.voluntary_switches
+            ),
+            "involuntary_switches": (
+                self.involuntary_switches - before.involuntary_switches
+            ),
+            "cpu_seconds": round(self.cpu_seconds - before.cpu_seconds, 4),
+        }
+
+
+def inventory(
+    targets: int, url_share: float, ports: list[int]
+) -> tuple[list[IpInfo], list[UrlInfo]]:
+    """IP et URL générées; les URL sont réparties sur les ports de la ferme."""
+    url_count = round(targets * url_share)
+    ips = [
+        IpInfo(ip=str(_IP_BASE + i), description=f"ip-{i}")
+        for i in range(targets - url_count)
+    ]
+    urls = [
+        UrlInfo(
+            url=f"http://127.0.0.1:{ports[i % len(ports)]}/t/{i}",
+            description=f"url-{i}",
+        )
+        for i in range(url_count)
+    ]
+    return ips, urls
+
+
+@contextmanager
+def fake_ping(latency: float, loss: float) -> Iterator[Path]:
+    """Met un faux ``ping`` en tête du ``PATH`` le temps du banc d'essai.
+
+    Retourne le fichier où chaque ping ajoute sa mémoire résidente maximale.
+    """
+    saved = {
+        key: os.environ.get(key)
+        for key in (
+            "PATH",
+            "IPM_BENCH_PING_LATENCY",
+            "IPM_BENCH_PING_LOSS",
+            "IPM_BENCH_PING_RSS",
+        )
+    }
+    with tempfile.TemporaryDirectory(prefix="ipm-bench-") as bin_dir:
+        script = Path(bin_dir) / "ping"
+        source = (BENCH_DIR / "fake_ping.py").read_text().split("\n", 1)[1]
+        # -S: pas de site-packages, démarrage plus rapide
+        script.write_text(f"#!{sys.executable} -S\n{source}")
+        script.chmod(0o755)
+        os.environ["PATH"] = f"{bin_dir}{os.pathsep}{saved['PATH'] or ''}"
+        os.environ["IPM_BENCH_PING_LATENCY"] = str(latency)
+        os.environ["IPM_BENCH_PING_LOSS"] = str(loss)
+        rss_report = Path(bin_dir) / "rss"
+        os.environ["IPM_BENCH_PING_RSS"] = str(rss_report)
+        # L'environnement des pings est préparé une fois: le recalculer
+        monitoring._ping_env.cache_clear()
+        try:
+            yield rss_report
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            monitoring._ping_env.cache_clear()
+
+
+@asynccontextmanager
+async def http_farm(scenario: Scenario) -> AsyncIterator[list[int]]:
+    """Lance la ferme HTTP dans un sous-processus et renvoie ses ports."""
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "benchmarks.farm",
+        f"--servers={scenario.servers}",
+        f"--delay={scenario.http_delay}",
+        f"--head={scenario.head}",
+        f"--error-rate={scenario.error_rate}",
+        cwd=BENCH_DIR.parent,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    try:
+        if proc.stdout is None:
+            raise RuntimeError("sortie de la ferme HTTP non capturée")
+        async with asyncio.timeout(30):
+            ports: list[int] = json.loads(await proc.stdout.readline())
+        yield ports
+    finally:
+        if proc.returncode is None:
+            proc.terminate()
+            await proc.wait()
+
+
+def _config(db_path: Path, ips: list[IpInfo], urls: list[UrlInfo]) -> Config:
+    return Config(
+        db_path=db_path,
+        notify_method=NotifyMethod.NTFY_SH,
+        ntfy={"server": "http://127.0.0.1:9", "topic": "bench"},  # type: ignore[arg-type]
+        ips=ips,
+        urls=urls,
+    )
+
+
+async def run(scenario: Scenario) -> dict[str, Any]:
+    """Exécute les cycles d'un scénario et renvoie les mesures."""
+    notifications = 0
+
+    async def count_notification(*args: Any) -> bool:
+        nonlocal notifications
+        notifications += 1
+        return True
+
+    monitoring.notify_channel = count_notification  # type: ignore[assignment]
+    params = RuntimeParams(
+        http_timeout=scenario.http_timeout,
+        http_connector_limit=scenario.http_connector_limit,
+        concurrency=scenario.concurrency,
+        ping_timeout=scenario.ping_timeout,
+        quiet=True,
+    )
+    cycles: list[dict[str, Any]] = []
+    with (
+        fake_ping(scenario.ping_latency, scenario.ping_loss) as rss_report,
+        tempfile.TemporaryDirectory(prefix="ipm-bench-db-") as db_dir,
+    ):
+        async with http_farm(scenario) as ports:
+            ips, urls = inventory(scenario.targets, scenario.url_share, ports)
+            config = _config(Path(db_dir) / "bench.db", ips, urls)
+            conn = await init_db(config.db_path)
+            sqlite = SqliteTimer()
+            sqlite.attach(conn)
+            try:
+                for index in range(scenario.cycles):
+                    sqlite.seconds, sqlite.calls = 0.0, 0
+                    before = Counters.now()
+                    start = time.perf_counter()
+                    summary = await _run_all_checks(conn, config, params)
+                    wall = time.perf_counter() - start
+                    cycles.append(
+                        {
+                            "cycle": index + 1,
+                            "wall_seconds": round(wall, 4),
+                            "targets_per_second": round(
+                                scenario.targets / wall, 1
+                            ),
+                            "sqlite_seconds": round(sqlite.seconds, 4),
+                            "sqlite_calls": sqlite.calls,
+                            **Counters.now().since(before),
+                            "down": len(summary.down),
+                            "up": len(summary.up),
+                            "unknown": len(summary.unknown),
+                            "http_created": summary.http_created,
+                            "http_reused": summary.http_reused,
+                        }
+                    )
+            finally:
+                await conn.close()
+        ping_rss = _ping_peak_rss(rss_report)
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "ip_monitor": _version(),
+        "python": platform.python_version(),
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "scenario": asdict(scenario),
+        "cycles": cycles,
+        # ru_maxrss est en Kio sous Linux
+        "peak_rss_kib": own.ru_maxrss,
+        "ping_peak_rss_kib": ping_rss,
+        "notifications": notifications,
+    }
+
+
+def _ping_peak_rss(report: Path) -> int:
+    """Plus grande mémoire résidente relevée par les pings, en Kio.
+
+    ``RUSAGE_CHILDREN`` ne convient pas: il compte la ferme HTTP et, sous
+    Linux, la mémoire du banc d'essai d'avant ``exec`` de chaque ping.
+    """
+    try:
+        return max(map(int, report.read_text().split()), default=0)
+    except FileNotFoundError:
+        return 0
+
+
+def measure(scenario: Scenario, *, verbose: bool = False) -> dict[str, Any]:
+    """Exécute un scénario dans le processus courant."""
+    if not verbose:
+        # Chaque ping perdu journalise son délai dépassé
+        logging.disable(logging.CRITICAL)
+    if scenario.uvloop:
+        import uvloop  # noqa: PLC0415
+
+        return uvloop.run(run(scenario))
+    return asyncio.run(run(scenario))
+
+
+def _version() -> str:
+    try:
+        return metadata.version("ip-monitor")
+    except metadata.PackageNotFoundError:
+        # Arbre source non installé
+        pyproject = tomllib.loads(
+            (BENCH_DIR.parent / "pyproject.toml").read_text()
+        )
+        return str(pyproject["project"]["version"])
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    defaults = Scenario()
+    parser = argparse.ArgumentParser(
+        description="Banc d'essai de bout en bout d'ip-monitor."
+    )
+    parser.add_argument(
+        "--targets",
+        type=int,
+        nargs="+",
+        default=[defaults.targets],
+        help="Taille(s) d'inventaire, ex. 1000 10000 100000",
+    )
+    for name in (
+        "url_share",
+        "ping_latency",
+        "ping_loss",
+        "http_delay",
+        "error_rate",
+        "ping_timeout",
+        "http_timeout",
+    ):
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=float,
+            default=getattr(defaults, name),
+        )
+    for name in ("servers", "concurrency", "http_connector_limit", "cycles"):
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=int,
+            default=getattr(defaults, name),
+        )
+    parser.add_argument(
+        "--head",
+        choices=("ok", "reject"),
+        default=defaults.head,
+        help="reject: HEAD répond 405, le client retombe sur GET",
+    )
+    parser.add_argument(
+        "--no-uvloop",
+        dest="uvloop",
+        action="store_false",
+        help="Boucle asyncio standard au lieu d'uvloop",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Affiche les erreurs journalisées (pings perdus, etc.)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=RESULTS_DIR,
+        help="Répertoire des résultats JSON (benchmarks/results)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Point d'entrée ``python -m benchmarks.run``."""
+    args = _parse_args(argv)
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    options = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in {"targets", "output_dir", "verbose"}
+    }
+    for targets in args.targets:
+        scenario = Scenario(targets=targets, **options)
+        # Processus neuf: les maxima de getrusage ne cumulent pas les
+        # scénarios précédents
+        with ProcessPoolExecutor(
+            1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            result = pool.submit(
+                measure, scenario, verbose=args.verbose
+            ).result()
+        path = args.output_dir / f"{result['ip_monitor']}-{targets}.json"
+        path.write_text(json.dumps(result, indent=2) + "\n")
+        for cycle in result["cycles"]:
+            print(
+                f"{targets} cibles, cycle {cycle['cycle']}: "
+                f"{cycle['wall_seconds']} s, "
+                f"SQLite {cycle['sqlite_seconds']} s, "
+                f"{cycle['read_syscalls'] + cycle['write_syscalls']} "
+                "appels système E/S"
+            )
+        print(f"RSS max: {result['peak_rss_kib']} Kio -> {path}")
+
+
+if __name__ == "__main__":
+    main()
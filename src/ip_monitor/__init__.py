@@ -1,4 +1,4 @@
-"""Init file which only contains entry point."""
+"""Entry point of the CLI and public async probing API (see ``api``)."""
 # PYTHON_ARGCOMPLETE_OK
 
 from __future__ import annotations
@@ -6,8 +6,21 @@ from __future__ import annotations
 import platform
 import sys
 
+from .api import ProbeLimits, ProbeResult, probe
+from .config import IpInfo, TcpInfo, UrlInfo
 from .monitoring import main
 
+__all__ = [
+    "IpInfo",
+    "ProbeLimits",
+    "ProbeResult",
+    "TcpInfo",
+    "UrlInfo",
+    "entry_point",
+    "main",
+    "probe",
+]
+
 
 def entry_point() -> None:  # pragma: no cover - testé via main(), pas via CLI
     """Run CLI; refuse proprement sur Windows."""
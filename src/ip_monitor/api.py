@@ -0,0 +1,180 @@
+"""API asynchrone de vérification, utilisable sans la CLI.
+
+    from ip_monitor import IpInfo, ProbeLimits, UrlInfo, probe
+
+    async for result in probe(
+        [IpInfo("192.0.2.1", "routeur"), UrlInfo("https://example.org", "site")],
+        ProbeLimits(concurrency=50),
+    ):
+        print(result.address, result.is_up, result.seconds)
+
+Les vérifications reprennent les moteurs de la CLI (``ping``,
+``check_url``, ``tcp_connect``) et sa session HTTP, sans argparse,
+affichage ni SQLite: rien n'est enregistré ni notifié, aucun statut n'est
+comparé. Les résultats arrivent dans l'ordre où les vérifications se
+terminent. Fermer l'itérateur (``contextlib.aclosing`` pour sortir de la
+boucle avant la fin) annule celles qui restent: les pings en cours sont
+tués. Dépendances, priorités et confirmations restent propres
+au cycle de la CLI.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from aiohttp import ClientSession, ClientTimeout
+
+from . import monitoring
+from .config import IpInfo, UrlInfo, split_host_port
+from .http_pool import HttpOptions, open_session
+
+if TYPE_CHECKING:
+    from .config import Config, Target
+
+
+@dataclass(frozen=True)
+class ProbeLimits:
+    """Concurrence et délais des vérifications (défauts de la CLI)."""
+
+    concurrency: int = 20
+    ping_timeout: float = 15.0
+    http_timeout: float = 7.0
+    tcp_timeout: float = 5.0
+    http_connector_limit: int = 50
+
+    @classmethod
+    def from_config(cls, config: Config) -> ProbeLimits:
+        """Limites d'une configuration chargée (YAML seul, sans ENV)."""
+        return cls(
+            config.concurrency,
+            config.ping_timeout,
+            config.http_timeout,
+            config.tcp_timeout,
+            config.http_connector_limit,
+        )
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """Résultat de la vérification d'une cible."""
+
+    target: Target
+    addr_type: str
+    address: str
+    is_up: bool
+    # Durée de la vérification, en secondes
+    seconds: float
+    timed_out: bool = False
+    # Exception inattendue (la cible est alors considérée down)
+    error: BaseException | None = None
+
+
+def _engine(
+    target: Target, limits: ProbeLimits, session: ClientSession | None
+) -> tuple[str, str, float, Callable[[], Awaitable[bool]]]:
+    """Type, adresse, délai et vérification d'une cible."""
+    if isinstance(target, IpInfo):
+        return (
+            "IP",
+            target.ip,
+            limits.ping_timeout if target.timeout is None else target.timeout,
+            lambda: monitoring.ping(target.ip, target.timeout),
+        )
+    if isinstance(target, UrlInfo):
+        if session is None:  # pragma: no cover - ouverte dès qu'il y a une URL
+            raise RuntimeError("session HTTP manquante")
+        max_wait = (
+            limits.http_timeout if target.timeout is None else target.timeout
+        )
+        return (
+            "URL",
+            target.url,
+            max_wait,
+            lambda: monitoring.check_url(session, target.url, max_wait),
+        )
+    host, port = split_host_port(target.tcp)
+    return (
+        "TCP",
+        target.tcp,
+        limits.tcp_timeout if target.timeout is None else target.timeout,
+        lambda: monitoring.tcp_connect(host, port),
+    )
+
+
+async def _check(
+    target: Target,
+    limits: ProbeLimits,
+    session: ClientSession | None,
+    semaphore: asyncio.Semaphore,
+) -> ProbeResult:
+    addr_type, address, max_wait, check = _engine(target, limits, session)
+    async with semaphore:
+        start = time.perf_counter()
+        timed_out = False
+        error: BaseException | None = None
+        try:
+            async with asyncio.timeout(max_wait):
+                is_up = await check()
+        except TimeoutError:
+            is_up, timed_out = False, True
+        except Exception as exc:
+            is_up, error = False, exc
+        seconds = time.perf_counter() - start
+    return ProbeResult(
+        target, addr_type, address, is_up, seconds, timed_out, error
+    )
+
+
+@asynccontextmanager
+async def _http(
+    limits: ProbeLimits, session: ClientSession | None, needed: bool
+) -> AsyncIterator[ClientSession | None]:
+    """Session fournie, sinon une session dédiée si des URL sont vérifiées."""
+    if session is not None or not needed:
+        yield session
+        return
+    own = open_session(
+        HttpOptions(
+            ClientTimeout(total=limits.http_timeout),
+            limits.http_connector_limit,
+        )
+    )
+    try:
+        yield own
+    finally:
+        await own.close()
+
+
+async def probe(
+    targets: Iterable[Target],
+    limits: ProbeLimits | None = None,
+    *,
+    session: ClientSession | None = None,
+) -> AsyncIterator[ProbeResult]:
+    """Vérifie les cibles et produit les résultats au fil de l'eau.
+
+    ``session``: session aiohttp de l'appelant, réutilisée pour les URL
+    (sinon une session est ouverte puis fermée par l'itération). Les
+    vérifications restantes sont annulées à la fermeture de l'itérateur.
+    """
+    limits = limits or ProbeLimits()
+    targets = list(targets)
+    semaphore = asyncio.Semaphore(limits.concurrency)
+    needed = any(isinstance(target, UrlInfo) for target in targets)
+    async with _http(limits, session, needed) as http:
+        tasks = [
+            asyncio.create_task(_check(target, limits, http, semaphore))
+            for target in targets
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
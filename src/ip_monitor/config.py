@@ -9,7 +9,7 @@ from __future__ import annotations
 
 import logging
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import StrEnum
 from pathlib import Path
 from typing import Self
@@ -102,9 +102,72 @@ class NotifyMethod(StrEnum):
     NTFY_SH = "ntfy"
     SMSBOX = "smsbox"
 
+    @property
+    def name_in_config(self) -> str:
+        """Nom de la section de configuration du backend."""
+        return "ntfy" if self is NotifyMethod.NTFY_SH else "smsbox"
+
+
+class Severity(StrEnum):
+    """Gravité d'une cible, utilisée pour filtrer les canaux."""
+
+    INFO = "info"
+    WARNING = "warning"
+    CRITICAL = "critical"
+
+    @property
+    def rank(self) -> int:
+        """Rang de la gravité (comparaisons)."""
+        return list(Severity).index(self)
+
+
+class PrecheckMode(StrEnum):
+    """Mode de vérification de la connexion locale."""
+
+    # Ping de 1.1.1.1 avant toute vérification
+    SERIAL = "serial"
+    # Ancres interrogées en parallèle des vérifications
+    INLINE = "inline"
+
+
+class LockPolicy(StrEnum):
+    """Comportement si une autre instance tient déjà le verrou."""
+
+    SKIP = "skip"
+    WAIT = "wait"
+    TAKEOVER = "takeover"
+
+
+@dataclass(kw_only=True)
+class _TargetInfo:
+    """Réglages communs à tous les types de cible.
+
+    Champs nommés uniquement: l'adresse et la description restent les deux
+    premiers arguments positionnels des sous-classes.
+    """
+
+    tags: list[str] = field(default_factory=list)
+    severity: Severity = Severity.WARNING
+    # Adresses (IP, URL ou TCP) des cibles dont celle-ci dépend
+    depends_on: list[str] = field(default_factory=list)
+    # Ordre de vérification (plus grand: plus tôt); <= 0: délestable
+    priority: int = 0
+    # Délai propre à la cible, en secondes (None: appris ou global)
+    timeout: float | None = None
+
+    def __post_init__(self) -> None:
+        """Normalise les valeurs lues dans le YAML (gravité, parent unique)."""
+        self.severity = Severity(self.severity)
+        self.priority = int(self.priority)
+        if self.timeout is not None:
+            self.timeout = float(self.timeout)
+        deps: object = self.depends_on
+        if isinstance(deps, str):
+            self.depends_on = [deps]
+
 
 @dataclass
-class UrlInfo:
+class UrlInfo(_TargetInfo):
     """Informations pour une URL."""
 
     url: str
@@ -112,13 +175,44 @@ class UrlInfo:
 
 
 @dataclass
-class IpInfo:
+class IpInfo(_TargetInfo):
     """Informations pour une IP."""
 
     ip: str
     description: str
 
 
+_MAX_PORT = 65535
+
+
+def split_host_port(address: str) -> tuple[str, int]:
+    """Découpe « hôte:port » (« [IPv6]:port » pour une IPv6)."""
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit() or not 0 < int(port) <= _MAX_PORT:
+        raise ValueError(f"{address!r}: expected host:port")
+    return host.removeprefix("[").removesuffix("]"), int(port)
+
+
+@dataclass
+class TcpInfo(_TargetInfo):
+    """Informations pour un service TCP (« hôte:port »)."""
+
+    tcp: str
+    description: str
+
+    def __post_init__(self) -> None:
+        """Normalise les réglages après avoir validé l'adresse."""
+        split_host_port(self.tcp)
+        super().__post_init__()
+
+
+# Cible surveillée, quel que soit son type
+Target = IpInfo | UrlInfo | TcpInfo
+
+# Types d'adresse, dans l'ordre de la configuration
+ADDR_TYPES = ("IP", "URL", "TCP")
+
+
 class SMSBoxConfig(BaseModel):
     """Configuration SMSBox."""
 
@@ -133,6 +227,64 @@ class NtfyConfig(BaseModel):
     topic: str
 
 
+class ChannelConfig(BaseModel):
+    """Canal de notification et filtre des cibles qu'il reçoit."""
+
+    name: str
+    method: NotifyMethod
+    ntfy: NtfyConfig | None = Field(default=None)
+    smsbox: SMSBoxConfig | None = Field(default=None)
+    # Cibles portant au moins une de ces étiquettes (vide: toutes)
+    tags: list[str] = Field(default_factory=list)
+    min_severity: Severity = Field(default=Severity.INFO)
+    timeout: float = Field(default=10.0, gt=0)
+    # Budget de taille d'un message (ntfy: octets, smsbox: segments)
+    max_message_bytes: int = Field(default=4096, gt=0)
+    max_sms_segments: int = Field(default=3, gt=0)
+    # Limite de débit: messages par heure (None: illimité) et rafale
+    rate_limit: float | None = Field(default=None, gt=0)
+    rate_burst: int = Field(default=5, gt=0)
+
+    @model_validator(mode="after")
+    def validate_backend(self: Self) -> Self:
+        """S'assure que la configuration du backend du canal est fournie."""
+        if getattr(self, self.method.name_in_config) is None:
+            raise ValueError(
+                f"{self.method.name_in_config} configuration must be provided"
+                f' for channel "{self.name}"'
+            )
+        return self
+
+    def matches(self, tags: list[str], severity: Severity) -> bool:
+        """Retourne True si une cible (étiquettes, gravité) passe le filtre."""
+        if severity.rank < self.min_severity.rank:
+            return False
+        return not self.tags or any(tag in self.tags for tag in tags)
+
+
+def _find_cycle[Node](parents: dict[Node, list[Node]]) -> list[Node]:
+    """Retourne un cycle du graphe des dépendances (vide s'il n'y en a pas)."""
+    done: set[Node] = set()
+
+    def visit(node: Node, path: list[Node]) -> list[Node]:
+        if node in path:
+            return [*path[path.index(node) :], node]
+        if node in done:
+            return []
+        for parent in parents.get(node, []):
+            cycle = visit(parent, [*path, node])
+            if cycle:
+                return cycle
+        done.add(node)
+        return []
+
+    for node in parents:
+        cycle = visit(node, [])
+        if cycle:
+            return cycle
+    return []
+
+
 def _default_db_path() -> Path:
     """Chemin DB par défaut dans le répertoire de données utilisateur.
 
@@ -151,18 +303,84 @@ class Config(BaseModel):
     """Configuration principale."""
 
     db_path: Path = Field(default_factory=_default_db_path)
-    notify_method: NotifyMethod
+    notify_method: NotifyMethod | None = Field(default=None)
     ntfy: NtfyConfig | None = Field(default=None)
     smsbox: SMSBoxConfig | None = Field(default=None)
+    # Canaux de notification (remplacent notify_method s'ils sont définis)
+    channels: list[ChannelConfig] = Field(default_factory=list)
     ips: list[IpInfo] = Field(default_factory=list)
     urls: list[UrlInfo] = Field(default_factory=list)
+    tcp: list[TcpInfo] = Field(default_factory=list)
+    # Délai (s) d'une connexion TCP, sans timeout propre à la cible
+    tcp_timeout: float = Field(default=5.0, gt=0)
     precheck_enabled: bool = Field(default=True)
     # Paramètres de performance (valeurs par défaut sûres)
     precheck_timeout: float = Field(default=10.0, gt=0)
+    precheck_mode: PrecheckMode = Field(default=PrecheckMode.SERIAL)
+    # Ancres du mode inline: IP (ping) ou URL http(s) (toute réponse HTTP)
+    precheck_anchors: list[str] = Field(
+        default_factory=lambda: ["1.1.1.1", "9.9.9.9", "https://1.1.1.1"],
+        min_length=1,
+    )
+    # Part de cibles down au-delà de laquelle le cycle est abandonné
+    local_outage_ratio: float | None = Field(default=None, gt=0, le=1)
     ping_timeout: float = Field(default=15.0, gt=0)
     http_timeout: float = Field(default=7.0, gt=0)
     http_connector_limit: int = Field(default=50, gt=0)
+    # Connexions simultanées vers un même hôte (0: sans limite)
+    http_limit_per_host: int = Field(default=0, ge=0)
+    # Durée de vie (s) d'une connexion inutilisée (None: 15 s, ou deux
+    # intervalles en mode boucle)
+    http_keepalive_timeout: float | None = Field(default=None, gt=0)
+    # Mode résident: intervalle (s) entre deux cycles (None: un seul cycle)
+    loop_interval: float | None = Field(default=None, gt=0)
     concurrency: int = Field(default=20, gt=0)
+    # Confirmation des transitions (0: désactivée) sur une voie prioritaire
+    confirm_attempts: int = Field(default=0, ge=0)
+    confirm_interval: float = Field(default=1.0, ge=0)
+    confirm_concurrency: int = Field(default=5, gt=0)
+    # Cibles down depuis longtemps vérifiées de moins en moins souvent
+    # (None: toujours vérifiées)
+    down_backoff_after: float | None = Field(default=None, gt=0)
+    down_backoff_base: float = Field(default=300.0, gt=0)
+    down_backoff_max: float = Field(default=3600.0, gt=0)
+    # Traitement en flux: micro-lots d'écriture/notification
+    flush_batch_size: int = Field(default=50, gt=0)
+    notify_batch_window: float = Field(default=2.0, ge=0)
+    # Durée maximale d'un cycle (None: pas de limite)
+    cycle_deadline: float | None = Field(default=None, gt=0)
+    # Délai d'une cible sans timeout explicite: adaptive_timeout_factor
+    # fois le p99 de ses latences, borné entre adaptive_timeout_min et
+    # ping_timeout/http_timeout (None: délais globaux)
+    adaptive_timeout_factor: float | None = Field(default=None, gt=0)
+    adaptive_timeout_min: float = Field(default=1.5, gt=0)
+    # Requête HTTP doublée si une URL tarde au-delà de ce percentile de
+    # son historique de latence (None: désactivé), au plus pour
+    # hedge_max_ratio des URL par cycle
+    hedge_percentile: float | None = Field(default=None, gt=0, lt=100)
+    hedge_max_ratio: float = Field(default=0.1, gt=0, le=1)
+    # Dernières secondes avant l'échéance pendant lesquelles les cibles de
+    # priorité <= 0 pas encore démarrées sont délestées (None: jamais)
+    deadline_shed_margin: float | None = Field(default=None, gt=0)
+    # Verrou d'exécution (une seule instance par db_path)
+    lock_policy: LockPolicy = Field(default=LockPolicy.SKIP)
+    lock_timeout: float = Field(default=60.0, gt=0)
+    lock_stale_after: float = Field(default=3600.0, gt=0)
+    # Boîte d'envoi des notifications (nouvelles tentatives)
+    outbox_max_attempts: int = Field(default=8, gt=0)
+    outbox_backoff_base: float = Field(default=5.0, gt=0)
+    outbox_backoff_max: float = Field(default=900.0, gt=0)
+    outbox_drain_timeout: float = Field(default=30.0, ge=0)
+    # Métriques Prometheus: fichier du textfile collector de node_exporter
+    # (None: non écrit) et adresse hôte:port du point /metrics servi en
+    # mode boucle (None: pas de serveur)
+    metrics_textfile: Path | None = Field(default=None)
+    metrics_listen: str | None = Field(default=None)
+    # Santé de la boucle d'événements: période (s) du minuteur de mesure
+    # (None: désactivée) et part du plus court délai de vérification que
+    # le retard de la boucle ne doit pas dépasser
+    loop_monitor_interval: float | None = Field(default=None, gt=0)
+    loop_lag_warn_ratio: float = Field(default=0.1, gt=0, le=1)
 
     @field_validator("db_path")
     @classmethod
@@ -178,6 +396,16 @@ class Config(BaseModel):
             raise ValueError(f"No write permission in {value}")
         return value
 
+    @field_validator("metrics_listen")
+    @classmethod
+    def validate_metrics_listen(
+        cls: type[Config], value: str | None
+    ) -> str | None:
+        """Vérifie que metrics_listen est de la forme hôte:port."""
+        if value is not None:
+            split_host_port(value)
+        return value
+
     @model_validator(mode="after")
     def validate_ntfy(self: Self) -> Self:
         """S'assure que la configuration ntfy est bien spécifiée si ntfy.sh est utilisé."""
@@ -196,12 +424,76 @@ class Config(BaseModel):
             )
         return self
 
+    @model_validator(mode="after")
+    def validate_channels(self: Self) -> Self:
+        """S'assure qu'au moins un canal est défini, avec des noms uniques."""
+        if self.notify_method is None and not self.channels:
+            raise ValueError('One of "notify_method" or "channels" is required')
+        names = [channel.name for channel in self.channels]
+        if len(names) != len(set(names)):
+            raise ValueError("Channel names must be unique")
+        return self
+
+    @model_validator(mode="after")
+    def check_dependencies(self: Self) -> Self:
+        """S'assure que depends_on désigne des cibles connues, sans cycle.
+
+        Les cibles sont indexées par (type, adresse): une IP et une URL de
+        même adresse sont distinctes, et un parent désigne toutes les
+        cibles de cette adresse.
+        """
+        deps: dict[tuple[str, str], list[str]] = (
+            {("IP", ip.ip): ip.depends_on for ip in self.ips}
+            | {("URL", url.url): url.depends_on for url in self.urls}
+            | {("TCP", tcp.tcp): tcp.depends_on for tcp in self.tcp}
+        )
+        known = {address for _, address in deps}
+        for key, addresses in deps.items():
+            unknown = [address for address in addresses if address not in known]
+            if unknown:
+                raise ValueError(
+                    f"{key[1]} depends on unknown target(s): "
+                    f"{', '.join(unknown)}"
+                )
+        parents = {
+            key: [
+                (addr_type, address)
+                for address in addresses
+                for addr_type in ADDR_TYPES
+                if (addr_type, address) in deps
+            ]
+            for key, addresses in deps.items()
+        }
+        cycle = _find_cycle(parents)
+        if cycle:
+            raise ValueError(
+                f"Dependency cycle: {' -> '.join(key[1] for key in cycle)}"
+            )
+        return self
+
+    def notification_channels(self) -> list[ChannelConfig]:
+        """Canaux effectifs.
+
+        Sans section ``channels``, un canal unique sans filtre est déduit de
+        ``notify_method`` (comportement historique).
+        """
+        if self.channels or self.notify_method is None:
+            return self.channels
+        return [
+            ChannelConfig(
+                name=self.notify_method.value,
+                method=self.notify_method,
+                ntfy=self.ntfy,
+                smsbox=self.smsbox,
+            )
+        ]
+
     @model_validator(mode="after")
     def check_ips_and_urls(self: Self) -> Self:
-        """S'assure' qu'il y a bien au moins une IP ou une URL à surveiller."""
-        if not self.ips and not self.urls:
+        """S'assure' qu'il y a bien au moins une cible à surveiller."""
+        if not self.ips and not self.urls and not self.tcp:
             raise ValueError(
-                'One of "ips" or "urls" must have at least one entry'
+                'One of "ips", "urls" or "tcp" must have at least one entry'
             )
         return self
 
@@ -218,4 +510,7 @@ async def load_config(config_file: str) -> Config:
         raw_config["urls"] = [
             UrlInfo(**url_data) for url_data in raw_config.get("urls", [])
         ]
+        raw_config["tcp"] = [
+            TcpInfo(**tcp_data) for tcp_data in raw_config.get("tcp", [])
+        ]
         return Config.model_validate(raw_config)
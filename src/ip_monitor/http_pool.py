@@ -0,0 +1,124 @@
+"""Sessions HTTP et réutilisation des connexions.
+
+En mode ``--loop``, une même session sert à tous les cycles: les connexions
+restent ouvertes entre deux cycles (``http_keepalive_timeout``) et ne
+repassent pas par les poignées de main TCP et TLS. Toutes les sessions
+partagent un même ``ssl.SSLContext`` (magasin de certificats chargé une
+seule fois). ``ConnectionStats`` compte, via les traces aiohttp, les
+connexions ouvertes et celles réutilisées.
+"""
+
+from __future__ import annotations
+
+import ssl
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
+
+if TYPE_CHECKING:
+    from types import SimpleNamespace
+
+    from aiohttp import (
+        TraceConnectionCreateEndParams,
+        TraceConnectionReuseconnParams,
+    )
+
+
+@cache
+def shared_ssl_context() -> ssl.SSLContext:
+    """Contexte TLS commun à toutes les sessions du processus."""
+    return ssl.create_default_context()
+
+
+@dataclass
+class ConnectionStats:
+    """Connexions HTTP ouvertes et réutilisées depuis la création."""
+
+    created: int = 0
+    reused: int = 0
+
+    def snapshot(self) -> tuple[int, int]:
+        """Compteurs courants (ouvertes, réutilisées)."""
+        return self.created, self.reused
+
+    def trace_config(self) -> TraceConfig:
+        """Trace aiohttp qui alimente les compteurs."""
+        trace = TraceConfig()
+
+        async def on_create(
+            session: ClientSession,
+            context: SimpleNamespace,
+            params: TraceConnectionCreateEndParams,
+        ) -> None:
+            self.created += 1
+
+        async def on_reuse(
+            session: ClientSession,
+            context: SimpleNamespace,
+            params: TraceConnectionReuseconnParams,
+        ) -> None:
+            self.reused += 1
+
+        trace.on_connection_create_end.append(on_create)
+        trace.on_connection_reuseconn.append(on_reuse)
+        return trace
+
+
+@dataclass
+class HttpOptions:
+    """Options du connecteur HTTP (limites par hôte et keepalive)."""
+
+    timeout: ClientTimeout
+    limit: int
+    limit_per_host: int = 0
+    # Durée de vie d'une connexion inutilisée (None: défaut aiohttp)
+    keepalive_timeout: float | None = None
+
+
+def open_session(
+    options: HttpOptions,
+    *,
+    stats: ConnectionStats | None = None,
+    force_close: bool = False,
+) -> ClientSession:
+    """Crée une session; ``force_close``: aucune connexion réutilisée."""
+    # aiohttp refuse keepalive_timeout avec force_close
+    reuse: dict[str, Any] = {"force_close": True}
+    if not force_close:
+        reuse = (
+            {}
+            if options.keepalive_timeout is None
+            else {"keepalive_timeout": options.keepalive_timeout}
+        )
+    connector = TCPConnector(
+        limit=options.limit,
+        limit_per_host=options.limit_per_host,
+        ssl=shared_ssl_context(),
+        **reuse,
+    )
+    return ClientSession(
+        timeout=options.timeout,
+        connector=connector,
+        trace_configs=None if stats is None else [stats.trace_config()],
+    )
+
+
+@dataclass
+class HttpClient:
+    """Session HTTP et compteurs de ses connexions."""
+
+    options: HttpOptions
+    session: ClientSession
+    stats: ConnectionStats
+
+    @classmethod
+    def open(cls, options: HttpOptions) -> HttpClient:
+        """Crée la session, avec comptage des connexions."""
+        stats = ConnectionStats()
+        return cls(options, open_session(options, stats=stats), stats)
+
+    async def close(self) -> None:
+        """Ferme la session et ses connexions."""
+        await self.session.close()
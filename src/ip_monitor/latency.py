@@ -0,0 +1,176 @@
+"""Historique des latences, délais appris et requêtes HTTP doublées.
+
+La durée des vérifications réussies est conservée par cible dans la table
+``latency`` (les ``HISTORY_SIZE`` dernières mesures). Le délai d'une cible
+peut en être déduit (``learned_timeout``). Quand le hedging est
+activé, une URL qui n'a pas répondu au bout du percentile configuré de son
+historique est interrogée une seconde fois, sur une connexion neuve; la
+première réponse l'emporte et l'autre requête est annulée. Le nombre de
+requêtes doublées par cycle est plafonné (``HedgeBudget``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+    from .state import StatusKey
+
+CREATE_LATENCY_TABLE = """CREATE TABLE IF NOT EXISTS latency (
+                           id INTEGER PRIMARY KEY,
+                           type TEXT NOT NULL,
+                           address TEXT NOT NULL,
+                           seconds REAL NOT NULL,
+                           measured_at REAL NOT NULL
+                           )"""
+CREATE_LATENCY_INDEX = """CREATE INDEX IF NOT EXISTS latency_target
+                           ON latency(type, address, id)"""
+
+# Mesures conservées par cible
+HISTORY_SIZE = 100
+# Mesures nécessaires avant d'utiliser un percentile
+MIN_SAMPLES = 5
+# Percentile de référence des délais appris
+TIMEOUT_PERCENTILE = 99
+
+
+class LatencyHistory:
+    """Dernières latences de chaque cible, avec écritures différées."""
+
+    def __init__(
+        self, samples: dict[StatusKey, list[float]] | None = None
+    ) -> None:
+        """Initialise l'historique (type, adresse) → latences, en secondes."""
+        self._samples: dict[StatusKey, deque[float]] = {
+            key: deque(values, maxlen=HISTORY_SIZE)
+            for key, values in (samples or {}).items()
+        }
+        self._pending: list[tuple[str, str, float, float]] = []
+
+    @classmethod
+    async def load(cls, conn: aiosqlite.Connection) -> LatencyHistory:
+        """Charge l'historique de toutes les cibles."""
+        rows = await conn.execute_fetchall(
+            "SELECT type, address, seconds FROM latency ORDER BY id"
+        )
+        samples: dict[StatusKey, list[float]] = {}
+        for addr_type, address, seconds in rows:
+            samples.setdefault((addr_type, address), []).append(seconds)
+        return cls(samples)
+
+    def record(self, addr_type: str, address: str, seconds: float) -> None:
+        """Ajoute une mesure; l'écriture est différée."""
+        key = (addr_type, address)
+        self._samples.setdefault(key, deque(maxlen=HISTORY_SIZE)).append(
+            seconds
+        )
+        self._pending.append((addr_type, address, seconds, time.time()))
+
+    def percentile(
+        self, addr_type: str, address: str, q: float
+    ) -> float | None:
+        """Percentile ``q`` (rang le plus proche), None si trop peu de mesures."""
+        samples = sorted(self._samples.get((addr_type, address), ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        rank = max(1, math.ceil(q / 100 * len(samples)))
+        return samples[rank - 1]
+
+    async def flush(self, conn: aiosqlite.Connection) -> None:
+        """Écrit les mesures en attente et purge les plus anciennes.
+
+        La transaction n'est pas validée: l'appelant s'en charge.
+        """
+        if not self._pending:
+            return
+        await conn.executemany(
+            "INSERT INTO latency(type, address, seconds, measured_at)"
+            " VALUES (?, ?, ?, ?)",
+            self._pending,
+        )
+        await conn.executemany(
+            """
+            DELETE FROM latency
+            WHERE type = ? AND address = ? AND id NOT IN (
+              SELECT id FROM latency WHERE type = ? AND address = ?
+              ORDER BY id DESC LIMIT ?
+            )
+            """,
+            [
+                (t, a, t, a, HISTORY_SIZE)
+                for t, a in {(p[0], p[1]) for p in self._pending}
+            ],
+        )
+        self._pending.clear()
+
+
+def learned_timeout(
+    history: LatencyHistory,
+    target: tuple[str, str],
+    factor: float,
+    minimum: float,
+    default: float,
+) -> float:
+    """Délai d'une cible: ``factor`` fois son p99, borné à [minimum, default].
+
+    ``target`` est le couple (type, adresse). Retourne ``default`` tant
+    que l'historique est insuffisant.
+    """
+    p99 = history.percentile(*target, TIMEOUT_PERCENTILE)
+    if p99 is None:
+        return default
+    return min(default, max(minimum, p99 * factor))
+
+
+@dataclass
+class HedgeBudget:
+    """Nombre maximal de requêtes doublées sur un cycle."""
+
+    remaining: int
+
+    @classmethod
+    def for_targets(cls, count: int, ratio: float) -> HedgeBudget:
+        """Budget de ``ratio`` des ``count`` cibles (au moins une si > 0)."""
+        return cls(math.ceil(count * ratio))
+
+    def take(self) -> bool:
+        """Consomme une requête doublée s'il en reste."""
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+async def hedged(
+    primary: Callable[[], Coroutine[Any, Any, bool]],
+    secondary: Callable[[], Coroutine[Any, Any, bool]],
+    delay: float,
+    budget: HedgeBudget,
+) -> bool:
+    """Lance ``primary``, puis ``secondary`` s'il tarde plus de ``delay``.
+
+    La première réponse l'emporte et l'autre requête est annulée. Sans
+    budget restant, seule ``primary`` est attendue.
+    """
+    tasks = [asyncio.create_task(primary())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not budget.take():
+            return await tasks[0]
+        logging.info("Pas de réponse après %.3f s, requête doublée", delay)
+        tasks.append(asyncio.create_task(secondary()))
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        return done.pop().result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
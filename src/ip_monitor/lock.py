@@ -0,0 +1,140 @@
+"""Verrou d'exécution (une seule instance par base de données).
+
+Verrou consultatif ``fcntl.flock`` posé sur un fichier ``<db_path>.lock``.
+Le noyau libère le verrou à la mort du processus; le fichier contient le
+PID et l'heure de démarrage du détenteur pour diagnostiquer (ou reprendre)
+un verrou tenu par une exécution bloquée. En mode boucle, cette heure est
+rafraîchie à chaque cycle (``RunLock.heartbeat``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import logging
+import os
+import signal
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .config import LockPolicy
+
+# Intervalle de nouvelle tentative en attente du verrou
+_POLL_INTERVAL = 0.5
+
+
+def lock_path_for(db_path: Path) -> Path:
+    """Chemin du fichier verrou associé à une base."""
+    return db_path.with_name(f"{db_path.name}.lock")
+
+
+@dataclass
+class LockHolder:
+    """Détenteur actuel du verrou, tel qu'inscrit dans le fichier."""
+
+    pid: int
+    # Démarrage, ou dernier cycle d'un détenteur en mode boucle
+    started_at: float
+
+
+class RunLock:
+    """Verrou exclusif non bloquant sur un fichier."""
+
+    def __init__(self, path: Path) -> None:
+        """Prépare le verrou (le fichier est ouvert à l'acquisition)."""
+        self.path = path
+        self._fd: int | None = None
+
+    @property
+    def held(self) -> bool:
+        """True si ce processus détient le verrou."""
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Tente de prendre le verrou sans bloquer."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        self.heartbeat()
+        return True
+
+    def heartbeat(self) -> None:
+        """Inscrit le PID et l'heure courante dans le fichier verrou.
+
+        Appelé à chaque cycle du mode boucle: un détenteur qui avance n'est
+        jamais considéré comme bloqué par ``takeover``.
+        """
+        if self._fd is None:
+            return
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, f"{os.getpid()} {time.time():.3f}\n".encode(), 0)
+
+    def holder(self) -> LockHolder | None:
+        """Lit le PID et l'heure de démarrage du détenteur, si lisibles."""
+        try:
+            pid, started = self.path.read_text().split()
+            return LockHolder(int(pid), float(started))
+        except (OSError, ValueError):
+            return None
+
+    def release(self) -> None:
+        """Libère le verrou (sans effet s'il n'est pas détenu)."""
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+def _terminate_stale_holder(lock: RunLock, stale_after: float) -> bool:
+    """Envoie SIGTERM au détenteur s'il tient le verrou depuis trop longtemps."""
+    holder = lock.holder()
+    if holder is None or holder.pid == os.getpid():
+        return False
+    age = time.time() - holder.started_at
+    if age < stale_after:
+        return False
+    logging.warning(
+        "Verrou tenu par le PID %i depuis %.0f s: reprise (SIGTERM)",
+        holder.pid,
+        age,
+    )
+    with contextlib.suppress(ProcessLookupError, PermissionError):
+        os.kill(holder.pid, signal.SIGTERM)
+    return True
+
+
+async def acquire_run_lock(
+    lock: RunLock,
+    policy: LockPolicy,
+    max_wait: float,
+    stale_after: float,
+) -> str | None:
+    """Prend le verrou selon la politique choisie.
+
+    Retourne None si le verrou a été pris sans concurrence, sinon le
+    nom de l'événement de chevauchement: ``waited`` ou ``took_over`` si le
+    verrou a finalement été obtenu, ``skipped`` ou ``timeout`` sinon
+    (``lock.held`` reste alors faux).
+    """
+    if lock.try_acquire():
+        return None
+    if policy == LockPolicy.SKIP:
+        return "skipped"
+
+    took_over = False
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait
+    while loop.time() < deadline:
+        if policy == LockPolicy.TAKEOVER and not took_over:
+            took_over = _terminate_stale_holder(lock, stale_after)
+        await asyncio.sleep(_POLL_INTERVAL)
+        if lock.try_acquire():
+            return "took_over" if took_over else "waited"
+    return "timeout"
@@ -0,0 +1,78 @@
+"""Santé de la boucle d'événements pendant un cycle.
+
+Un délai dépassé peut venir du réseau ou de la boucle elle-même, saturée
+par les rappels des sous-processus ou par TLS: un ping qui a répondu à
+temps est alors lu trop tard. Un minuteur périodique mesure le retard avec
+lequel la boucle le réveille: le retard maximal et moyen, le nombre de
+réveils en retard d'au moins ``SLOW_CALLBACK`` (un rappel au moins a
+bloqué la boucle aussi longtemps) et le pic de tâches en cours.
+
+Mesure par échantillonnage plutôt que par le mode debug d'asyncio
+(``slow_callback_duration``), trop coûteux et ignoré par uvloop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from dataclasses import dataclass
+
+# Retard (s) à partir duquel un réveil compte comme rappel lent (valeur
+# par défaut de slow_callback_duration dans asyncio)
+SLOW_CALLBACK = 0.1
+
+
+@dataclass
+class LoopHealth:
+    """Mesures de la boucle d'événements sur un cycle."""
+
+    samples: int = 0
+    lag_max: float = 0.0
+    lag_total: float = 0.0
+    slow_callbacks: int = 0
+    peak_tasks: int = 0
+
+    @property
+    def lag_mean(self) -> float:
+        """Retard moyen des réveils."""
+        return self.lag_total / self.samples if self.samples else 0.0
+
+    def add(self, lag: float, tasks: int) -> None:
+        """Intègre un réveil du minuteur."""
+        self.samples += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self.slow_callbacks += lag >= SLOW_CALLBACK
+        self.peak_tasks = max(self.peak_tasks, tasks)
+
+
+class LoopMonitor:
+    """Minuteur périodique mesurant le retard de la boucle."""
+
+    def __init__(self, interval: float) -> None:
+        """Un réveil toutes les ``interval`` secondes."""
+        self.interval = interval
+        self.health = LoopHealth()
+        self._task: asyncio.Task[None] | None = None
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.health.add(
+                max(0.0, loop.time() - expected), len(asyncio.all_tasks(loop))
+            )
+
+    def start(self) -> None:
+        """Démarre les mesures."""
+        self._task = asyncio.create_task(self._sample())
+
+    async def stop(self) -> LoopHealth:
+        """Arrête les mesures et les retourne."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        return self.health
@@ -0,0 +1,265 @@
+"""Métriques Prometheus.
+
+État de chaque cible (up/down) et durée de sa dernière vérification,
+durée et étapes du dernier cycle, compteurs de vérifications. Les
+métriques sont tenues en mémoire et mises à jour en fin de cycle; le texte
+au format d'exposition est produit à ce moment-là, si bien qu'une collecte
+ne coûte ni calcul ni requête SQLite.
+
+Deux sorties: un fichier pour le textfile collector de node_exporter
+(``metrics_textfile``, remplacé atomiquement à chaque cycle) et, en mode
+boucle, un point ``/metrics`` servi par aiohttp (``--metrics-listen``).
+
+Les compteurs ``*_total`` sont cumulés dans la table ``counters``
+(``save_totals``) et relus au démarrage (``Metrics.load``): ils ne
+repartent pas de zéro à chaque exécution ponctuelle ni au redémarrage de
+la boucle.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+
+from .config import ADDR_TYPES
+from .state import increment_counter
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import aiosqlite
+
+    from .runs import RunRecord
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Préfixe des totaux persistés dans la table counters
+_TOTALS_PREFIX = "metrics_"
+
+# Métriques exposées: nom -> (type, aide)
+_FAMILIES = {
+    "ip_monitor_target_up": ("gauge", "Cible joignable (1) ou down (0)."),
+    "ip_monitor_target_probe_seconds": (
+        "gauge",
+        "Durée de la dernière vérification de la cible.",
+    ),
+    "ip_monitor_cycle_duration_seconds": (
+        "gauge",
+        "Durée du dernier cycle.",
+    ),
+    "ip_monitor_cycle_end_timestamp_seconds": (
+        "gauge",
+        "Fin du dernier cycle (horodatage Unix).",
+    ),
+    "ip_monitor_cycle_stage_seconds": (
+        "gauge",
+        "Durée de chaque étape du dernier cycle.",
+    ),
+    "ip_monitor_cycle_concurrency": (
+        "gauge",
+        "Pic de vérifications simultanées du dernier cycle.",
+    ),
+    "ip_monitor_cycles_total": ("counter", "Cycles terminés."),
+    "ip_monitor_probes_total": ("counter", "Vérifications, par type."),
+    "ip_monitor_probe_timeouts_total": (
+        "counter",
+        "Vérifications interrompues par leur délai.",
+    ),
+}
+
+
+def _escape(value: str) -> str:
+    """Échappe une valeur d'étiquette (format d'exposition)."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return f"{{{inner}}}"
+
+
+def _format_value(value: float) -> str:
+    """Valeur sans arrondi: entière si possible, sinon ``repr`` du flottant."""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _total_increments(record: RunRecord) -> dict[str, int]:
+    """Incréments des totaux persistés pour un cycle."""
+    return {
+        "cycles": 1,
+        **{f"probes_{t}": record.stats.probes[t] for t in ADDR_TYPES},
+        "probe_timeouts": record.stats.timeouts,
+    }
+
+
+async def save_totals(conn: aiosqlite.Connection, record: RunRecord) -> None:
+    """Ajoute les compteurs du cycle aux totaux de la table counters.
+
+    La transaction n'est pas validée.
+    """
+    for name, value in _total_increments(record).items():
+        await increment_counter(conn, f"{_TOTALS_PREFIX}{name}", value)
+
+
+@dataclass
+class TargetState:
+    """État d'une cible à la fin du cycle."""
+
+    addr_type: str
+    address: str
+    description: str
+    is_down: bool
+
+
+class Metrics:
+    """Métriques en mémoire et leur rendu au format d'exposition."""
+
+    def __init__(self) -> None:
+        """Aucune métrique tant qu'aucun cycle n'est terminé."""
+        self.targets: list[TargetState] = []
+        # Dernière durée de vérification connue, par (type, adresse)
+        self.probe_seconds: dict[tuple[str, str], float] = {}
+        self.last_run: RunRecord | None = None
+        self.cycles = 0
+        self.probes: Counter[str] = Counter()
+        self.timeouts = 0
+        self.text = ""
+
+    @classmethod
+    async def load(cls, conn: aiosqlite.Connection) -> Metrics:
+        """Métriques dont les compteurs reprennent les totaux persistés."""
+        rows = await conn.execute_fetchall(
+            "SELECT name, value FROM counters WHERE name GLOB ?",
+            (f"{_TOTALS_PREFIX}*",),
+        )
+        totals = {
+            str(name).removeprefix(_TOTALS_PREFIX): value
+            for name, value in rows
+        }
+        metrics = cls()
+        metrics.cycles = totals.get("cycles", 0)
+        for addr_type in ADDR_TYPES:
+            metrics.probes[addr_type] = totals.get(f"probes_{addr_type}", 0)
+        metrics.timeouts = totals.get("probe_timeouts", 0)
+        return metrics
+
+    def update(self, targets: list[TargetState], record: RunRecord) -> None:
+        """Intègre un cycle terminé et prépare le texte exposé."""
+        self.targets = targets
+        self.probe_seconds.update(record.stats.latencies)
+        self.last_run = record
+        self.cycles += 1
+        self.probes.update(record.stats.probes)
+        self.timeouts += record.stats.timeouts
+        self.text = self.render()
+
+    def _samples(self) -> dict[str, list[tuple[str, float]]]:
+        """Échantillons (étiquettes, valeur) par métrique."""
+        samples: dict[str, list[tuple[str, float]]] = {
+            name: [] for name in _FAMILIES
+        }
+        for target in self.targets:
+            labels = _labels(
+                type=target.addr_type,
+                address=target.address,
+                description=target.description,
+            )
+            samples["ip_monitor_target_up"].append(
+                (labels, 0 if target.is_down else 1)
+            )
+            seconds = self.probe_seconds.get((target.addr_type, target.address))
+            if seconds is not None:
+                samples["ip_monitor_target_probe_seconds"].append(
+                    (labels, seconds)
+                )
+        run = self.last_run
+        if run is not None:
+            samples["ip_monitor_cycle_duration_seconds"].append(
+                ("", run.ended_at - run.started_at)
+            )
+            samples["ip_monitor_cycle_end_timestamp_seconds"].append(
+                ("", run.ended_at)
+            )
+            samples["ip_monitor_cycle_stage_seconds"].extend(
+                (_labels(stage=stage), seconds)
+                for stage, seconds in run.stages.items()
+            )
+            samples["ip_monitor_cycle_concurrency"].append(
+                ("", run.stats.peak_concurrency)
+            )
+        samples["ip_monitor_cycles_total"].append(("", self.cycles))
+        samples["ip_monitor_probes_total"].extend(
+            (_labels(type=addr_type), self.probes[addr_type])
+            for addr_type in ADDR_TYPES
+        )
+        samples["ip_monitor_probe_timeouts_total"].append(("", self.timeouts))
+        return samples
+
+    def render(self) -> str:
+        """Texte au format d'exposition Prometheus."""
+        lines: list[str] = []
+        for name, values in self._samples().items():
+            if not values:
+                continue
+            kind, help_text = _FAMILIES[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(
+                f"{name}{labels} {_format_value(value)}"
+                for labels, value in values
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _replace_file(path: Path, text: str) -> None:
+    # Fichier temporaire dans le même répertoire: os.replace est atomique,
+    # node_exporter ne lit jamais un fichier à moitié écrit
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+async def write_textfile(path: Path, text: str) -> None:
+    """Remplace atomiquement le fichier du textfile collector."""
+    await asyncio.to_thread(_replace_file, path, text)
+
+
+class MetricsServer:
+    """Point ``/metrics`` servant le texte préparé par ``Metrics``."""
+
+    def __init__(self, metrics: Metrics, runner: web.AppRunner) -> None:
+        """Serveur démarré (voir ``start``)."""
+        self.metrics = metrics
+        self.runner = runner
+
+    @classmethod
+    async def start(
+        cls, metrics: Metrics, host: str, port: int
+    ) -> MetricsServer:
+        """Démarre le serveur sur ``host:port``."""
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(
+                body=metrics.text.encode(),
+                headers={"Content-Type": CONTENT_TYPE},
+            )
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logging.info("Métriques servies sur http://%s:%i/metrics", host, port)
+        return cls(metrics, runner)
+
+    async def close(self) -> None:
+        """Arrête le serveur."""
+        await self.runner.cleanup()
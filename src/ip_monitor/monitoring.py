@@ -13,11 +13,16 @@ from __future__ import annotations
 import argparse
 import asyncio
 import logging
+import math
 import os
+import sqlite3
 import sys
-from collections.abc import Awaitable
-from dataclasses import dataclass
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import cache
 from http import client as http_client
 from pathlib import Path
 from sqlite3 import Row as Sqlite3Row
@@ -25,13 +30,72 @@ from typing import TYPE_CHECKING
 
 import aiosqlite
 import argcomplete
-from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
-
-from .config import DEFAULT_CONFIG_PATH, load_config
+from aiohttp import ClientError, ClientSession, ClientTimeout
+
+from .config import (
+    ADDR_TYPES,
+    DEFAULT_CONFIG_PATH,
+    IpInfo,
+    LockPolicy,
+    PrecheckMode,
+    Severity,
+    TcpInfo,
+    UrlInfo,
+    load_config,
+    split_host_port,
+)
+from .http_pool import HttpClient, HttpOptions, open_session
+from .latency import (
+    CREATE_LATENCY_INDEX,
+    CREATE_LATENCY_TABLE,
+    HedgeBudget,
+    LatencyHistory,
+    hedged,
+    learned_timeout,
+)
+from .lock import RunLock, acquire_run_lock, lock_path_for
+from .loop_health import LoopHealth, LoopMonitor
 
 if TYPE_CHECKING:
-    from .config import Config, IpInfo, UrlInfo
-from .notify import notify
+    from .config import Config, Target
+from .metrics import (
+    Metrics,
+    MetricsServer,
+    TargetState,
+    save_totals,
+    write_textfile,
+)
+from .notify import notify_channel
+from .outbox import OutboxWorker, RetryPolicy, enqueue, init_outbox
+from .output import JsonlWriter, OutputFormat
+from .plan import (
+    HEADROOM,
+    PING_WAIT,
+    estimate,
+    format_plan,
+    recommend,
+    simulate,
+)
+from .progress import ProgressReporter
+from .runs import (
+    RunRecord,
+    RunStats,
+    current_run,
+    format_runs,
+    init_runs,
+    recent_runs,
+    record_run,
+    tracking,
+)
+from .shaping import CREATE_RATE_LIMITS_TABLE, NotificationShaper
+from .state import (
+    SCHEDULE_COLUMNS,
+    BackoffPolicy,
+    StatusState,
+    ensure_column,
+    increment_counter,
+)
+from .timing import Profile, StageTimer, format_stages
 
 # Gestion des arguments de ligne de commande
 parser: argparse.ArgumentParser = argparse.ArgumentParser(
@@ -75,6 +139,15 @@ parser.add_argument(
     default=None,
     help="Désactive la pré-vérification Internet.",
 )
+parser.add_argument(
+    "--precheck-mode",
+    default=None,
+    choices=[m.value for m in PrecheckMode],
+    help=(
+        "serial: ping 1.1.1.1 avant les vérifications; inline: ancres "
+        "interrogées en parallèle des vérifications."
+    ),
+)
 parser.add_argument(
     "--ping-timeout",
     type=float,
@@ -99,6 +172,62 @@ parser.add_argument(
     default=None,
     help="Nombre maximum de vérifications concurrentes (IP + URL).",
 )
+parser.add_argument(
+    "--cycle-deadline",
+    type=float,
+    default=None,
+    help="Durée maximale (s) d'un cycle; les vérifications restantes sont annulées.",
+)
+parser.add_argument(
+    "--loop",
+    dest="loop_interval",
+    metavar="INTERVAL",
+    type=float,
+    default=None,
+    help="Mode résident: un cycle toutes les INTERVAL secondes, connexions HTTP conservées.",
+)
+
+
+def _host_port(value: str) -> str:
+    """Type argparse: adresse hôte:port."""
+    try:
+        split_host_port(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+    return value
+
+
+def _positive_float(value: str) -> float:
+    """Type argparse: nombre strictement positif."""
+    try:
+        number = float(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"nombre invalide : {value}") from exc
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"doit être positif : {value}")
+    return number
+
+
+parser.add_argument(
+    "--metrics-listen",
+    metavar="HÔTE:PORT",
+    type=_host_port,
+    default=None,
+    help="En mode boucle, sert les métriques Prometheus sur http://HÔTE:PORT/metrics.",
+)
+parser.add_argument(
+    "--profile",
+    metavar="FICHIER",
+    type=Path,
+    default=None,
+    help="Enregistre un profil cProfile de l'exécution dans FICHIER (python -m pstats).",
+)
+parser.add_argument(
+    "--lock-policy",
+    default=None,
+    choices=[p.value for p in LockPolicy],
+    help="Si une autre instance tourne déjà: skip (défaut), wait ou takeover.",
+)
 
 # Options d'affichage utilisateur
 parser.add_argument(
@@ -115,6 +244,56 @@ parser.add_argument(
     default=None,
     help="Force l'affichage des messages de progression (par défaut).",
 )
+parser.add_argument(
+    "--output",
+    default=None,
+    choices=[f.value for f in OutputFormat],
+    help="Format de sortie: text (défaut) ou jsonl (un objet JSON par vérification, puis le bilan).",
+)
+parser.add_argument(
+    "--output-file",
+    metavar="FICHIER",
+    type=Path,
+    default=None,
+    help="Écrit le flux JSON Lines dans FICHIER (une FIFO par exemple) plutôt que sur la sortie standard; implique --output jsonl.",
+)
+
+# Sous-commandes (sans sous-commande: un cycle de vérifications)
+commands = parser.add_subparsers(dest="command", metavar="COMMANDE")
+runs_parser = commands.add_parser(
+    "runs", help="Affiche le bilan des derniers cycles (table runs)."
+)
+runs_parser.add_argument(
+    "--last",
+    metavar="N",
+    type=int,
+    default=10,
+    help="Nombre de cycles affichés (défaut: 10).",
+)
+runs_parser.add_argument(
+    "-c",
+    "--config",
+    # Ne pas écraser un -c donné avant la sous-commande
+    default=argparse.SUPPRESS,
+    help="Le fichier de configuration à utiliser",
+)
+plan_parser = commands.add_parser(
+    "plan",
+    help="Estime la durée d'un cycle et la concurrence nécessaire, sans rien vérifier.",
+)
+plan_parser.add_argument(
+    "--interval",
+    metavar="SECONDES",
+    type=_positive_float,
+    default=None,
+    help="Période à respecter (défaut: loop_interval, sinon cycle_deadline).",
+)
+plan_parser.add_argument(
+    "-c",
+    "--config",
+    default=argparse.SUPPRESS,
+    help="Le fichier de configuration à utiliser",
+)
 
 
 def _env_float(name: str) -> float | None:
@@ -202,26 +381,139 @@ def _resolve_params(
     )
 
 
+def _resolve_cycle_deadline(
+    arguments: argparse.Namespace, config: Config
+) -> float | None:
+    """Échéance du cycle (CLI > ENV > YAML); None si aucune limite."""
+    arg_deadline = getattr(arguments, "cycle_deadline", None)
+    if arg_deadline is not None:
+        return float(arg_deadline)
+    return _env_float("IPM_CYCLE_DEADLINE") or config.cycle_deadline
+
+
+def _resolve_loop_interval(
+    arguments: argparse.Namespace, config: Config
+) -> float | None:
+    """Intervalle du mode boucle (CLI > ENV > YAML); None: un seul cycle."""
+    arg_interval = getattr(arguments, "loop_interval", None)
+    if arg_interval is not None:
+        return float(arg_interval)
+    return _env_float("IPM_LOOP_INTERVAL") or config.loop_interval
+
+
+def _resolve_metrics_listen(
+    arguments: argparse.Namespace, config: Config
+) -> str | None:
+    """Adresse du point /metrics (CLI > ENV > YAML); None: aucun."""
+    arg_listen = getattr(arguments, "metrics_listen", None)
+    if arg_listen is not None:
+        return str(arg_listen)
+    env_listen = os.getenv("IPM_METRICS_LISTEN")
+    if env_listen:
+        try:
+            split_host_port(env_listen)
+        except ValueError:
+            logging.warning(
+                "IPM_METRICS_LISTEN invalide: %r (ignoré)", env_listen
+            )
+        else:
+            return env_listen
+    return config.metrics_listen
+
+
+def _resolve_quiet(arguments: argparse.Namespace) -> bool:
+    """Mode silencieux (CLI > ENV > False)."""
+    # Be tolerant if attribute is missing
+    env_quiet = _env_bool("IPM_QUIET")
+    arg_quiet = getattr(arguments, "quiet", None)
+    return (
+        arg_quiet
+        if arg_quiet is not None
+        else (env_quiet if env_quiet is not None else False)
+    )
+
+
+def _resolve_output(
+    arguments: argparse.Namespace,
+) -> tuple[bool, Path | None]:
+    """Sortie JSON Lines activée, et son fichier (None: sortie standard)."""
+    output_file: Path | None = getattr(arguments, "output_file", None)
+    jsonl = output_file is not None or (
+        getattr(arguments, "output", None) == OutputFormat.JSONL
+    )
+    return jsonl, output_file
+
+
+def _resolve_precheck_mode(
+    arguments: argparse.Namespace, config: Config
+) -> PrecheckMode:
+    """Mode de pré-vérification (CLI > ENV > YAML)."""
+    mode = getattr(arguments, "precheck_mode", None) or os.getenv(
+        "IPM_PRECHECK_MODE"
+    )
+    if mode in {m.value for m in PrecheckMode}:
+        return PrecheckMode(mode)
+    if mode:
+        logging.warning("IPM_PRECHECK_MODE invalide: %r (ignoré)", mode)
+    return config.precheck_mode
+
+
+async def _check_anchor(session: ClientSession, anchor: str) -> bool:
+    """Interroge une ancre: ping d'une IP, ou toute réponse d'une URL."""
+    if not anchor.startswith(("http://", "https://")):
+        return await ping(anchor)
+    try:
+        async with session.head(anchor, allow_redirects=False):
+            return True
+    except (ClientError, TimeoutError):
+        return False
+
+
+async def _probe_anchors(
+    session: ClientSession, anchors: list[str], max_wait: float
+) -> bool:
+    """Interroge les ancres en parallèle; True dès que l'une répond."""
+    tasks = [asyncio.create_task(_check_anchor(session, a)) for a in anchors]
+    try:
+        async with asyncio.timeout(max_wait):
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    if await next_done:
+                        return True
+                except Exception:
+                    logging.debug("Ancre en erreur", exc_info=True)
+    except TimeoutError:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+    logging.warning("Aucune ancre ne répond : %s", ", ".join(anchors))
+    return False
+
+
 async def _precheck_internet(
     precheck_timeout: float, *, quiet: bool = False
 ) -> bool:
-    """Ping 1.1.1.1; affiche un message utilisateur si échec."""
+    """Ping 1.1.1.1; affiche un message utilisateur si échec.
+
+    En mode silencieux (dont la sortie JSON Lines sur la sortie standard),
+    l'échec n'est signalé que dans le journal.
+    """
     logging.info("Pré-vérification (ping) de 1.1.1.1")
     if not quiet:
         print("Vérification Internet…", end=" ")
     try:
-        if not await asyncio.wait_for(
+        online = await asyncio.wait_for(
             ping("1.1.1.1"), timeout=precheck_timeout
-        ):
-            print("Pas de connexion à Internet.")
-            return False
+        )
     except Exception:
         logging.exception("Pré-vérification échouée")
-        print("Pas de connexion à Internet.")
-        return False
+        online = False
+    if not online:
+        logging.warning("Pas de connexion à Internet : cycle ignoré")
     if not quiet:
-        print("OK")
-    return True
+        print("OK" if online else "Pas de connexion à Internet.")
+    return online
 
 
 @dataclass
@@ -233,66 +525,1207 @@ class RuntimeParams:
     concurrency: int
     ping_timeout: float
     quiet: bool = False
+    flush_batch_size: int = 50
+    notify_batch_window: float = 2.0
+    cycle_deadline: float | None = None
+    # Mode inline: ancres interrogées pendant le cycle (None: désactivé)
+    precheck_anchors: list[str] | None = None
+    precheck_timeout: float = 10.0
+    # Mode serial: ping 1.1.1.1 avant chaque cycle
+    serial_precheck: bool = False
+    # Sortie JSON Lines des résultats (None: désactivée)
+    output: JsonlWriter | None = None
+
+
+# Nombre minimal de cibles vérifiées pour appliquer local_outage_ratio
+_LOCAL_OUTAGE_MIN_PROBES = 3
+
+
+class _LocalOutageError(Exception):
+    """Connexion locale perdue: le cycle est abandonné sans rien écrire."""
+
+
+class _ShedError(Exception):
+    """Vérification délestée à l'approche de l'échéance du cycle."""
+
+
+@dataclass
+class CycleSummary:
+    """Bilan d'un cycle de vérifications."""
+
+    down: list[str]
+    up: list[str]
+    # Cibles non vérifiées (échéance atteinte): statut inconnu, non modifié
+    unknown: list[str]
+    # Cibles non vérifiées car un parent est down (statut non modifié)
+    unreachable: list[str] = field(default_factory=list)
+    # Cycle abandonné (panne locale): aucun statut n'a été modifié
+    local_outage: bool = False
+    # Cycle non lancé: la pré-vérification série a échoué
+    precheck_failed: bool = False
+    # Connexions HTTP ouvertes et réutilisées (poignées de main évitées)
+    http_created: int = 0
+    http_reused: int = 0
+    # Cibles down non vérifiées avant leur prochaine échéance (backoff)
+    deferred: list[str] = field(default_factory=list)
+    # Durée de chaque étape, en secondes (voir StageTimer)
+    stages: dict[str, float] = field(default_factory=dict)
+    # Santé de la boucle d'événements (None: non mesurée)
+    loop: LoopHealth | None = None
+
+
+@dataclass
+class CheckResult:
+    """Résultat de la vérification d'une cible."""
+
+    addr_type: str
+    address: str
+    description: str
+    is_down: bool
+    changed: bool
+    tags: list[str] = field(default_factory=list)
+    severity: Severity = Severity.WARNING
+    # Non vérifiée car un parent (depends_on) est down: is_down vaut True
+    # pour ses propres dépendants, mais le statut enregistré est inchangé
+    unreachable: bool = False
+    # Non vérifiée car down depuis longtemps et pas encore à échéance
+    deferred: bool = False
+
+
+@dataclass
+class ProbeLanes:
+    """Voies de vérification d'un cycle.
+
+    Les premières vérifications passent par la voie normale (bornée par
+    ``concurrency``); les re-vérifications de confirmation d'une
+    transition passent par une voie prioritaire distincte, sans attendre
+    derrière les cibles stables ni occuper leur place.
+    """
+
+    normal: asyncio.Semaphore
+    priority: asyncio.Semaphore
+    # Re-vérifications exigées avant d'enregistrer une transition
+    confirm_attempts: int = 0
+    confirm_interval: float = 0.0
+    # Instant (horloge de la boucle) à partir duquel les cibles de
+    # priorité <= 0 ne sont plus démarrées (None: pas de délestage)
+    shed_at: float | None = None
+    # Délai de chaque cible (type, adresse); absent: délai global
+    timeouts: dict[tuple[str, str], float] = field(default_factory=dict)
+    # Historique où sont mesurées les premières vérifications réussies
+    latency: LatencyHistory | None = None
+
+    async def probe(
+        self,
+        probe: Callable[[], Awaitable[bool]],
+        priority: int = 0,
+        target: tuple[str, str] | None = None,
+    ) -> bool:
+        """Première vérification, sur la voie normale.
+
+        Lève ``_ShedError`` si la place n'est obtenue qu'après ``shed_at``
+        pour une cible de priorité <= 0.
+        """
+        async with self.normal:
+            loop = asyncio.get_running_loop()
+            if (
+                self.shed_at is not None
+                and priority <= 0
+                and loop.time() >= self.shed_at
+            ):
+                raise _ShedError
+            start = loop.time()
+            is_up = await probe()
+            if is_up and self.latency is not None and target is not None:
+                self.latency.record(*target, loop.time() - start)
+            return is_up
+
+    async def confirm(
+        self, probe: Callable[[], Awaitable[bool]], observed: bool
+    ) -> bool:
+        """Re-vérifie une transition; retourne le résultat retenu.
+
+        La transition n'est confirmée que si toutes les re-vérifications
+        donnent le même résultat que la première.
+        """
+        for _ in range(self.confirm_attempts):
+            await asyncio.sleep(self.confirm_interval)
+            async with self.priority:
+                outcome = await probe()
+            if outcome != observed:
+                logging.info("Transition non confirmée, ignorée")
+                return outcome
+        return observed
+
+
+@dataclass
+class Hedging:
+    """Requêtes HTTP doublées d'un cycle (voir ``ip_monitor.latency``).
+
+    Les requêtes doublées passent par une session dédiée qui n'en
+    réutilise aucune connexion, créée à la première utilisation.
+    """
+
+    history: LatencyHistory
+    budget: HedgeBudget
+    percentile: float
+    options: HttpOptions
+    session: ClientSession | None = None
+
+    def fresh_session(self) -> ClientSession:
+        """Session sans réutilisation de connexion."""
+        if self.session is None:
+            self.session = open_session(self.options, force_close=True)
+        return self.session
+
+    async def check(
+        self, session: ClientSession, url: str, max_wait: float | None = None
+    ) -> bool:
+        """Vérifie une URL, en doublant la requête si elle tarde."""
+        delay = self.history.percentile("URL", url, self.percentile)
+        if delay is None:
+            return await check_url(session, url, max_wait)
+        return await hedged(
+            lambda: check_url(session, url, max_wait),
+            lambda: check_url(self.fresh_session(), url, max_wait),
+            delay,
+            self.budget,
+        )
+
+    async def close(self) -> None:
+        """Ferme la session dédiée si elle a été créée."""
+        if self.session is not None:
+            await self.session.close()
+
+
+@dataclass
+class ProbeContext:
+    """Contexte partagé par les vérifications d'un cycle.
+
+    ``down`` et ``up`` reçoivent la description des cibles dont le statut
+    vient de changer. Sans ``state``, les statuts sont lus et écrits
+    directement en base; sans ``lanes``, la vérification n'est ni bornée
+    ni confirmée. Sans ``record``, rien n'est modifié: la transition est
+    enregistrée par le consommateur des résultats du cycle.
+    """
+
+    conn: aiosqlite.Connection
+    down: list[str] = field(default_factory=list)
+    up: list[str] = field(default_factory=list)
+    state: StatusState | None = None
+    lanes: ProbeLanes | None = None
+    # Requêtes HTTP doublées (None: désactivé)
+    hedging: Hedging | None = None
+    # False: statut et listes laissés au consommateur (voir _consume_results)
+    record: bool = True
+
+
+class _TransitionBatch:
+    """Micro-lot de transitions écrites en base puis notifiées ensemble.
+
+    Le lot est vidé dès qu'il atteint ``size`` transitions ou que
+    ``window`` secondes se sont écoulées depuis la première transition.
+    Avec ``hold``, il n'est vidé qu'en fin de cycle.
+    """
+
+    def __init__(self, size: int, window: float, *, hold: bool = False) -> None:
+        self.size = size
+        self.window = window
+        self.hold = hold
+        self.results: list[CheckResult] = []
+        self.opened_at: float | None = None
+
+    def add(self, result: CheckResult, now: float) -> None:
+        if self.opened_at is None:
+            self.opened_at = now
+        self.results.append(result)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def time_left(self, now: float) -> float | None:
+        """Délai avant l'expiration de la fenêtre (None si lot vide)."""
+        if self.opened_at is None or self.hold:
+            return None
+        return max(0.0, self.opened_at + self.window - now)
+
+    def wait_timeout(self, now: float, deadline: float | None) -> float | None:
+        """Délai d'attente maximal: fenêtre du lot ou échéance du cycle."""
+        delays: list[float] = []
+        left = self.time_left(now)
+        if left is not None:
+            delays.append(left)
+        if deadline is not None:
+            delays.append(max(0.0, deadline - now))
+        return min(delays) if delays else None
+
+    def ready(self, now: float) -> bool:
+        if self.hold:
+            return False
+        left = self.time_left(now)
+        return len(self) >= self.size or (left is not None and left <= 0)
+
+    def clear(self) -> None:
+        self.results = []
+        self.opened_at = None
+
+
+@dataclass
+class _Cycle:
+    """Contexte partagé par les étapes d'un cycle de vérifications."""
+
+    conn: aiosqlite.Connection
+    session: ClientSession
+    config: Config
+    params: RuntimeParams
+    state: StatusState
+    shaper: NotificationShaper
+    batch: _TransitionBatch
+    outbox: OutboxWorker
+    # Sérialise les transactions partagées avec la boîte d'envoi
+    db_lock: asyncio.Lock
+    summary: CycleSummary
+    # Mode inline: interrogation des ancres en cours (None: désactivé)
+    connectivity: asyncio.Task[bool] | None = None
+    # Cibles effectivement vérifiées, dont down (taux de panne locale)
+    probed: int = 0
+    failed: int = 0
+    # Espacement des vérifications des cibles down (None: désactivé)
+    backoff: BackoffPolicy | None = None
+    # Cibles délestées à l'approche de l'échéance
+    shed: list[str] = field(default_factory=list)
+    # Historique des latences (None: ni hedging ni délais appris)
+    latency: LatencyHistory | None = None
+    # Requêtes HTTP doublées (None: désactivé)
+    hedging: Hedging | None = None
+    timer: StageTimer = field(default_factory=StageTimer)
+    # Affichage de la progression (None: mode silencieux)
+    progress: ProgressReporter | None = None
+
+
+def _batch_messages(
+    shaper: NotificationShaper, results: list[CheckResult], now: float
+) -> list[tuple[str, str]]:
+    """Messages (canal, texte) d'un micro-lot, selon le filtre de chaque canal.
+
+    Le découpage et la limite de débit sont appliqués par ``shaper``.
+    """
+    down: dict[str, list[str]] = {}
+    up: dict[str, list[str]] = {}
+    for channel in shaper.channels:
+        selected = [r for r in results if channel.matches(r.tags, r.severity)]
+        down[channel.name] = [r.description for r in selected if r.is_down]
+        up[channel.name] = [r.description for r in selected if not r.is_down]
+    date = datetime.now().strftime("%a %d/%m/%Y à %R")
+    return shaper.shape(down, up, date, now)
+
+
+async def _flush_batch(cycle: _Cycle) -> None:
+    """Écrit le micro-lot et ses notifications dans une même transaction.
+
+    Les notifications sont ensuite envoyées par la boîte d'envoi.
+    """
+    # Rien n'est écrit tant que les ancres n'ont pas confirmé la connexion
+    if cycle.connectivity is not None and not await cycle.connectivity:
+        raise _LocalOutageError("aucune ancre ne répond")
+    batch = cycle.batch
+    messages = _batch_messages(cycle.shaper, batch.results, time.time())
+    async with cycle.db_lock:
+        with cycle.timer.stage("flush"):
+            if messages:
+                await enqueue(cycle.conn, messages)
+            await cycle.shaper.save(cycle.conn)
+            if cycle.latency is not None:
+                await cycle.latency.flush(cycle.conn)
+            await cycle.state.flush(cycle.conn)
+    if messages:
+        cycle.outbox.wake()
+    batch.clear()
+
+
+async def _consume_results(
+    cycle: _Cycle,
+    tasks: set[asyncio.Task[CheckResult | None]],
+    deadline: float | None,
+) -> set[asyncio.Task[CheckResult | None]]:
+    """Consomme les résultats au fil de l'eau jusqu'à la fin ou l'échéance.
+
+    Retourne les tâches encore en cours (non vides si l'échéance est
+    atteinte); l'appelant se charge de les annuler. Les tâches terminées
+    pendant l'écriture d'un lot sont consommées avant de rendre la main,
+    même si l'échéance est dépassée entre-temps.
+    """
+    loop = asyncio.get_running_loop()
+    batch = cycle.batch
+    while tasks:
+        if deadline is not None and loop.time() >= deadline:
+            done = {task for task in tasks if task.done()}
+            _consume_done(cycle, done)
+            return tasks - done
+        done, tasks = await asyncio.wait(
+            tasks,
+            timeout=batch.wait_timeout(loop.time(), deadline),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        _consume_done(cycle, done)
+        if batch.ready(loop.time()):
+            await _flush_batch(cycle)
+    return tasks
+
+
+def _consume_done(
+    cycle: _Cycle, done: set[asyncio.Task[CheckResult | None]]
+) -> None:
+    """Range les résultats de tâches terminées dans le bilan et le lot.
+
+    C'est ici, et non dans la vérification, que l'état en mémoire et les
+    listes down/up du bilan sont modifiés: une tâche annulée ou non
+    consommée ne change jamais de statut.
+    """
+    now = asyncio.get_running_loop().time()
+    for task in done:
+        try:
+            result = task.result()
+        except Exception:
+            logging.exception("Tâche en erreur")
+            result = None
+        if cycle.progress is not None:
+            cycle.progress.finished(is_down=_probed_down(result))
+        if not isinstance(result, CheckResult):
+            continue
+        _emit_probe(cycle, result)
+        if result.unreachable:
+            cycle.summary.unreachable.append(result.description)
+            continue
+        if result.deferred:
+            cycle.summary.deferred.append(result.description)
+            continue
+        cycle.probed += 1
+        cycle.failed += result.is_down
+        target = (result.addr_type, result.address)
+        if result.changed:
+            cycle.state.set_down(*target, result.is_down)
+            summary = cycle.summary
+            (summary.down if result.is_down else summary.up).append(
+                result.description
+            )
+            cycle.batch.add(result, now)
+        if cycle.backoff is not None:
+            cycle.state.reschedule(*target, time.time(), cycle.backoff)
+
+
+def _probed_down(result: CheckResult | None) -> bool:
+    """Indique si la cible a été vérifiée et trouvée down."""
+    return (
+        isinstance(result, CheckResult)
+        and result.is_down
+        and not (result.unreachable or result.deferred)
+    )
+
+
+def _emit_probe(cycle: _Cycle, result: CheckResult) -> None:
+    """Écrit le résultat sur la sortie JSON Lines (si activée)."""
+    output = cycle.params.output
+    if output is None:
+        return
+    if result.unreachable:
+        outcome = "unreachable"
+    elif result.deferred:
+        outcome = "deferred"
+    else:
+        outcome = "down" if result.is_down else "up"
+    probed = outcome in {"up", "down"}
+    latency = (
+        current_run().latencies.get((result.addr_type, result.address))
+        if probed
+        else None
+    )
+    output.write(
+        "probe",
+        time=round(time.time(), 3),
+        type=result.addr_type,
+        address=result.address,
+        description=result.description,
+        outcome=outcome,
+        latency=None if latency is None else round(latency, 4),
+        # Nouveau statut si la cible vient de changer d'état
+        transition=outcome if probed and result.changed else None,
+    )
+
+
+def _result_is_down(task: asyncio.Task[CheckResult | None]) -> bool:
+    """Indique si la tâche terminée a trouvé sa cible down (ou injoignable)."""
+    if task.cancelled() or task.exception() is not None:
+        return False
+    result = task.result()
+    return isinstance(result, CheckResult) and result.is_down
+
+
+async def _parent_down(
+    target: Target,
+    tasks: dict[tuple[str, str], asyncio.Task[CheckResult | None]],
+) -> bool:
+    """Attend la vérification des parents de la cible.
+
+    Un parent désigne toutes les cibles de cette adresse, quel que soit
+    leur type. Retourne True si l'une d'elles est down; un parent en
+    erreur ou non vérifié ne bloque pas la vérification de ses dépendants.
+    """
+    parents = [
+        tasks[addr_type, address]
+        for address in target.depends_on
+        for addr_type in ADDR_TYPES
+        if (addr_type, address) in tasks
+    ]
+    if not parents:
+        return False
+    await asyncio.wait(parents)
+    return any(_result_is_down(task) for task in parents)
+
+
+def _targets(config: Config) -> list[tuple[str, str, Target]]:
+    """Cibles (type, adresse, cible) dans l'ordre de la configuration."""
+    return [
+        *(("IP", ip.ip, ip) for ip in config.ips),
+        *(("URL", url.url, url) for url in config.urls),
+        *(("TCP", tcp.tcp, tcp) for tcp in config.tcp),
+    ]
+
+
+def _dispatch_order(
+    config: Config, state: StatusState
+) -> list[tuple[str, str, Target]]:
+    """Cibles (type, adresse, cible) dans l'ordre où elles sont lancées.
+
+    Priorité décroissante, puis les cibles connues comme down (leur
+    rétablissement est signalé au plus tôt), puis la gravité; l'ordre de
+    la configuration départage le reste. Le sémaphore étant équitable,
+    cet ordre est celui dans lequel les vérifications obtiennent une place.
+    """
+    return sorted(
+        _targets(config),
+        key=lambda t: (
+            -t[2].priority,
+            not state.is_down(t[0], t[1]),
+            -t[2].severity.rank,
+        ),
+    )
+
+
+def _target_timeouts(
+    config: Config, params: RuntimeParams, latency: LatencyHistory | None
+) -> dict[tuple[str, str], float]:
+    """Délais propres aux cibles: explicites, sinon appris de l'historique.
+
+    Les cibles absentes du résultat gardent le délai global de leur type
+    (``ping_timeout``, ``http_timeout`` ou ``tcp_timeout``).
+    """
+    defaults = {
+        "IP": params.ping_timeout,
+        "URL": params.http_timeout,
+        "TCP": config.tcp_timeout,
+    }
+    timeouts: dict[tuple[str, str], float] = {}
+    for addr_type, address, target in _targets(config):
+        if target.timeout is not None:
+            timeouts[addr_type, address] = target.timeout
+        elif latency is not None and config.adaptive_timeout_factor is not None:
+            timeouts[addr_type, address] = learned_timeout(
+                latency,
+                (addr_type, address),
+                config.adaptive_timeout_factor,
+                config.adaptive_timeout_min,
+                defaults[addr_type],
+            )
+    return timeouts
+
+
+def _start_checks(
+    cycle: _Cycle, deadline: float | None = None
+) -> dict[asyncio.Task[CheckResult | None], str]:
+    """Lance une tâche par cible, dans l'ordre de ``_dispatch_order``.
+
+    Les dépendants attendent leurs parents hors du sémaphore et ne sont
+    pas vérifiés si l'un d'eux est down; délestage, confirmations et
+    espacement sont gérés par ``ProbeLanes`` et ``BackoffPolicy``.
+    Retourne les tâches associées à la description de leur cible.
+    """
+    params, state = cycle.params, cycle.state
+    margin = cycle.config.deadline_shed_margin
+    lanes = ProbeLanes(
+        asyncio.Semaphore(params.concurrency),
+        asyncio.Semaphore(cycle.config.confirm_concurrency),
+        cycle.config.confirm_attempts,
+        cycle.config.confirm_interval,
+        None if deadline is None or margin is None else deadline - margin,
+        _target_timeouts(cycle.config, cycle.params, cycle.latency),
+        cycle.latency,
+    )
+    context = ProbeContext(
+        cycle.conn,
+        state=state,
+        lanes=lanes,
+        hedging=cycle.hedging,
+        record=False,
+    )
+    # Tâches par (type, adresse), pour les dépendances
+    by_target: dict[tuple[str, str], asyncio.Task[CheckResult | None]] = {}
+
+    def unreachable(
+        addr_type: str, address: str, target: Target
+    ) -> CheckResult:
+        logging.info("%s non vérifiée : parent down", address)
+        return CheckResult(
+            addr_type,
+            address,
+            target.description,
+            True,
+            False,
+            target.tags,
+            target.severity,
+            unreachable=True,
+        )
+
+    def deferred(
+        addr_type: str, address: str, target: Target
+    ) -> CheckResult | None:
+        if cycle.backoff is None or state.is_due(
+            addr_type, address, time.time()
+        ):
+            return None
+        logging.info(
+            "%s non vérifiée : down, prochaine échéance non atteinte", address
+        )
+        return CheckResult(
+            addr_type,
+            address,
+            target.description,
+            True,
+            False,
+            target.tags,
+            target.severity,
+            deferred=True,
+        )
+
+    def check(target: Target) -> Awaitable[CheckResult]:
+        if isinstance(target, IpInfo):
+            return check_ip(
+                context,
+                target,
+                lanes.timeouts.get(("IP", target.ip), params.ping_timeout),
+            )
+        if isinstance(target, UrlInfo):
+            return check_url_status(context, cycle.session, target)
+        return check_tcp(
+            context,
+            target,
+            lanes.timeouts.get(("TCP", target.tcp), cycle.config.tcp_timeout),
+        )
+
+    async def run(
+        addr_type: str, address: str, target: Target
+    ) -> CheckResult | None:
+        if await _parent_down(target, by_target):
+            return unreachable(addr_type, address, target)
+        if skipped := deferred(addr_type, address, target):
+            return skipped
+        logging.debug(
+            "%s %s — %s: démarré", addr_type, address, target.description
+        )
+        try:
+            return await check(target)
+        except _ShedError:
+            cycle.shed.append(target.description)
+            return None
+
+    targets: dict[asyncio.Task[CheckResult | None], str] = {}
+    for addr_type, address, target in _dispatch_order(
+        cycle.config, cycle.state
+    ):
+        task = asyncio.create_task(run(addr_type, address, target))
+        by_target[addr_type, address] = task
+        targets[task] = target.description
+    return targets
+
+
+async def _check_targets(cycle: _Cycle) -> None:
+    """Vérifie toutes les cibles, au plus jusqu'à l'échéance du cycle."""
+    loop = asyncio.get_running_loop()
+    deadline = (
+        None
+        if cycle.params.cycle_deadline is None
+        else loop.time() + cycle.params.cycle_deadline
+    )
+    targets = _start_checks(cycle, deadline)
+    remaining = set(targets)
+    progress = cycle.progress
+    if progress is not None:
+        progress.add(len(targets))
+        progress.start()
+    try:
+        remaining = await _consume_results(cycle, remaining, deadline)
+    finally:
+        # Échéance atteinte (ou erreur): annuler ce qui reste; ping()
+        # tue son sous-processus lors de l'annulation
+        for task in remaining:
+            task.cancel()
+        await asyncio.gather(*remaining, return_exceptions=True)
+        if progress is not None:
+            await progress.close()
+
+    if cycle.shed:
+        logging.warning(
+            "Échéance proche, %i cible(s) délestée(s) : %s",
+            len(cycle.shed),
+            ", ".join(cycle.shed),
+        )
+    cycle.summary.unknown = sorted(
+        [*cycle.shed, *(targets[task] for task in remaining)]
+    )
+    if cycle.summary.unknown:
+        logging.warning(
+            "Échéance du cycle atteinte, %i cible(s) non vérifiée(s) : %s",
+            len(cycle.summary.unknown),
+            ", ".join(cycle.summary.unknown),
+        )
+    _check_failure_ratio(cycle)
+    await _flush_batch(cycle)
+
+
+def _check_failure_ratio(cycle: _Cycle) -> None:
+    """Lève _LocalOutageError si trop de cibles vérifiées sont down."""
+    ratio = cycle.config.local_outage_ratio
+    if ratio is None or cycle.probed < _LOCAL_OUTAGE_MIN_PROBES:
+        return
+    if cycle.failed / cycle.probed >= ratio:
+        raise _LocalOutageError(f"{cycle.failed}/{cycle.probed} cible(s) down")
+
+
+async def _check_or_discard(cycle: _Cycle) -> None:
+    """Vérifie les cibles; en cas de panne locale, abandonne le cycle."""
+    saved = cycle.state.snapshot()
+    try:
+        await _check_targets(cycle)
+    except _LocalOutageError as exc:
+        await _discard_cycle(cycle, saved, str(exc))
+
+
+async def _discard_cycle(
+    cycle: _Cycle, saved: StatusState, reason: str
+) -> None:
+    """Abandonne le cycle (panne locale) et le compte dans counters.
+
+    L'état en mémoire est ramené à ``saved`` et le bilan ne garde aucune
+    transition: le cycle est enregistré comme panne locale.
+    """
+    logging.warning(
+        "Panne locale détectée (%s) : cycle abandonné, aucun statut modifié",
+        reason,
+    )
+    cycle.state.restore(saved)
+    summary = cycle.summary
+    for verdicts in (
+        summary.down,
+        summary.up,
+        summary.unreachable,
+        summary.deferred,
+    ):
+        verdicts.clear()
+    summary.local_outage = True
+    async with cycle.db_lock:
+        await increment_counter(cycle.conn, "local_outage")
+        await cycle.conn.commit()
+
+
+def _outbox_worker(
+    conn: aiosqlite.Connection,
+    session: ClientSession,
+    config: Config,
+    db_lock: asyncio.Lock,
+    timer: StageTimer | None = None,
+) -> OutboxWorker:
+    """Crée le worker d'envoi des notifications pour ce cycle.
+
+    Chaque message part sur son canal, avec le délai propre à ce canal.
+    La durée des envois est cumulée dans l'étape ``notify`` de ``timer``.
+    """
+    channels = {c.name: c for c in config.notification_channels()}
+    stages = StageTimer() if timer is None else timer
+
+    async def send(channel: str, message: str) -> bool:
+        if channel not in channels:
+            # Canal retiré de la configuration depuis la mise en file
+            logging.error("Canal de notification inconnu : %s", channel)
+            return False
+        with stages.stage("notify"):
+            return await notify_channel(session, channels[channel], message)
+
+    return OutboxWorker(
+        conn,
+        send,
+        db_lock,
+        RetryPolicy(
+            config.outbox_max_attempts,
+            config.outbox_backoff_base,
+            config.outbox_backoff_max,
+        ),
+    )
+
+
+def _http_options(
+    config: Config, params: RuntimeParams, loop_interval: float | None = None
+) -> HttpOptions:
+    """Options du connecteur HTTP.
+
+    En mode boucle, sans ``http_keepalive_timeout``, les connexions
+    inutilisées sont gardées deux intervalles pour servir au cycle suivant.
+    """
+    keepalive = config.http_keepalive_timeout
+    if keepalive is None and loop_interval is not None:
+        keepalive = 2 * loop_interval
+    return HttpOptions(
+        ClientTimeout(total=params.http_timeout),
+        params.http_connector_limit,
+        config.http_limit_per_host,
+        keepalive,
+    )
+
+
+@dataclass
+class LoopResources:
+    """Ressources du mode boucle, tenues d'un cycle à l'autre."""
+
+    # Client HTTP partagé: les connexions restent ouvertes entre cycles
+    http: HttpClient
+    # Métriques servies sur /metrics ou écrites dans metrics_textfile
+    metrics: Metrics | None = None
+
+
+@dataclass
+class LoopSettings:
+    """Réglages du mode boucle (``--loop``)."""
+
+    # Période entre deux débuts de cycle, en secondes
+    interval: float
+    # Point /metrics (hôte:port), None: non servi
+    metrics_listen: str | None = None
+    # Verrou d'exécution, rafraîchi à chaque cycle
+    lock: RunLock | None = None
+
+
+@asynccontextmanager
+async def _cycle_http(
+    config: Config, params: RuntimeParams, resources: LoopResources | None
+) -> AsyncIterator[HttpClient]:
+    """Client HTTP du cycle: celui de la boucle, sinon une session dédiée."""
+    if resources is not None:
+        yield resources.http
+        return
+    client = HttpClient.open(_http_options(config, params))
+    try:
+        yield client
+    finally:
+        await client.close()
+
+
+@asynccontextmanager
+async def _loop_health(
+    config: Config, params: RuntimeParams, stats: RunStats
+) -> AsyncIterator[None]:
+    """Mesure la santé de la boucle pendant le bloc (si activée).
+
+    Les mesures sont rangées dans ``stats.loop``; un avertissement est
+    journalisé si le retard maximal de la boucle atteint
+    ``loop_lag_warn_ratio`` du plus court délai de vérification.
+    """
+    if config.loop_monitor_interval is None:
+        yield
+        return
+    monitor = LoopMonitor(config.loop_monitor_interval)
+    monitor.start()
+    try:
+        yield
+    finally:
+        stats.loop = health = await monitor.stop()
+        shortest = min(
+            params.ping_timeout, params.http_timeout, config.tcp_timeout
+        )
+        if health.lag_max >= config.loop_lag_warn_ratio * shortest:
+            logging.warning(
+                "Boucle d'événements saturée: retard jusqu'à %.3f s"
+                " (délai de vérification le plus court: %.1f s),"
+                " %i rappel(s) lent(s); des cibles ont pu être déclarées"
+                " down à tort",
+                health.lag_max,
+                shortest,
+                health.slow_callbacks,
+            )
+
+
+async def _latency_history(
+    conn: aiosqlite.Connection, config: Config
+) -> LatencyHistory:
+    """Historique de latence du cycle.
+
+    Chargé seulement si le hedging ou les délais appris s'en servent;
+    sinon vide, mais les mesures du cycle sont tout de même enregistrées
+    (pour ``ip-monitor plan``).
+    """
+    if (
+        config.hedge_percentile is None
+        and config.adaptive_timeout_factor is None
+    ):
+        return LatencyHistory()
+    return await LatencyHistory.load(conn)
 
 
 async def _run_all_checks(
     conn: aiosqlite.Connection,
     config: Config,
     params: RuntimeParams,
-) -> tuple[list[str], list[str]]:
-    """Exécute toutes les vérifications et envoie les notifications."""
-    down: list[str] = []
-    up: list[str] = []
-
+    timer: StageTimer | None = None,
+    resources: LoopResources | None = None,
+) -> CycleSummary:
+    """Exécute toutes les vérifications et envoie les notifications.
+
+    Les transitions sont écrites en base par micro-lots au fil des
+    résultats et notifiées en arrière-plan par la boîte d'envoi. Un cycle
+    en panne locale est abandonné sans modifier aucun statut.
+    ``resources`` sont celles du mode boucle; la durée de chaque étape est
+    ajoutée à ``timer``.
+    """
+    started = time.time()
+    if timer is None:
+        timer = StageTimer()
     current_ips: set[str] = {ip_info.ip for ip_info in config.ips}
     current_urls: set[str] = {url_info.url for url_info in config.urls}
-    await remove_old_entries(conn, current_ips, current_urls)
+    current_tcp: set[str] = {tcp_info.tcp for tcp_info in config.tcp}
+    with timer.stage("remove_old_entries"):
+        await remove_old_entries(conn, current_ips, current_urls, current_tcp)
+    with timer.stage("load_state"):
+        state = await StatusState.load(conn)
+        shaper = await NotificationShaper.load(
+            conn, config.notification_channels(), time.time()
+        )
 
-    timeout = ClientTimeout(total=params.http_timeout)
-    connector = TCPConnector(limit=params.http_connector_limit)
-    async with ClientSession(timeout=timeout, connector=connector) as session:
-        sem = asyncio.Semaphore(params.concurrency)
+    stats = RunStats()
+    with tracking(stats):
+        async with (
+            _loop_health(config, params, stats),
+            _cycle_http(config, params, resources) as client,
+        ):
+            session = client.session
+            created, reused = client.stats.snapshot()
+            db_lock = asyncio.Lock()
+            cycle = _Cycle(
+                conn,
+                session,
+                config,
+                params,
+                state,
+                shaper,
+                _TransitionBatch(
+                    params.flush_batch_size,
+                    params.notify_batch_window,
+                    # Le taux de panne n'est connu qu'en fin de cycle
+                    hold=config.local_outage_ratio is not None,
+                ),
+                _outbox_worker(conn, session, config, db_lock, timer),
+                db_lock,
+                CycleSummary([], [], []),
+                backoff=_backoff_policy(config),
+                timer=timer,
+                progress=None if params.quiet else ProgressReporter(stats),
+            )
+            with timer.stage("load_state"):
+                cycle.latency = latency = await _latency_history(conn, config)
+            if config.hedge_percentile is not None:
+                cycle.hedging = Hedging(
+                    latency,
+                    HedgeBudget.for_targets(
+                        len(config.urls), config.hedge_max_ratio
+                    ),
+                    config.hedge_percentile,
+                    client.options,
+                )
+            if params.precheck_anchors is not None:
+                cycle.connectivity = asyncio.create_task(
+                    _probe_anchors(
+                        session,
+                        params.precheck_anchors,
+                        params.precheck_timeout,
+                    )
+                )
+            # Les notifications restées en attente au cycle précédent partent
+            # immédiatement, en parallèle des vérifications
+            cycle.outbox.start()
+            try:
+                with timer.stage("probes"):
+                    await _check_or_discard(cycle)
+                with timer.stage("drain"):
+                    await cycle.outbox.close(config.outbox_drain_timeout)
+            finally:
+                cycle.outbox.cancel()
+                if cycle.connectivity is not None:
+                    cycle.connectivity.cancel()
+                if cycle.hedging is not None:
+                    await cycle.hedging.close()
+            cycle.summary.http_created = client.stats.created - created
+            cycle.summary.http_reused = client.stats.reused - reused
+            logging.info(
+                "Connexions HTTP: %i ouverte(s), %i réutilisée(s)",
+                cycle.summary.http_created,
+                cycle.summary.http_reused,
+            )
+
+    cycle.summary.stages = timer.rounded()
+    timer.log()
+    await _record_run(
+        cycle, started, stats, None if resources is None else resources.metrics
+    )
+    if not params.quiet:
+        _print_summary(cycle.summary)
+    return cycle.summary
 
-        async def sem_task(coro: Awaitable[None]) -> None:
-            async with sem:
-                return await coro
 
-        tasks: list[asyncio.Task[None]] = []
+async def _record_run(
+    cycle: _Cycle, started: float, stats: RunStats, metrics: Metrics | None
+) -> None:
+    """Enregistre le bilan du cycle et publie les métriques.
 
-        async def run_ip(ip: IpInfo) -> None:
-            if not params.quiet:
-                print(f"IP {ip.ip} — {ip.description}: démarré")
-            return await check_ip(conn, ip, down, up, params.ping_timeout)
+    Le bilan est aussi écrit sur la sortie JSON Lines (si activée) et ses
+    compteurs ajoutés aux totaux persistés. Une erreur n'interrompt pas le
+    cycle.
+    """
+    summary = cycle.summary
+    summary.loop = stats.loop
+    record = RunRecord(
+        started,
+        time.time(),
+        len(_targets(cycle.config)),
+        len(summary.down),
+        len(summary.up),
+        len(summary.unknown),
+        stats,
+        cycle.outbox.stats.latencies,
+        summary.local_outage,
+        summary.stages,
+    )
+    if cycle.params.output is not None:
+        _emit_summary(cycle.params.output, summary, record)
+    try:
+        if metrics is None and cycle.config.metrics_textfile is not None:
+            # Exécution ponctuelle: les compteurs reprennent les totaux
+            metrics = await Metrics.load(cycle.conn)
+        await record_run(cycle.conn, record)
+        await save_totals(cycle.conn, record)
+        await cycle.conn.commit()
+    except Exception:
+        logging.exception("Impossible d'enregistrer le bilan du cycle")
+    if metrics is not None:
+        await _publish_metrics(cycle, record, metrics)
 
-        async def run_url(url: UrlInfo) -> None:
-            if not params.quiet:
-                print(f"URL {url.url} — {url.description}: démarré")
-            return await check_url_status(conn, session, url, down, up)
 
-        for ip in config.ips:
-            tasks.append(asyncio.create_task(sem_task(run_ip(ip))))
-        for url in config.urls:
-            tasks.append(asyncio.create_task(sem_task(run_url(url))))
+def _emit_summary(
+    output: JsonlWriter, summary: CycleSummary, record: RunRecord
+) -> None:
+    """Écrit le bilan du cycle sur la sortie JSON Lines."""
+    status = "ok"
+    if summary.precheck_failed:
+        status = "precheck_failed"
+    elif summary.local_outage:
+        status = "local_outage"
+    output.write(
+        "summary",
+        status=status,
+        started_at=round(record.started_at, 3),
+        ended_at=round(record.ended_at, 3),
+        duration=round(record.ended_at - record.started_at, 3),
+        targets=record.targets,
+        down=summary.down,
+        up=summary.up,
+        unreachable=summary.unreachable,
+        deferred=summary.deferred,
+        unknown=summary.unknown,
+        local_outage=summary.local_outage,
+        probes=dict(record.stats.probes),
+        timeouts=record.stats.timeouts,
+        stages=summary.stages,
+        loop=None if summary.loop is None else _loop_fields(summary.loop),
+    )
+
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        for r in results:
-            if isinstance(r, Exception):
-                logging.exception("Tâche en erreur", exc_info=r)
+async def _record_precheck_failure(
+    conn: aiosqlite.Connection,
+    config: Config,
+    params: RuntimeParams,
+    started: float,
+    timer: StageTimer,
+) -> None:
+    """Enregistre le bilan d'un cycle non lancé faute de connexion.
 
+    Le bilan est écrit dans la table runs et sur la sortie JSON Lines (si
+    activée); une erreur d'écriture en base est journalisée.
+    """
+    summary = CycleSummary([], [], [], precheck_failed=True)
+    summary.stages = timer.rounded()
+    record = RunRecord(
+        started,
+        time.time(),
+        len(_targets(config)),
+        0,
+        0,
+        0,
+        RunStats(),
+        stages=summary.stages,
+        precheck_failed=True,
+    )
+    if params.output is not None:
+        _emit_summary(params.output, summary, record)
+    try:
+        await record_run(conn, record)
         await conn.commit()
+    except Exception:
+        logging.exception("Impossible d'enregistrer le bilan du cycle")
+
 
-        date = datetime.now().strftime("%a %d/%m/%Y à %R")
-        if down:
-            message = f"Erreur monitoring sur {', '.join(down)} le {date}"
-            await notify(session, config, message)
-        if up:
-            message = f"{', '.join(up)} de nouveau up depuis le {date}"
-            await notify(session, config, message)
+def _loop_fields(health: LoopHealth) -> dict[str, float]:
+    """Santé de la boucle pour la sortie JSON Lines."""
+    return {
+        "lag_max": round(health.lag_max, 4),
+        "lag_mean": round(health.lag_mean, 4),
+        "slow_callbacks": health.slow_callbacks,
+        "peak_tasks": health.peak_tasks,
+    }
 
-        if not params.quiet:
-            print(f"Terminé: {len(down)} down, {len(up)} up.")
 
-    return down, up
+async def _publish_metrics(
+    cycle: _Cycle, record: RunRecord, metrics: Metrics
+) -> None:
+    """Met à jour les métriques et le fichier du textfile collector."""
+    metrics.update(
+        [
+            TargetState(
+                addr_type,
+                address,
+                target.description,
+                cycle.state.is_down(addr_type, address),
+            )
+            for addr_type, address, target in _targets(cycle.config)
+        ],
+        record,
+    )
+    path = cycle.config.metrics_textfile
+    if path is None:
+        return
+    try:
+        await write_textfile(path, metrics.text)
+    except OSError:
+        logging.exception("Impossible d'écrire les métriques dans %s", path)
+
+
+async def _run_loop(
+    conn: aiosqlite.Connection,
+    config: Config,
+    params: RuntimeParams,
+    settings: LoopSettings,
+) -> None:
+    """Mode résident: un cycle toutes les ``settings.interval`` secondes.
+
+    Une seule session HTTP sert à tous les cycles, si bien que les
+    connexions restent ouvertes d'un cycle à l'autre. La pré-vérification
+    série (``params.serial_precheck``) est faite à chaque cycle;
+    un cycle en erreur est journalisé sans arrêter la boucle. Le verrou
+    d'exécution est rafraîchi avant chaque cycle, pour qu'une exécution
+    ``takeover`` n'interrompe pas une boucle saine. Avec
+    ``settings.metrics_listen``, les métriques sont servies sur ``/metrics``.
+    """
+    loop = asyncio.get_running_loop()
+    interval, metrics_listen = settings.interval, settings.metrics_listen
+    if settings.lock is not None and interval >= config.lock_stale_after:
+        logging.warning(
+            "loop_interval (%s s) >= lock_stale_after (%s s): une exécution"
+            " takeover pourrait interrompre cette boucle",
+            interval,
+            config.lock_stale_after,
+        )
+    metrics: Metrics | None = None
+    server: MetricsServer | None = None
+    if metrics_listen is not None or config.metrics_textfile is not None:
+        metrics = await Metrics.load(conn)
+    if metrics is not None and metrics_listen is not None:
+        server = await MetricsServer.start(
+            metrics, *split_host_port(metrics_listen)
+        )
+    resources = LoopResources(
+        HttpClient.open(_http_options(config, params, interval)), metrics
+    )
+    try:
+        while True:
+            started, started_at = loop.time(), time.time()
+            timer = StageTimer()
+            if settings.lock is not None:
+                settings.lock.heartbeat()
+            try:
+                online = True
+                if params.serial_precheck:
+                    with timer.stage("precheck"):
+                        online = await _precheck_internet(
+                            params.precheck_timeout, quiet=params.quiet
+                        )
+                if online:
+                    await _run_all_checks(
+                        conn, config, params, timer, resources
+                    )
+                else:
+                    await _record_precheck_failure(
+                        conn, config, params, started_at, timer
+                    )
+            except Exception:
+                logging.exception("Cycle en erreur")
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+    finally:
+        await resources.http.close()
+        if server is not None:
+            await server.close()
+
+
+def _backoff_policy(config: Config) -> BackoffPolicy | None:
+    """Politique d'espacement des cibles down (None: désactivée)."""
+    if config.down_backoff_after is None:
+        return None
+    return BackoffPolicy(
+        config.down_backoff_after,
+        config.down_backoff_base,
+        config.down_backoff_max,
+    )
+
+
+def _print_summary(summary: CycleSummary) -> None:
+    """Affiche le bilan du cycle."""
+    if summary.local_outage:
+        print("Panne locale détectée: cycle ignoré, aucun statut modifié.")
+        return
+    line = f"Terminé: {len(summary.down)} down, {len(summary.up)} up"
+    if summary.unreachable:
+        line += f", {len(summary.unreachable)} injoignable(s) (parent down)"
+    if summary.deferred:
+        line += f", {len(summary.deferred)} différée(s) (backoff)"
+    if summary.unknown:
+        line += f", {len(summary.unknown)} ignorée(s) (échéance du cycle)"
+    if summary.http_reused:
+        line += (
+            f", {summary.http_reused} connexion(s) HTTP réutilisée(s)"
+            f" / {summary.http_created} ouverte(s)"
+        )
+    if summary.loop is not None:
+        line += (
+            f". Boucle: retard max {summary.loop.lag_max * 1000:.0f} ms,"
+            f" {summary.loop.slow_callbacks} rappel(s) lent(s)"
+        )
+    if summary.stages:
+        line += f". Étapes: {format_stages(summary.stages)}"
+    print(f"{line}.")
 
 
 async def init_db(db_path: Path) -> aiosqlite.Connection:
@@ -305,6 +1738,18 @@ async def init_db(db_path: Path) -> aiosqlite.Connection:
                           down INTEGER NOT NULL,
                           UNIQUE(type, address)
                           )""")
+    for column in SCHEDULE_COLUMNS:
+        await ensure_column(conn, "status", column, "REAL")
+    await conn.execute("""CREATE TABLE IF NOT EXISTS counters (
+                          name TEXT PRIMARY KEY,
+                          value INTEGER NOT NULL,
+                          updated_at TEXT NOT NULL
+                          )""")
+    await init_outbox(conn)
+    await conn.execute(CREATE_RATE_LIMITS_TABLE)
+    await conn.execute(CREATE_LATENCY_TABLE)
+    await conn.execute(CREATE_LATENCY_INDEX)
+    await init_runs(conn)
     return conn
 
 
@@ -350,141 +1795,323 @@ async def remove_old_entries(
     conn: aiosqlite.Connection,
     current_ips: set[str],
     current_urls: set[str],
+    current_tcp: set[str],
 ) -> None:
     """Nettoie les adresses à ne plus surveiller."""
     logging.info("Nettoyage des adresses")
     logging.debug("Addresses IP : %s", current_ips)
     logging.debug("Adresses URL : %s", current_urls)
-    # 1) Suppression des IP obsolètes
-    if current_ips:
-        # Génère "?, ?, ?" selon le nombre d'IPs
-        placeholders = ",".join("?" for _ in current_ips)
-        # Bandit B608 false positive: placeholders is a fixed string of '?' and
-        # values are passed as parameters, preventing SQL injection.
-        await conn.execute(
-            f"""
-            DELETE FROM status
-            WHERE type = 'IP'
-              AND address NOT IN ({placeholders})
-            """,  # nosec: B608 - safe parameterization
-            tuple(current_ips),
-        )
-    else:
-        # Pas d'IP à conserver → supprimer toutes les lignes IP
-        await conn.execute("DELETE FROM status WHERE type = 'IP'")
-
-    # 2) Suppression des URLs obsolètes
-    if current_urls:
-        placeholders = ",".join("?" for _ in current_urls)
-        # Bandit B608 false positive (see above comment).
-        await conn.execute(
-            f"""
-            DELETE FROM status
-            WHERE type = 'URL'
-              AND address NOT IN ({placeholders})
-            """,  # nosec: B608 - safe parameterization
-            tuple(current_urls),
-        )
-    else:
-        await conn.execute("DELETE FROM status WHERE type = 'URL'")
-
-
-async def ping(ip: str) -> bool:
-    """Ping une IP."""
-    logging.debug("Ping adresse IP %s", ip)
-    # Forcer la locale en C pour une sortie stable, même si on s'appuie
-    # principalement sur le code de retour (0: au moins une réponse)
+    logging.debug("Adresses TCP : %s", current_tcp)
+    current = {
+        "IP": current_ips,
+        "URL": current_urls,
+        "TCP": current_tcp,
+    }
+    # Statuts et historique de latence des cibles retirées
+    for table in ("status", "latency"):
+        for addr_type, addresses in current.items():
+            if not addresses:
+                # Aucune adresse de ce type à conserver → tout supprimer
+                await conn.execute(
+                    f"DELETE FROM {table} WHERE type = ?",  # nosec: B608
+                    (addr_type,),
+                )
+                continue
+            # Génère "?, ?, ?" selon le nombre d'adresses
+            placeholders = ",".join("?" for _ in addresses)
+            # Bandit B608 false positive: placeholders is a fixed string of
+            # '?', table a constant, and values are passed as parameters,
+            # preventing SQL injection.
+            await conn.execute(
+                f"""
+                DELETE FROM {table}
+                WHERE type = ?
+                  AND address NOT IN ({placeholders})
+                """,  # nosec: B608 - safe parameterization
+                (addr_type, *addresses),
+            )
+
+
+# Une requête par seconde, arrêt dès la première réponse: la durée d'un
+# ping réussi est celle d'un aller-retour
+_PING_ARGS = ("ping", "-q", "-s26", "-c1")
+
+
+@cache
+def _ping_env() -> dict[str, str]:
+    """Environnement des pings, préparé au premier ping.
+
+    Locale forcée en C pour une sortie stable, même si on s'appuie sur le
+    code de retour (0: au moins une réponse).
+    """
     env = os.environ.copy()
     env.setdefault("LC_ALL", "C")
     env.setdefault("LANG", "C")
+    return env
+
+
+async def ping(ip: str, deadline: float | None = None) -> bool:
+    """Ping une IP.
+
+    ``deadline`` (délai propre à la cible) fixe l'abandon ``-w`` du ping,
+    arrondi à la seconde supérieure; sinon ``PING_WAIT`` secondes.
+    """
+    # La sortie n'est lue (et décodée) que pour le journal DEBUG
+    debug = logging.root.isEnabledFor(logging.DEBUG)
+    if debug:
+        logging.debug("Ping adresse IP %s", ip)
+    wait = max(1, math.ceil(PING_WAIT if deadline is None else deadline))
     proc = await asyncio.create_subprocess_exec(
-        "ping",
-        "-q",
-        "-s26",
-        "-c5",
+        *_PING_ARGS,
+        f"-w{wait}",
         ip,
-        stdout=asyncio.subprocess.PIPE,
+        stdout=(
+            asyncio.subprocess.PIPE if debug else asyncio.subprocess.DEVNULL
+        ),
         stderr=asyncio.subprocess.DEVNULL,
-        env=env,
+        env=_ping_env(),
     )
-    stdout, _stderr = await proc.communicate()
-    logging.debug("Code retour ping: %s", proc.returncode)
-    if stdout:
-        logging.debug("Sortie ping brute :\n%s", stdout.decode(errors="ignore"))
+    try:
+        stdout, _stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        # Timeout ou échéance du cycle: ne pas laisser de ping orphelin
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+            current_run().killed += 1
+        raise
+    if debug:
+        logging.debug("Code retour ping: %s", proc.returncode)
+        if stdout:
+            logging.debug(
+                "Sortie ping brute :\n%s", stdout.decode(errors="ignore")
+            )
     # iputils ping: 0 = au moins une réponse, 1 = aucune réponse, 2 = erreur
     return proc.returncode == 0
 
 
-async def check_url(session: ClientSession, url: str) -> bool:
-    """Vérifie si une URL est down."""
+async def tcp_connect(host: str, port: int) -> bool:
+    """Établit puis referme une connexion TCP, sans échanger de données."""
+    logging.debug("Connexion TCP à %s:%i", host, port)
+    loop = asyncio.get_running_loop()
+    try:
+        transport, _ = await loop.create_connection(
+            asyncio.Protocol, host, port
+        )
+    except OSError as exc:
+        logging.debug("Connexion TCP à %s:%i impossible : %s", host, port, exc)
+        return False
+    transport.close()
+    return True
+
+
+async def check_url(
+    session: ClientSession, url: str, max_wait: float | None = None
+) -> bool:
+    """Vérifie si une URL est down.
+
+    ``max_wait`` (délai propre à la cible) remplace le délai de la session
+    pour chaque requête, qu'il soit plus court ou plus long.
+    """
+    timeout = None if max_wait is None else ClientTimeout(total=max_wait)
     try:
         target = (
             url if url.startswith(("http://", "https://")) else f"http://{url}"
         )
-        async with session.head(target, allow_redirects=True) as response:
+        async with session.head(
+            target, allow_redirects=True, timeout=timeout
+        ) as response:
             if response.status == http_client.OK:
                 return True
 
-        async with session.get(target, allow_redirects=True) as response:
+        async with session.get(
+            target, allow_redirects=True, timeout=timeout
+        ) as response:
             return response.status == http_client.OK
 
     except ClientError:
         return False
 
 
+async def _was_down(
+    context: ProbeContext, addr_type: str, address: str
+) -> bool:
+    """Statut enregistré d'une adresse (état en mémoire, sinon la base)."""
+    if context.state is not None:
+        return context.state.is_down(addr_type, address)
+    return await check_status(context.conn, addr_type, address)
+
+
+async def _observe(
+    context: ProbeContext,
+    target: tuple[str, str],
+    probe: Callable[[], Awaitable[bool]],
+    priority: int = 0,
+) -> bool:
+    """Vérifie une cible (type, adresse); retourne True si elle est up.
+
+    Avec ``context.lanes``, la vérification passe par la voie normale et
+    une transition est confirmée sur la voie prioritaire.
+    """
+    stats = current_run()
+    lanes = context.lanes
+
+    async def counted() -> bool:
+        with stats.probing(target):
+            return await probe()
+
+    if lanes is None:
+        return await counted()
+    is_up = await lanes.probe(counted, priority, target)
+    if lanes.confirm_attempts and await _was_down(context, *target) == is_up:
+        is_up = await lanes.confirm(counted, is_up)
+    return is_up
+
+
+async def _apply_result(
+    context: ProbeContext,
+    target: tuple[str, str],
+    description: str,
+    is_down: bool,
+) -> bool:
+    """Enregistre le résultat d'une vérification.
+
+    Utilise l'état en mémoire s'il est fourni, sinon la base directement,
+    et range la description de la cible dans ``context.down`` ou
+    ``context.up``. Retourne True si le statut de l'adresse a changé;
+    sans ``context.record``, rien n'est modifié.
+    """
+    addr_type, address = target
+    was_down = await _was_down(context, addr_type, address)
+    if was_down == is_down:
+        return False
+    if not context.record:
+        return True
+    if context.state is not None:
+        context.state.set_down(addr_type, address, is_down)
+    else:
+        await update_status(context.conn, addr_type, address, int(is_down))
+    (context.down if is_down else context.up).append(description)
+    return True
+
+
 async def check_ip(
-    conn: aiosqlite.Connection,
-    ip: IpInfo,
-    down: list[str],
-    up: list[str],
-    ping_timeout: float,
-) -> None:
+    context: ProbeContext, ip: IpInfo, ping_timeout: float
+) -> CheckResult:
     """Vérifie une IP et la place dans la bonne liste."""
-    logging.info("Vérification (ping) de %s", ip.ip)
-    try:
-        is_up = await asyncio.wait_for(ping(ip.ip), timeout=ping_timeout)
-    except Exception:
-        logging.exception("Erreur pendant le ping de %s", ip.ip)
-        is_up = False
-    if not is_up:
-        if not await check_status(conn, "IP", ip.ip):
-            logging.info("%s down", ip.ip)
-            down.append(ip.description)
-            logging.info("Ajout %s aux IP down dans la base de données", ip.ip)
-            await update_status(conn, "IP", ip.ip, 1)
-    elif await check_status(conn, "IP", ip.ip):
-        logging.info("%s à nouveau up", ip.ip)
-        up.append(ip.description)
-        logging.debug("Ajout de %s en base comme up", ip.ip)
-        await update_status(conn, "IP", ip.ip, 0)
+    # Délai propre à la cible (explicite ou appris), repris par -w
+    max_wait = (
+        ip.timeout
+        if context.lanes is None
+        else context.lanes.timeouts.get(("IP", ip.ip))
+    )
+
+    async def probe() -> bool:
+        logging.info("Vérification (ping) de %s", ip.ip)
+        try:
+            return await asyncio.wait_for(
+                ping(ip.ip, max_wait), timeout=ping_timeout
+            )
+        except TimeoutError:
+            current_run().timeouts += 1
+            logging.info("%s : pas de réponse en %s s", ip.ip, ping_timeout)
+            return False
+        except Exception:
+            logging.exception("Erreur pendant le ping de %s", ip.ip)
+            return False
+
+    is_up = await _observe(context, ("IP", ip.ip), probe, ip.priority)
+    changed = await _apply_result(
+        context, ("IP", ip.ip), ip.description, not is_up
+    )
+    if changed:
+        logging.info("%s %s", ip.ip, "à nouveau up" if is_up else "down")
+    return CheckResult(
+        "IP", ip.ip, ip.description, not is_up, changed, ip.tags, ip.severity
+    )
 
 
 async def check_url_status(
-    conn: aiosqlite.Connection,
-    session: ClientSession,
-    url_info: UrlInfo,
-    down: list[str],
-    up: list[str],
-) -> None:
+    context: ProbeContext, session: ClientSession, url_info: UrlInfo
+) -> CheckResult:
     """Vérifie si une URL est joignable et la place dans la bonne liste."""
-    logging.info("Vérification de l'URL %s", url_info.url)
-    if not await check_url(session, url_info.url):
-        if not await check_status(conn, "URL", url_info.url):
-            down.append(url_info.description)
-            await update_status(conn, "URL", url_info.url, 1)
-    elif await check_status(conn, "URL", url_info.url):
-        up.append(url_info.description)
-        await update_status(conn, "URL", url_info.url, 0)
+    max_wait = (
+        url_info.timeout
+        if context.lanes is None
+        else context.lanes.timeouts.get(("URL", url_info.url))
+    )
+    hedging = context.hedging
+
+    async def request() -> bool:
+        if hedging is not None:
+            return await hedging.check(session, url_info.url, max_wait)
+        return await check_url(session, url_info.url, max_wait)
+
+    async def probe() -> bool:
+        logging.info("Vérification de l'URL %s", url_info.url)
+        try:
+            async with asyncio.timeout(max_wait):
+                return await request()
+        except TimeoutError:
+            current_run().timeouts += 1
+            logging.info("%s : pas de réponse en %s s", url_info.url, max_wait)
+            return False
 
+    is_up = await _observe(
+        context, ("URL", url_info.url), probe, url_info.priority
+    )
+    changed = await _apply_result(
+        context, ("URL", url_info.url), url_info.description, not is_up
+    )
+    return CheckResult(
+        "URL",
+        url_info.url,
+        url_info.description,
+        not is_up,
+        changed,
+        url_info.tags,
+        url_info.severity,
+    )
 
-async def main() -> None:
-    """Fonction principale."""
-    argcomplete.autocomplete(parser)
-    arguments = parser.parse_args()
-    logging.basicConfig(
-        level=arguments.log_level,
-        format="%(asctime)s (%(levelname)s) [%(name)s] %(message)s",
+
+async def check_tcp(
+    context: ProbeContext, tcp_info: TcpInfo, tcp_timeout: float
+) -> CheckResult:
+    """Vérifie qu'un service TCP accepte les connexions."""
+    host, port = split_host_port(tcp_info.tcp)
+
+    async def probe() -> bool:
+        logging.info("Vérification (TCP) de %s", tcp_info.tcp)
+        try:
+            return await asyncio.wait_for(
+                tcp_connect(host, port), timeout=tcp_timeout
+            )
+        except TimeoutError:
+            current_run().timeouts += 1
+            logging.info(
+                "%s : pas de réponse en %s s", tcp_info.tcp, tcp_timeout
+            )
+            return False
+
+    is_up = await _observe(
+        context, ("TCP", tcp_info.tcp), probe, tcp_info.priority
+    )
+    changed = await _apply_result(
+        context, ("TCP", tcp_info.tcp), tcp_info.description, not is_up
     )
+    return CheckResult(
+        "TCP",
+        tcp_info.tcp,
+        tcp_info.description,
+        not is_up,
+        changed,
+        tcp_info.tags,
+        tcp_info.severity,
+    )
+
+
+def _config_file_path(arguments: argparse.Namespace) -> str:
+    """Chemin absolu du fichier de configuration; quitte s'il est illisible."""
     config_file = os.path.abspath(os.path.join(os.getcwd(), arguments.config))
     if not os.path.exists(config_file):
         print(
@@ -498,7 +2125,196 @@ async def main() -> None:
             file=sys.stderr,
         )
         sys.exit(1)
-    config: Config = await load_config(config_file)
+    return config_file
+
+
+async def _record_overlap(db_path: Path, event: str) -> None:
+    """Comptabilise un chevauchement d'exécutions dans la base."""
+    logging.warning("Chevauchement avec une autre instance : %s", event)
+    try:
+        conn = await init_db(db_path)
+        try:
+            await increment_counter(conn, f"overlap_{event}")
+            await conn.commit()
+        finally:
+            await conn.close()
+    except Exception:
+        logging.exception("Impossible d'enregistrer le chevauchement")
+
+
+async def _acquire_lock(
+    arguments: argparse.Namespace, config: Config, *, quiet: bool = False
+) -> RunLock | None:
+    """Prend le verrou d'exécution; None si le cycle doit être ignoré.
+
+    Quitte si le fichier du verrou ne peut pas être ouvert.
+    """
+    lock = RunLock(lock_path_for(config.db_path))
+    policy = getattr(arguments, "lock_policy", None) or config.lock_policy
+    try:
+        overlap = await acquire_run_lock(
+            lock,
+            LockPolicy(policy),
+            config.lock_timeout,
+            config.lock_stale_after,
+        )
+    except OSError as exc:
+        print(
+            f"Impossible d'ouvrir le verrou {lock.path} : {exc.strerror or exc}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    if overlap is not None:
+        await _record_overlap(config.db_path, overlap)
+    if not lock.held:
+        if not quiet:
+            print("Une autre instance est en cours d'exécution, cycle ignoré.")
+        return None
+    return lock
+
+
+async def main() -> None:
+    """Fonction principale."""
+    argcomplete.autocomplete(parser)
+    arguments = parser.parse_args()
+    logging.basicConfig(
+        level=arguments.log_level,
+        format="%(asctime)s (%(levelname)s) [%(name)s] %(message)s",
+    )
+    command = getattr(arguments, "command", None)
+    if command == "runs":
+        await _show_runs(arguments)
+        return
+    if command == "plan":
+        await _show_plan(arguments)
+        return
+    profile_path = getattr(arguments, "profile", None)
+    if profile_path is None:
+        await _main(arguments)
+        return
+    profile = Profile(profile_path)
+    profile.start()
+    try:
+        await _main(arguments)
+    finally:
+        profile.stop()
+
+
+async def _show_runs(arguments: argparse.Namespace) -> None:
+    """Sous-commande ``runs``: bilan des derniers cycles."""
+    config = await load_config(_config_file_path(arguments))
+    conn = await init_db(config.db_path)
+    try:
+        runs = await recent_runs(conn, arguments.last)
+    finally:
+        await conn.close()
+    if not runs:
+        print("Aucun cycle enregistré.")
+        return
+    print(format_runs(runs))
+
+
+async def _plan_history(db_path: Path) -> tuple[StatusState, LatencyHistory]:
+    """État et historique de latence lus sans modifier la base.
+
+    La base est ouverte en lecture seule; absente (aucun cycle lancé) ou
+    illisible, l'estimation part d'un état vide.
+    """
+    if not db_path.exists():
+        logging.warning("Base %s absente : aucun historique", db_path)
+        return StatusState(), LatencyHistory()
+    try:
+        async with aiosqlite.connect(
+            f"{db_path.resolve().as_uri()}?mode=ro", uri=True
+        ) as conn:
+            return await StatusState.load(conn), await LatencyHistory.load(conn)
+    except sqlite3.Error:
+        logging.warning("Base %s illisible : aucun historique", db_path)
+        return StatusState(), LatencyHistory()
+
+
+async def _show_plan(arguments: argparse.Namespace) -> None:
+    """Sous-commande ``plan``: durée estimée d'un cycle, sans vérification."""
+    config = await load_config(_config_file_path(arguments))
+    _, ping_timeout, http_timeout, connector_limit, concurrency, _ = (
+        _resolve_params(arguments, config)
+    )
+    params = RuntimeParams(
+        http_timeout=http_timeout,
+        http_connector_limit=connector_limit,
+        concurrency=concurrency,
+        ping_timeout=ping_timeout,
+    )
+    state, history = await _plan_history(config.db_path)
+    timeouts = _target_timeouts(config, params, history)
+    defaults = {
+        # Sans délai propre, un ping abandonne au bout de -w5
+        "IP": min(PING_WAIT, ping_timeout),
+        "URL": http_timeout,
+        "TCP": config.tcp_timeout,
+    }
+    probes = [
+        estimate(
+            addr_type,
+            address,
+            history=history,
+            is_down=state.is_down(addr_type, address),
+            timeout=timeouts.get((addr_type, address), defaults[addr_type]),
+        )
+        for addr_type, address, _ in _dispatch_order(config, state)
+    ]
+    interval = arguments.interval
+    if interval is None:
+        interval = _resolve_loop_interval(arguments, config)
+    if interval is None:
+        interval = _resolve_cycle_deadline(arguments, config)
+    print(
+        format_plan(
+            probes,
+            simulate(probes, concurrency, connector_limit),
+            interval,
+            None
+            if interval is None
+            else recommend(probes, interval * HEADROOM),
+        )
+    )
+
+
+async def _run_once(
+    config: Config, params: RuntimeParams, started: float, timer: StageTimer
+) -> None:
+    """Un cycle ponctuel, précédé de la pré-vérification série.
+
+    Si elle échoue, seul le bilan du cycle non lancé est enregistré.
+    """
+    online = True
+    if params.serial_precheck:
+        with timer.stage("precheck"):
+            online = await _precheck_internet(
+                params.precheck_timeout, quiet=params.quiet
+            )
+
+    with timer.stage("init_db"):
+        conn = await init_db(config.db_path)
+    try:
+        if online:
+            await _run_all_checks(conn, config, params, timer=timer)
+        else:
+            await _record_precheck_failure(conn, config, params, started, timer)
+    finally:
+        try:
+            await conn.close()
+        except Exception:
+            logging.exception("Erreur à la fermeture de la base")
+
+
+async def _main(arguments: argparse.Namespace) -> None:
+    """Un cycle de vérifications, ou la boucle du mode résident."""
+    started = time.time()
+    timer = StageTimer()
+    config_file = _config_file_path(arguments)
+    with timer.stage("load_config"):
+        config: Config = await load_config(config_file)
 
     (
         precheck_timeout,
@@ -508,42 +2324,60 @@ async def main() -> None:
         concurrency,
         precheck_enabled,
     ) = _resolve_params(arguments, config)
-
-    # Quiet: CLI > ENV > default(False) — be tolerant if attribute is missing
-    env_quiet = _env_bool("IPM_QUIET")
-    arg_quiet = getattr(arguments, "quiet", None)
-    quiet = (
-        arg_quiet
-        if arg_quiet is not None
-        else (env_quiet if env_quiet is not None else False)
+    cycle_deadline = _resolve_cycle_deadline(arguments, config)
+    loop_interval = _resolve_loop_interval(arguments, config)
+    metrics_listen = _resolve_metrics_listen(arguments, config)
+    if metrics_listen is not None and loop_interval is None:
+        logging.warning(
+            "metrics_listen ignoré: le point /metrics n'est servi qu'en mode boucle (--loop)"
+        )
+    inline_precheck = (
+        precheck_enabled
+        and _resolve_precheck_mode(arguments, config) == PrecheckMode.INLINE
     )
 
+    jsonl, output_file = _resolve_output(arguments)
+    # Rien d'autre que le flux JSON Lines sur la sortie standard
+    quiet = _resolve_quiet(arguments) or (jsonl and output_file is None)
+
     if not quiet:
         print(
             f"Config: {config_file} — IPs: {len(config.ips)}, URLs: {len(config.urls)}, "
-            f"concurrency: {concurrency}"
+            + (f"TCP: {len(config.tcp)}, " if config.tcp else "")
+            + f"concurrency: {concurrency}"
         )
 
-    if precheck_enabled:
-        ok = await _precheck_internet(precheck_timeout, quiet=quiet)
-        if not ok:
-            return
-
+    lock = await _acquire_lock(arguments, config, quiet=quiet)
+    if lock is None:
+        return
+
+    params = RuntimeParams(
+        http_timeout=http_timeout,
+        http_connector_limit=http_connector_limit,
+        concurrency=concurrency,
+        ping_timeout=ping_timeout,
+        quiet=quiet,
+        flush_batch_size=config.flush_batch_size,
+        notify_batch_window=config.notify_batch_window,
+        cycle_deadline=cycle_deadline,
+        precheck_anchors=(config.precheck_anchors if inline_precheck else None),
+        precheck_timeout=precheck_timeout,
+        serial_precheck=precheck_enabled and not inline_precheck,
+    )
     conn: aiosqlite.Connection | None = None
     try:
-        conn = await init_db(config.db_path)
+        params.output = await JsonlWriter.open(output_file) if jsonl else None
+        if loop_interval is not None:
+            conn = await init_db(config.db_path)
+            await _run_loop(
+                conn,
+                config,
+                params,
+                LoopSettings(loop_interval, metrics_listen, lock),
+            )
+            return
 
-        await _run_all_checks(
-            conn,
-            config,
-            RuntimeParams(
-                http_timeout=http_timeout,
-                http_connector_limit=http_connector_limit,
-                concurrency=concurrency,
-                ping_timeout=ping_timeout,
-                quiet=quiet,
-            ),
-        )
+        await _run_once(config, params, started, timer)
     except (asyncio.CancelledError, KeyboardInterrupt):
         logging.info("Interruption demandée, arrêt en cours…")
         raise
@@ -555,3 +2389,6 @@ async def main() -> None:
                 await conn.close()
             except Exception:
                 logging.exception("Erreur à la fermeture de la base")
+        if params.output is not None:
+            params.output.close()
+        lock.release()
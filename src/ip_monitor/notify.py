@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import TYPE_CHECKING
 
@@ -14,7 +15,7 @@ from pysmsboxnet.api import Client
 from .config import NotifyMethod
 
 if TYPE_CHECKING:
-    from .config import Config, NtfyConfig, SMSBoxConfig
+    from .config import ChannelConfig, NtfyConfig, SMSBoxConfig
 
 
 async def notify_ntfy(
@@ -23,8 +24,11 @@ async def notify_ntfy(
     message: str,
     title: str = "IP Monitor",
     priority: int = 4,
-) -> None:
-    """Envoie une notification en utilisant ntfy.sh."""
+) -> bool:
+    """Envoie une notification en utilisant ntfy.sh.
+
+    Retourne True si la notification a été publiée.
+    """
     try:
         ntfy = Ntfy(str(ntfy_config.server), session)
         ntfy_message = Message(
@@ -36,12 +40,17 @@ async def notify_ntfy(
         await ntfy.publish(ntfy_message)
     except NtfyException:
         logging.exception("Erreur d'envoie de la notification via Ntfy")
+        return False
+    return True
 
 
 async def notify_smsbox(
     session: ClientSession, config: SMSBoxConfig, message: str
-) -> None:
-    """Envoie une notification en utilisant smsbox.net."""
+) -> bool:
+    """Envoie une notification en utilisant smsbox.net.
+
+    Retourne True si le SMS a été accepté par l'API.
+    """
     sms: Client = Client(session, "api.smsbox.pro", config.api_key)
     try:
         await sms.send(
@@ -49,23 +58,31 @@ async def notify_smsbox(
         )
     except exceptions.SMSBoxException:
         logging.exception("Erreur d'envoie du SMS'")
+        return False
+    return True
 
 
-async def notify(session: ClientSession, config: Config, message: str) -> None:
-    """Envoie une notification."""
-    if config.notify_method == NotifyMethod.NTFY_SH:
-        if (
-            config.ntfy is None
-        ):  # pragma: no cover - garanti par la validation Config
-            raise ValueError(
-                "Configuration Ntfy manquante pour le backend sélectionné"
-            )
-        await notify_ntfy(session, config.ntfy, message)
-    elif config.notify_method == NotifyMethod.SMSBOX:
+async def notify_channel(
+    session: ClientSession, channel: ChannelConfig, message: str
+) -> bool:
+    """Envoie une notification sur un canal, en au plus ``channel.timeout``.
+
+    Retourne True si elle a été délivrée; un dépassement du délai lève
+    TimeoutError.
+    """
+    async with asyncio.timeout(channel.timeout):
+        if channel.method == NotifyMethod.NTFY_SH:
+            if (
+                channel.ntfy is None
+            ):  # pragma: no cover - garanti par la validation ChannelConfig
+                raise ValueError(
+                    "Configuration Ntfy manquante pour le backend sélectionné"
+                )
+            return await notify_ntfy(session, channel.ntfy, message)
         if (
-            config.smsbox is None
-        ):  # pragma: no cover - garanti par la validation Config
+            channel.smsbox is None
+        ):  # pragma: no cover - garanti par la validation ChannelConfig
             raise ValueError(
                 "Configuration SMSBox manquante pour le backend sélectionné"
             )
-        await notify_smsbox(session, config.smsbox, message)
+        return await notify_smsbox(session, channel.smsbox, message)
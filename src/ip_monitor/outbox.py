@@ -0,0 +1,294 @@
+"""Boîte d'envoi persistante des notifications.
+
+Les messages sont insérés dans la table ``outbox`` dans la même
+transaction que les changements de statut qu'ils annoncent, puis envoyés
+en arrière-plan par ``OutboxWorker``. Un envoi en échec est retenté avec
+un délai exponentiel, y compris au cycle suivant: un serveur ntfy ou une
+API SMSBox indisponible ne fait plus perdre d'alerte ni ralentir le cycle.
+
+Chaque message vise un canal; les envois sont indépendants: un canal lent
+ne retarde pas les messages destinés aux autres. Seuls les
+``OUTBOX_KEPT`` derniers messages terminés (délivrés ou abandonnés) sont
+conservés.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .state import ensure_column, increment_counter
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+# Fonction d'envoi: reçoit le canal et le message, retourne True si délivré
+Sender = Callable[[str, str], Awaitable[bool]]
+
+# Messages terminés conservés pour l'historique (les plus récents)
+OUTBOX_KEPT = 10_000
+
+CREATE_OUTBOX_TABLE = """CREATE TABLE IF NOT EXISTS outbox (
+                          id INTEGER PRIMARY KEY,
+                          created_at REAL NOT NULL,
+                          channel TEXT NOT NULL DEFAULT '',
+                          message TEXT NOT NULL,
+                          attempts INTEGER NOT NULL DEFAULT 0,
+                          next_attempt_at REAL NOT NULL,
+                          delivered_at REAL,
+                          latency REAL,
+                          last_error TEXT
+                          )"""
+
+
+@dataclass
+class RetryPolicy:
+    """Politique de nouvelle tentative des envois."""
+
+    max_attempts: int = 8
+    backoff_base: float = 5.0
+    backoff_max: float = 900.0
+
+    def delay(self, attempts: int) -> float:
+        """Délai avant la tentative suivante après ``attempts`` échecs."""
+        return min(self.backoff_max, self.backoff_base * 2.0 ** (attempts - 1))
+
+
+@dataclass
+class OutboxStats:
+    """Statistiques d'envoi d'un cycle."""
+
+    delivered: int = 0
+    failures: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+
+async def init_outbox(conn: aiosqlite.Connection) -> None:
+    """Crée la table outbox, ou ajoute les colonnes manquantes."""
+    await conn.execute(CREATE_OUTBOX_TABLE)
+    await ensure_column(conn, "outbox", "channel", "TEXT NOT NULL DEFAULT ''")
+
+
+async def enqueue(
+    conn: aiosqlite.Connection, messages: list[tuple[str, str]]
+) -> None:
+    """Ajoute des messages (canal, texte) à la boîte d'envoi.
+
+    La transaction n'est pas validée.
+    """
+    now = time.time()
+    await conn.executemany(
+        "INSERT INTO outbox(created_at, channel, message, next_attempt_at)"
+        " VALUES (?, ?, ?, ?)",
+        [(now, channel, message, now) for channel, message in messages],
+    )
+
+
+class OutboxWorker:
+    """Envoie en tâche de fond les messages en attente de la boîte d'envoi."""
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection,
+        send: Sender,
+        lock: asyncio.Lock,
+        policy: RetryPolicy,
+    ) -> None:
+        """Prépare le worker; ``lock`` protège les transactions partagées."""
+        self.conn = conn
+        self.send = send
+        self.lock = lock
+        self.policy = policy
+        self.stats = OutboxStats()
+        self._wake = asyncio.Event()
+        self._drain_until: float | None = None
+        self._task: asyncio.Task[None] | None = None
+        # Envois en cours, par identifiant de message
+        self._inflight: dict[int, asyncio.Task[None]] = {}
+
+    def start(self) -> None:
+        """Démarre l'envoi; les messages restés en attente partent d'abord."""
+        self._task = asyncio.create_task(self._run())
+
+    def wake(self) -> None:
+        """Signale que de nouveaux messages ont été validés."""
+        self._wake.set()
+
+    async def close(self, drain_timeout: float) -> None:
+        """Termine les envois en cours, en attendant au plus drain_timeout.
+
+        Les messages non délivrés restent dans la table pour le cycle
+        suivant.
+        """
+        if self._task is None:
+            return
+        self._drain_until = time.time() + drain_timeout
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=drain_timeout)
+        except TimeoutError:
+            logging.warning(
+                "Envoi des notifications interrompu après %.1f s", drain_timeout
+            )
+        self._task = None
+
+    def cancel(self) -> None:
+        """Arrête immédiatement le worker (sortie sur erreur)."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._inflight.values():
+            task.cancel()
+        self._inflight.clear()
+
+    async def _run(self) -> None:
+        try:
+            await self._purge()
+            await self._loop()
+        finally:
+            for task in self._inflight.values():
+                task.cancel()
+
+    async def _loop(self) -> None:
+        while True:
+            # Effacé avant la requête: un réveil pendant celle-ci n'est pas perdu
+            self._wake.clear()
+            for row in await self._due_rows():
+                self._inflight[row[0]] = asyncio.create_task(
+                    self._deliver(*row)
+                )
+            next_at = await self._next_attempt_at()
+            if (
+                self._drain_until is not None
+                and not self._inflight
+                and (next_at is None or next_at > self._drain_until)
+            ):
+                return
+            delay = None if next_at is None else max(0.0, next_at - time.time())
+            waker = asyncio.create_task(self._wake.wait())
+            try:
+                # Réveil: nouveau message, envoi terminé ou prochaine échéance
+                await asyncio.wait(
+                    [waker, *self._inflight.values()],
+                    timeout=delay,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                waker.cancel()
+            self._inflight = {
+                row_id: task
+                for row_id, task in self._inflight.items()
+                if not task.done()
+            }
+
+    async def _purge(self) -> None:
+        """Supprime les plus anciens messages délivrés ou abandonnés."""
+        async with self.lock:
+            await self.conn.execute(
+                """
+                DELETE FROM outbox
+                WHERE (delivered_at IS NOT NULL OR attempts >= ?)
+                  AND id NOT IN (
+                    SELECT id FROM outbox
+                    WHERE delivered_at IS NOT NULL OR attempts >= ?
+                    ORDER BY id DESC LIMIT ?
+                  )
+                """,
+                (
+                    self.policy.max_attempts,
+                    self.policy.max_attempts,
+                    OUTBOX_KEPT,
+                ),
+            )
+            await self.conn.commit()
+
+    def _not_inflight(self) -> tuple[str, list[int]]:
+        """Clause SQL excluant les messages en cours d'envoi."""
+        ids = list(self._inflight)
+        return (
+            f"AND id NOT IN ({', '.join('?' * len(ids))})" if ids else "",
+            ids,
+        )
+
+    async def _due_rows(self) -> list[tuple[int, str, str, float, int]]:
+        clause, ids = self._not_inflight()
+        # Verrou: ne pas lire les messages d'une transaction non validée
+        async with self.lock:
+            rows = await self.conn.execute_fetchall(
+                f"""
+                SELECT id, channel, message, created_at, attempts FROM outbox
+                WHERE delivered_at IS NULL
+                  AND attempts < ?
+                  AND next_attempt_at <= ?
+                  {clause}
+                ORDER BY id
+                """,  # nosec: B608 - safe parameterization
+                (self.policy.max_attempts, time.time(), *ids),
+            )
+        return [(r[0], r[1], r[2], r[3], r[4]) for r in rows]
+
+    async def _next_attempt_at(self) -> float | None:
+        clause, ids = self._not_inflight()
+        async with self.lock:
+            rows = await self.conn.execute_fetchall(
+                f"""
+                SELECT MIN(next_attempt_at) FROM outbox
+                WHERE delivered_at IS NULL AND attempts < ? {clause}
+                """,  # nosec: B608 - safe parameterization
+                (self.policy.max_attempts, *ids),
+            )
+        next_at: float | None = next(iter(rows))[0]
+        return next_at
+
+    async def _deliver(
+        self,
+        row_id: int,
+        channel: str,
+        message: str,
+        created_at: float,
+        attempts: int,
+    ) -> None:
+        error: str | None = None
+        try:
+            delivered = await self.send(channel, message)
+        except Exception as exc:
+            logging.exception(
+                "Erreur d'envoi de la notification %i (%s)", row_id, channel
+            )
+            delivered, error = False, repr(exc)
+        now = time.time()
+        async with self.lock:
+            if delivered:
+                latency = now - created_at
+                self.stats.delivered += 1
+                self.stats.latencies.append(latency)
+                await self.conn.execute(
+                    "UPDATE outbox SET delivered_at = ?, latency = ?,"
+                    " attempts = attempts + 1 WHERE id = ?",
+                    (now, latency, row_id),
+                )
+            else:
+                attempts += 1
+                self.stats.failures += 1
+                if attempts >= self.policy.max_attempts:
+                    logging.error(
+                        "Notification %i abandonnée après %i tentatives",
+                        row_id,
+                        attempts,
+                    )
+                await self.conn.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?,"
+                    " last_error = ? WHERE id = ?",
+                    (
+                        attempts,
+                        now + self.policy.delay(attempts),
+                        error or "échec de l'envoi",
+                        row_id,
+                    ),
+                )
+                await increment_counter(self.conn, "notify_failures")
+            await self.conn.commit()
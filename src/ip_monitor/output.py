@@ -0,0 +1,68 @@
+"""Sortie JSON Lines des résultats (``--output jsonl``).
+
+Un objet JSON par ligne, écrit dès qu'un résultat arrive: ``probe`` pour
+chaque cible vérifiée (ou non vérifiée car injoignable ou différée), puis
+``summary`` en fin de cycle. La sortie standard par défaut, ou un fichier
+ou une FIFO (``--output-file``): d'autres outils consomment ainsi les
+résultats en temps réel, sans interroger la base.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sys
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any, TextIO
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class OutputFormat(StrEnum):
+    """Format de la sortie standard."""
+
+    TEXT = "text"
+    JSONL = "jsonl"
+
+
+class JsonlWriter:
+    """Flux JSON Lines, vidé après chaque objet."""
+
+    def __init__(self, stream: TextIO, *, owned: bool = False) -> None:
+        """Écrit dans ``stream`` (fermé par ``close`` si ``owned``)."""
+        self.stream = stream
+        self.owned = owned
+        self.broken = False
+
+    @classmethod
+    async def open(cls, path: Path | None) -> JsonlWriter:
+        """Sortie standard, ou le fichier (ou la FIFO) ``path``."""
+        if path is None:
+            return cls(sys.stdout)
+        # L'ouverture d'une FIFO attend qu'un lecteur se présente
+        stream = await asyncio.to_thread(open, path, "w", encoding="utf-8")
+        return cls(stream, owned=True)
+
+    def write(self, event: str, **fields: Any) -> None:
+        """Écrit un objet ``{"event": event, ...}`` sur une ligne."""
+        if self.broken:
+            return
+        line = json.dumps({"event": event, **fields}, ensure_ascii=False)
+        try:
+            self.stream.write(f"{line}\n")
+            self.stream.flush()
+        except BrokenPipeError:
+            # Le lecteur est parti: la surveillance continue sans sortie
+            self.broken = True
+            logging.warning("Lecteur de la sortie JSON Lines parti, arrêt")
+
+    def close(self) -> None:
+        """Ferme le fichier ouvert par ``open``."""
+        if not self.owned:
+            return
+        try:
+            self.stream.close()
+        except BrokenPipeError:
+            pass
@@ -0,0 +1,201 @@
+"""Estimation de la durée d'un cycle (``ip-monitor plan``).
+
+Avant d'ajouter quelques centaines de cibles, vérifier que le cycle tient
+encore dans la période du timer, sans lancer aucune vérification. Chaque
+cible reçoit une durée estimée: la médiane de son historique de latence
+(table ``latency``), une valeur par défaut pour une cible sans historique,
+ou son délai si elle est connue comme down (pour un ping sans délai
+propre, au plus les 5 s de ``-w5``). Le cycle est ensuite simulé: les cibles, dans leur ordre
+de lancement, prennent la première place libre parmi ``concurrency``; une
+URL attend en plus une connexion libre parmi ``http_connector_limit``.
+
+Dépendances, confirmations et espacement des cibles down ne sont pas
+simulés: l'estimation est prudente pour les cibles down. L'historique se
+remplit à chaque cycle; tant qu'il manque, le rapport le signale.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .latency import LatencyHistory
+
+# Durée supposée (s) d'une vérification réussie, faute d'historique
+DEFAULT_SECONDS = {"IP": 0.05, "URL": 0.3, "TCP": 0.05}
+# Un ping sans délai propre à la cible abandonne au bout de -w5
+PING_WAIT = 5.0
+# Part de l'intervalle qu'un cycle recommandé peut occuper
+HEADROOM = 0.8
+
+
+@dataclass
+class PlannedProbe:
+    """Vérification d'une cible et sa durée estimée."""
+
+    addr_type: str
+    seconds: float
+    # Origine de l'estimation: history, default ou down
+    source: str
+
+
+def estimate(
+    addr_type: str,
+    address: str,
+    *,
+    history: LatencyHistory,
+    is_down: bool,
+    timeout: float,
+) -> PlannedProbe:
+    """Durée estimée de la vérification d'une cible.
+
+    ``timeout`` est le délai de la cible; pour un ping sans délai propre,
+    l'appelant le borne à ``PING_WAIT``.
+    """
+    if is_down:
+        return PlannedProbe(addr_type, timeout, "down")
+    median = history.percentile(addr_type, address, 50)
+    if median is None:
+        return PlannedProbe(
+            addr_type, min(DEFAULT_SECONDS[addr_type], timeout), "default"
+        )
+    return PlannedProbe(addr_type, median, "history")
+
+
+@dataclass
+class Schedule:
+    """Résultat de la simulation d'un cycle."""
+
+    concurrency: int
+    connector_limit: int | None
+    wall: float
+    peak_subprocesses: int
+    peak_sockets: int
+    # Pic de requêtes HTTP simultanées (connexions nécessaires)
+    peak_http: int
+
+
+def simulate(
+    probes: list[PlannedProbe],
+    concurrency: int,
+    connector_limit: int | None = None,
+) -> Schedule:
+    """Déroulé d'un cycle (``connector_limit`` None: connexions illimitées)."""
+    slots = [0.0] * min(concurrency, len(probes))
+    connections = (
+        None
+        if connector_limit is None
+        else [0.0] * min(connector_limit, len(probes))
+    )
+    # (instant, +1/-1, type); à instant égal, les fins passent d'abord
+    events: list[tuple[float, int, str]] = []
+    wall = 0.0
+    for probe in probes:
+        start = heapq.heappop(slots)
+        if probe.addr_type == "URL" and connections is not None:
+            start = max(start, heapq.heappop(connections))
+            heapq.heappush(connections, start + probe.seconds)
+        end = start + probe.seconds
+        heapq.heappush(slots, end)
+        events += [(start, 1, probe.addr_type), (end, -1, probe.addr_type)]
+        wall = max(wall, end)
+    running: Counter[str] = Counter()
+    peaks: Counter[str] = Counter()
+    sockets = peak_sockets = 0
+    for _, delta, addr_type in sorted(events):
+        running[addr_type] += delta
+        peaks[addr_type] = max(peaks[addr_type], running[addr_type])
+        if addr_type != "IP":
+            sockets += delta
+            peak_sockets = max(peak_sockets, sockets)
+    return Schedule(
+        concurrency,
+        connector_limit,
+        wall,
+        peaks["IP"],
+        peak_sockets,
+        peaks["URL"],
+    )
+
+
+def recommend(probes: list[PlannedProbe], budget: float) -> Schedule | None:
+    """Plus petite concurrence dont le cycle tient en ``budget`` secondes.
+
+    Connexions HTTP illimitées: le pic de requêtes du résultat donne la
+    valeur de ``http_connector_limit`` à prévoir. None si aucune ne
+    suffit (une vérification seule dépasse le budget).
+    """
+    low, high = 1, len(probes)
+    if simulate(probes, high).wall > budget:
+        return None
+    while low < high:
+        middle = (low + high) // 2
+        if simulate(probes, middle).wall <= budget:
+            high = middle
+        else:
+            low = middle + 1
+    return simulate(probes, low)
+
+
+def format_plan(
+    probes: list[PlannedProbe],
+    current: Schedule,
+    interval: float | None,
+    recommended: Schedule | None,
+) -> str:
+    """Rapport lisible de l'estimation."""
+    types = Counter(probe.addr_type for probe in probes)
+    sources = Counter(probe.source for probe in probes)
+    lines = [
+        f"Cibles: {len(probes)} (IP {types['IP']}, URL {types['URL']},"
+        f" TCP {types['TCP']}); estimations: {sources['history']}"
+        f" historique, {sources['default']} par défaut, {sources['down']}"
+        " down",
+        f"Actuel: {_describe(current)}",
+    ]
+    if interval is not None:
+        lines += _verdict(current, interval, recommended)
+    if sources["default"]:
+        lines.append(
+            f"Attention: {sources['default']} cible(s) sans historique de"
+            " latence (table latency), durée par défaut supposée; lancer"
+            " quelques cycles avant de se fier à l'estimation."
+        )
+    return "\n".join(lines)
+
+
+def _verdict(
+    current: Schedule, interval: float, recommended: Schedule | None
+) -> list[str]:
+    """Lignes du rapport comparant le cycle à l'intervalle."""
+    budget = interval * HEADROOM
+    verdict = "tient" if current.wall <= budget else "ne tient pas"
+    lines = [
+        f"Intervalle {interval:g} s ({HEADROOM:.0%} utilisables:"
+        f" {budget:g} s): le cycle {verdict}"
+    ]
+    if recommended is None:
+        lines.append(
+            "Aucune concurrence ne suffit: une vérification seule dépasse"
+            " le budget."
+        )
+    else:
+        lines.append(f"Recommandé: {_describe(recommended)}")
+    return lines
+
+
+def _describe(schedule: Schedule) -> str:
+    connector = (
+        schedule.peak_http
+        if schedule.connector_limit is None
+        else schedule.connector_limit
+    )
+    return (
+        f"concurrency {schedule.concurrency}, http_connector_limit"
+        f" {max(connector, 1)} -> cycle estimé {schedule.wall:.1f} s,"
+        f" pic {schedule.peak_subprocesses} ping(s),"
+        f" {schedule.peak_sockets} socket(s)"
+    )
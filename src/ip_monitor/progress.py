@@ -0,0 +1,101 @@
+"""Progression d'un cycle sur la sortie standard.
+
+Au lieu d'une ligne par cible (10 000 écritures non tamponnées et autant
+de lignes dans journald pour 10 000 cibles), des compteurs: cibles en
+file, en cours de vérification, terminées et down. Sur un terminal, une
+ligne d'état est redessinée à fréquence fixe; ailleurs (journald,
+fichier), un point d'étape est écrit périodiquement. Le détail par cible
+reste disponible au niveau DEBUG.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import sys
+from typing import TYPE_CHECKING, TextIO
+
+if TYPE_CHECKING:
+    from .runs import RunStats
+
+# Période de rafraîchissement (s) sur un terminal, et ailleurs
+TTY_REFRESH = 0.2
+LOG_REFRESH = 10.0
+
+# Retour en début de ligne et effacement de la fin de la ligne
+_CLEAR = "\r\x1b[K"
+
+
+class ProgressReporter:
+    """Compteurs de progression et leur affichage limité en débit."""
+
+    def __init__(
+        self,
+        stats: RunStats,
+        stream: TextIO | None = None,
+        refresh: float | None = None,
+    ) -> None:
+        """Affiche sur ``stream`` (sortie standard par défaut).
+
+        Les vérifications en cours sont lues dans ``stats``. ``refresh``
+        remplace la période par défaut (terminal ou non).
+        """
+        self.stats = stats
+        self.stream = sys.stdout if stream is None else stream
+        self.tty = self.stream.isatty()
+        if refresh is None:
+            refresh = TTY_REFRESH if self.tty else LOG_REFRESH
+        self.refresh = refresh
+        self.queued = 0
+        self.done = 0
+        self.down = 0
+        self._last = ""
+        self._task: asyncio.Task[None] | None = None
+
+    def add(self, count: int) -> None:
+        """Ajoute ``count`` cibles à vérifier."""
+        self.queued += count
+
+    def finished(self, *, is_down: bool) -> None:
+        """Compte une cible terminée."""
+        self.done += 1
+        self.down += is_down
+
+    def status(self) -> str:
+        """Ligne d'état courante."""
+        return (
+            f"Progression: {self.done}/{self.queued} terminée(s),"
+            f" {self.stats.in_flight} en cours, {self.down} down"
+        )
+
+    def render(self) -> None:
+        """Affiche l'état s'il a changé depuis le dernier affichage."""
+        line = self.status()
+        if line == self._last:
+            return
+        self._last = line
+        text = f"{_CLEAR}{line}" if self.tty else f"{line}\n"
+        with contextlib.suppress(BrokenPipeError):
+            self.stream.write(text)
+            self.stream.flush()
+
+    async def _refresh(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh)
+            self.render()
+
+    def start(self) -> None:
+        """Démarre l'affichage périodique."""
+        self._task = asyncio.create_task(self._refresh())
+
+    async def close(self) -> None:
+        """Arrête l'affichage; la ligne d'état est effacée du terminal."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.tty and self._last:
+            with contextlib.suppress(BrokenPipeError):
+                self.stream.write(_CLEAR)
+                self.stream.flush()
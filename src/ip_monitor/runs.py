@@ -0,0 +1,274 @@
+"""Bilan de chaque cycle, enregistré dans la table ``runs``.
+
+Une ligne par cycle: début, fin et durée, nombre de cibles, vérifications
+par type, délais dépassés, pings tués, notifications et leur latence,
+concurrence effective (pic de vérifications simultanées) et durée des
+étapes. ``ip-monitor runs --last N`` affiche les dernières lignes: de quoi
+suivre les tendances et repérer un cycle qui dépasse la période du timer
+sans fouiller le journal.
+
+Avec ``loop_monitor_interval``, la santé de la boucle d'événements (retard,
+rappels lents, pic de tâches) complète la ligne. Un cycle non lancé faute
+de connexion (pré-vérification échouée) a aussi sa ligne, sans
+vérification, marquée ``precheck_failed``.
+
+Pendant un cycle, ``RunStats`` est accessible depuis toutes ses tâches par
+``current_run()`` (variable de contexte), y compris depuis ``ping`` dont la
+signature ne change pas.
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from .state import ensure_column
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+    from .loop_health import LoopHealth
+
+CREATE_RUNS_TABLE = """CREATE TABLE IF NOT EXISTS runs (
+                        id INTEGER PRIMARY KEY,
+                        started_at REAL NOT NULL,
+                        ended_at REAL NOT NULL,
+                        duration REAL NOT NULL,
+                        targets INTEGER NOT NULL,
+                        probes_ip INTEGER NOT NULL,
+                        probes_url INTEGER NOT NULL,
+                        probes_tcp INTEGER NOT NULL,
+                        down INTEGER NOT NULL,
+                        up INTEGER NOT NULL,
+                        unknown INTEGER NOT NULL,
+                        timeouts INTEGER NOT NULL,
+                        killed INTEGER NOT NULL,
+                        notifications INTEGER NOT NULL,
+                        notify_latency REAL,
+                        concurrency INTEGER NOT NULL,
+                        local_outage INTEGER NOT NULL,
+                        stages TEXT NOT NULL,
+                        loop_lag_max REAL,
+                        loop_lag_mean REAL,
+                        slow_callbacks INTEGER,
+                        peak_tasks INTEGER,
+                        precheck_failed INTEGER NOT NULL DEFAULT 0
+                        )"""
+
+# Santé de la boucle d'événements (NULL: non mesurée)
+_LOOP_COLUMNS = {
+    "loop_lag_max": "REAL",
+    "loop_lag_mean": "REAL",
+    "slow_callbacks": "INTEGER",
+    "peak_tasks": "INTEGER",
+}
+# Colonnes ajoutées depuis la création de la table
+_ADDED_COLUMNS = {
+    **_LOOP_COLUMNS,
+    "precheck_failed": "INTEGER NOT NULL DEFAULT 0",
+}
+
+# Lignes conservées (plus d'un an de cycles de 5 minutes)
+RUNS_KEPT = 120_000
+
+_COLUMNS = (
+    "started_at",
+    "ended_at",
+    "duration",
+    "targets",
+    "probes_ip",
+    "probes_url",
+    "probes_tcp",
+    "down",
+    "up",
+    "unknown",
+    "timeouts",
+    "killed",
+    "notifications",
+    "notify_latency",
+    "concurrency",
+    "local_outage",
+    "stages",
+    *_ADDED_COLUMNS,
+)
+
+
+@dataclass
+class RunStats:
+    """Compteurs d'un cycle, alimentés par ses vérifications."""
+
+    probes: Counter[str] = field(default_factory=Counter)
+    timeouts: int = 0
+    # Pings tués (délai dépassé ou cycle interrompu)
+    killed: int = 0
+    in_flight: int = 0
+    peak_concurrency: int = 0
+    # Durée de la dernière vérification de chaque cible (type, adresse)
+    latencies: dict[tuple[str, str], float] = field(default_factory=dict)
+    # Santé de la boucle d'événements (None: non mesurée)
+    loop: LoopHealth | None = None
+
+    @contextmanager
+    def probing(self, target: tuple[str, str]) -> Iterator[None]:
+        """Compte et chronomètre une vérification de la cible."""
+        self.probes[target[0]] += 1
+        self.in_flight += 1
+        self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.latencies[target] = time.perf_counter() - start
+
+
+_current: ContextVar[RunStats | None] = ContextVar("run_stats", default=None)
+
+
+def current_run() -> RunStats:
+    """Compteurs du cycle en cours (jetables hors d'un cycle)."""
+    stats = _current.get()
+    return RunStats() if stats is None else stats
+
+
+@contextmanager
+def tracking(stats: RunStats) -> Iterator[RunStats]:
+    """Rend ``stats`` accessible à ``current_run()`` pendant le bloc.
+
+    Les tâches créées dans le bloc héritent du contexte.
+    """
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@dataclass
+class RunRecord:
+    """Ligne de la table runs."""
+
+    started_at: float
+    ended_at: float
+    targets: int
+    down: int
+    up: int
+    unknown: int
+    stats: RunStats
+    notify_latencies: list[float] = field(default_factory=list)
+    local_outage: bool = False
+    stages: dict[str, float] = field(default_factory=dict)
+    # Cycle non lancé: la pré-vérification série a échoué
+    precheck_failed: bool = False
+
+    def values(self) -> tuple[object, ...]:
+        """Valeurs dans l'ordre des colonnes."""
+        latency = (
+            round(statistics.fmean(self.notify_latencies), 3)
+            if self.notify_latencies
+            else None
+        )
+        return (
+            self.started_at,
+            self.ended_at,
+            round(self.ended_at - self.started_at, 3),
+            self.targets,
+            self.stats.probes["IP"],
+            self.stats.probes["URL"],
+            self.stats.probes["TCP"],
+            self.down,
+            self.up,
+            self.unknown,
+            self.stats.timeouts,
+            self.stats.killed,
+            len(self.notify_latencies),
+            latency,
+            self.stats.peak_concurrency,
+            int(self.local_outage),
+            json.dumps(self.stages),
+            *self._loop_values(),
+            int(self.precheck_failed),
+        )
+
+    def _loop_values(self) -> tuple[object, ...]:
+        loop = self.stats.loop
+        if loop is None:
+            return (None,) * len(_LOOP_COLUMNS)
+        return (
+            round(loop.lag_max, 4),
+            round(loop.lag_mean, 4),
+            loop.slow_callbacks,
+            loop.peak_tasks,
+        )
+
+
+async def init_runs(conn: aiosqlite.Connection) -> None:
+    """Crée la table runs, ou ajoute les colonnes manquantes."""
+    await conn.execute(CREATE_RUNS_TABLE)
+    for column, definition in _ADDED_COLUMNS.items():
+        await ensure_column(conn, "runs", column, definition)
+
+
+async def record_run(conn: aiosqlite.Connection, record: RunRecord) -> None:
+    """Ajoute le bilan d'un cycle et purge les plus anciens.
+
+    La transaction n'est pas validée.
+    """
+    placeholders = ", ".join("?" * len(_COLUMNS))
+    await conn.execute(
+        f"INSERT INTO runs({', '.join(_COLUMNS)}) VALUES ({placeholders})",  # nosec: B608 - safe parameterization
+        record.values(),
+    )
+    await conn.execute(
+        "DELETE FROM runs WHERE id <= (SELECT MAX(id) FROM runs) - ?",
+        (RUNS_KEPT,),
+    )
+
+
+async def recent_runs(
+    conn: aiosqlite.Connection, last: int
+) -> list[dict[str, object]]:
+    """Les ``last`` derniers cycles, du plus ancien au plus récent."""
+    rows = list(
+        await conn.execute_fetchall(
+            f"SELECT {', '.join(_COLUMNS)} FROM runs ORDER BY id DESC LIMIT ?",  # nosec: B608 - safe parameterization
+            (last,),
+        )
+    )
+    return [dict(zip(_COLUMNS, row, strict=True)) for row in reversed(rows)]
+
+
+def format_runs(runs: list[dict[str, object]]) -> str:
+    """Tableau lisible des cycles."""
+    header = (
+        f"{'Début':<19} {'Durée':>8} {'Cibles':>6} {'IP':>5} {'URL':>5}"
+        f" {'TCP':>5} {'Down':>5} {'Up':>4} {'Délais':>6} {'Tués':>4}"
+        f" {'Notif':>5} {'Lat.':>6} {'Conc.':>5} {'Retard':>7}"
+    )
+    lines = [header]
+    for run in runs:
+        started = datetime.fromtimestamp(float(run["started_at"]))  # type: ignore[arg-type]
+        latency = run["notify_latency"]
+        lag = run["loop_lag_max"]
+        lag_ms = None if lag is None else float(lag) * 1000  # type: ignore[arg-type]
+        lines.append(
+            f"{started:%Y-%m-%d %H:%M:%S} {run['duration']:>7.2f}s"
+            f" {run['targets']:>6} {run['probes_ip']:>5}"
+            f" {run['probes_url']:>5} {run['probes_tcp']:>5}"
+            f" {run['down']:>5} {run['up']:>4} {run['timeouts']:>6}"
+            f" {run['killed']:>4} {run['notifications']:>5}"
+            f" {'-' if latency is None else f'{latency:.2f}s':>6}"
+            f" {run['concurrency']:>5}"
+            f" {'-' if lag_ms is None else f'{lag_ms:.0f}ms':>7}"
+            + (" panne locale" if run["local_outage"] else "")
+            + (" pré-vérification échouée" if run["precheck_failed"] else "")
+        )
+    return "\n".join(lines)
@@ -0,0 +1,234 @@
+"""Mise en forme des notifications.
+
+Les transitions d'un micro-lot sont regroupées en un résumé par canal,
+découpé selon le budget du backend (octets pour ntfy, segments pour les
+SMS), puis soumis à un seau à jetons par canal. Les messages refusés par
+la limite de débit sont comptés et signalés plus tard par un message
+« N transition(s) non notifiée(s) ». L'état des seaux est conservé dans la
+table ``rate_limits`` pour que la limite s'applique d'un cycle à l'autre.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING
+
+from .config import NotifyMethod
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+    from .config import ChannelConfig
+
+CREATE_RATE_LIMITS_TABLE = """CREATE TABLE IF NOT EXISTS rate_limits (
+                               channel TEXT PRIMARY KEY,
+                               tokens REAL NOT NULL,
+                               updated_at REAL NOT NULL,
+                               suppressed INTEGER NOT NULL DEFAULT 0
+                               )"""
+
+# Alphabet GSM 03.38: un septet par caractère, deux pour l'extension
+_GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+_GSM7_EXTENDED = frozenset("^{}\\[~]|€\f")
+
+
+def sms_segments(text: str) -> int:
+    """Nombre de segments SMS nécessaires pour envoyer ``text``.
+
+    160 caractères en GSM 7 bits (153 par segment si le message est
+    concaténé), 70 en UCS-2 (67) dès qu'un caractère sort de l'alphabet GSM.
+    """
+    if all(c in _GSM7_BASIC or c in _GSM7_EXTENDED for c in text):
+        units = sum(2 if c in _GSM7_EXTENDED else 1 for c in text)
+        single, multi = 160, 153
+    else:
+        units = len(text.encode("utf-16-le")) // 2
+        single, multi = 70, 67
+    if units <= single:
+        return 1
+    return math.ceil(units / multi)
+
+
+def fits(channel: ChannelConfig, text: str) -> bool:
+    """Vérifie que ``text`` respecte le budget de taille du canal."""
+    if channel.method == NotifyMethod.SMSBOX:
+        return sms_segments(text) <= channel.max_sms_segments
+    return len(text.encode()) <= channel.max_message_bytes
+
+
+def chunk_items(
+    items: list[str],
+    render: Callable[[str], str],
+    fits_budget: Callable[[str], bool],
+) -> list[tuple[str, int]]:
+    """Découpe ``items`` en messages respectant le budget.
+
+    ``render`` reçoit la liste jointe et retourne le texte complet.
+    Retourne des couples (texte, nombre d'éléments). Un élément trop long
+    à lui seul forme un message dépassant le budget.
+    """
+    if not items:
+        return []
+    if fits_budget(render(", ".join(items))):
+        return [(render(", ".join(items)), len(items))]
+    # Réserve la place du suffixe « (i/n) » dans le pire cas
+    worst = f" ({len(items)}/{len(items)})"
+    groups: list[list[str]] = [[]]
+    for item in items:
+        candidate = [*groups[-1], item]
+        if groups[-1] and not fits_budget(render(", ".join(candidate)) + worst):
+            groups.append([item])
+        else:
+            groups[-1] = candidate
+    total = len(groups)
+    return [
+        (f"{render(', '.join(group))} ({i}/{total})", len(group))
+        for i, group in enumerate(groups, start=1)
+    ]
+
+
+@dataclass
+class TokenBucket:
+    """Seau à jetons: ``capacity`` messages d'avance, ``rate`` par seconde."""
+
+    capacity: float
+    rate: float
+    tokens: float
+    updated_at: float
+    # Transitions non notifiées depuis le dernier résumé
+    suppressed: int = 0
+
+    def take(self, now: float) -> bool:
+        """Consomme un jeton s'il y en a un (après remplissage)."""
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class NotificationShaper:
+    """Produit les messages (canal, texte) d'un micro-lot."""
+
+    def __init__(
+        self,
+        channels: list[ChannelConfig],
+        buckets: dict[str, TokenBucket] | None = None,
+    ) -> None:
+        """Prépare le shaper; ``buckets`` est l'état chargé de la base."""
+        self.channels = channels
+        self.buckets: dict[str, TokenBucket] = dict(buckets or {})
+
+    @classmethod
+    async def load(
+        cls,
+        conn: aiosqlite.Connection,
+        channels: list[ChannelConfig],
+        now: float,
+    ) -> NotificationShaper:
+        """Charge l'état des seaux des canaux limités."""
+        rows = await conn.execute_fetchall(
+            "SELECT channel, tokens, updated_at, suppressed FROM rate_limits"
+        )
+        saved = {r[0]: (r[1], r[2], r[3]) for r in rows}
+        buckets: dict[str, TokenBucket] = {}
+        for channel in channels:
+            if channel.rate_limit is None:
+                continue
+            capacity = float(channel.rate_burst)
+            tokens, updated_at, suppressed = saved.get(
+                channel.name, (capacity, now, 0)
+            )
+            buckets[channel.name] = TokenBucket(
+                capacity,
+                channel.rate_limit / 3600,
+                min(capacity, tokens),
+                updated_at,
+                suppressed,
+            )
+        return cls(channels, buckets)
+
+    async def save(self, conn: aiosqlite.Connection) -> None:
+        """Enregistre l'état des seaux (sans valider la transaction)."""
+        await conn.executemany(
+            """
+            INSERT INTO rate_limits(channel, tokens, updated_at, suppressed)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(channel) DO UPDATE
+              SET tokens = excluded.tokens,
+                  updated_at = excluded.updated_at,
+                  suppressed = excluded.suppressed
+            """,
+            [
+                (name, b.tokens, b.updated_at, b.suppressed)
+                for name, b in self.buckets.items()
+            ],
+        )
+
+    def shape(
+        self,
+        down: dict[str, list[str]],
+        up: dict[str, list[str]],
+        date: str,
+        now: float,
+    ) -> list[tuple[str, str]]:
+        """Messages à envoyer, par canal.
+
+        ``down`` et ``up`` associent à chaque nom de canal les descriptions
+        des cibles qui passent son filtre.
+        """
+        messages: list[tuple[str, str]] = []
+        for channel in self.channels:
+            budget = partial(fits, channel)
+            chunks = chunk_items(
+                down.get(channel.name, []),
+                lambda s: f"Erreur monitoring sur {s} le {date}",
+                budget,
+            ) + chunk_items(
+                up.get(channel.name, []),
+                lambda s: f"{s} de nouveau up depuis le {date}",
+                budget,
+            )
+            messages.extend(self._limit(channel.name, chunks, now))
+        return messages
+
+    def _limit(
+        self, name: str, chunks: list[tuple[str, int]], now: float
+    ) -> list[tuple[str, str]]:
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            return [(name, text) for text, _ in chunks]
+        allowed: list[tuple[str, str]] = []
+        suppressed = 0
+        for text, count in chunks:
+            if bucket.take(now):
+                allowed.append((name, text))
+            else:
+                suppressed += count
+        if suppressed:
+            bucket.suppressed += suppressed
+            logging.warning(
+                "Canal %s: limite de débit atteinte, %i transition(s) tue(s)",
+                name,
+                suppressed,
+            )
+        elif bucket.suppressed and bucket.take(now):
+            # Résumé des transitions tues, dès qu'un jeton le permet
+            allowed.append(
+                (
+                    name,
+                    f"{bucket.suppressed} autre(s) transition(s) non"
+                    " notifiée(s) (limite de débit du canal)",
+                )
+            )
+            bucket.suppressed = 0
+        return allowed
@@ -0,0 +1,202 @@
+"""État des cibles en mémoire.
+
+Le statut de chaque cible est chargé une seule fois au début du cycle,
+les transitions sont appliquées en mémoire puis écrites dans SQLite par
+micro-lots (voir ``StatusState.flush``). L'état porte aussi le calendrier
+des cibles durablement down, vérifiées de moins en moins souvent
+(voir ``BackoffPolicy``).
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+StatusKey = tuple[str, str]
+
+# Colonnes ajoutées à la table status pour le calendrier des cibles down
+SCHEDULE_COLUMNS = ("down_since", "backoff", "next_due")
+
+
+@dataclass
+class BackoffPolicy:
+    """Espacement des vérifications des cibles durablement down.
+
+    Une cible down depuis au moins ``after`` secondes n'est plus vérifiée
+    qu'après ``base`` secondes, intervalle doublé à chaque vérification
+    qui la trouve encore down, jusqu'à ``maximum``.
+    """
+
+    after: float
+    base: float
+    maximum: float
+
+    def next_interval(self, previous: float | None) -> float:
+        """Intervalle suivant, après ``previous`` (None: premier)."""
+        if previous is None:
+            return min(self.base, self.maximum)
+        return min(self.maximum, previous * 2)
+
+
+@dataclass
+class Schedule:
+    """Calendrier d'une cible down."""
+
+    down_since: float | None = None
+    backoff: float | None = None
+    next_due: float | None = None
+
+
+class StatusState:
+    """Copie en mémoire de la table status avec écritures différées."""
+
+    def __init__(
+        self,
+        rows: dict[StatusKey, bool] | None = None,
+        schedules: dict[StatusKey, Schedule] | None = None,
+    ) -> None:
+        """Initialise l'état à partir d'un dictionnaire (type, adresse) → down."""
+        self._down: dict[StatusKey, bool] = dict(rows or {})
+        self._schedules: dict[StatusKey, Schedule] = dict(schedules or {})
+        self._pending: set[StatusKey] = set()
+
+    @classmethod
+    async def load(cls, conn: aiosqlite.Connection) -> StatusState:
+        """Charge toute la table status en une seule requête."""
+        rows = await conn.execute_fetchall(
+            "SELECT type, address, down, down_since, backoff, next_due"
+            " FROM status"
+        )
+        state = cls(
+            {(r[0], r[1]): r[2] == 1 for r in rows},
+            {(r[0], r[1]): Schedule(r[3], r[4], r[5]) for r in rows},
+        )
+        logging.debug("État chargé : %i adresse(s)", len(state._down))
+        return state
+
+    def is_down(self, addr_type: str, address: str) -> bool:
+        """Retourne True si l'adresse est connue comme down."""
+        return self._down.get((addr_type, address), False)
+
+    def set_down(self, addr_type: str, address: str, is_down: bool) -> None:
+        """Applique une transition en mémoire; l'écriture est différée."""
+        self._down[(addr_type, address)] = is_down
+        self._pending.add((addr_type, address))
+
+    def is_due(self, addr_type: str, address: str, now: float) -> bool:
+        """Retourne False si la vérification d'une cible down est différée."""
+        key = (addr_type, address)
+        schedule = self._schedules.get(key)
+        if not self._down.get(key) or schedule is None:
+            return True
+        return schedule.next_due is None or schedule.next_due <= now
+
+    def reschedule(
+        self,
+        addr_type: str,
+        address: str,
+        now: float,
+        policy: BackoffPolicy,
+    ) -> None:
+        """Met à jour le calendrier d'une cible après sa vérification."""
+        key = (addr_type, address)
+        old = self._schedules.get(key, Schedule())
+        if not self._down.get(key):
+            new = Schedule()
+        elif old.down_since is None:
+            new = Schedule(down_since=now)
+        elif now - old.down_since < policy.after:
+            new = old
+        else:
+            backoff = policy.next_interval(old.backoff)
+            new = Schedule(old.down_since, backoff, now + backoff)
+        if new != old:
+            self._schedules[key] = new
+            self._pending.add(key)
+
+    def snapshot(self) -> StatusState:
+        """Retourne une copie de l'état, à rétablir avec ``restore``."""
+        copy = StatusState(self._down, self._schedules)
+        copy._pending = set(self._pending)
+        return copy
+
+    def restore(self, snapshot: StatusState) -> None:
+        """Rétablit l'état copié par ``snapshot`` (cycle abandonné)."""
+        self._down = dict(snapshot._down)
+        self._schedules = dict(snapshot._schedules)
+        self._pending = set(snapshot._pending)
+
+    @property
+    def pending(self) -> int:
+        """Nombre d'écritures en attente."""
+        return len(self._pending)
+
+    async def flush(self, conn: aiosqlite.Connection) -> int:
+        """Écrit les transitions en attente et valide la transaction.
+
+        Retourne le nombre de lignes écrites.
+        """
+        written = len(self._pending)
+        if self._pending:
+            await conn.executemany(
+                """
+                INSERT INTO status(type, address, down,
+                                   down_since, backoff, next_due)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(type, address) DO UPDATE
+                  SET down = excluded.down,
+                      down_since = excluded.down_since,
+                      backoff = excluded.backoff,
+                      next_due = excluded.next_due
+                """,
+                [self._row(key) for key in sorted(self._pending)],
+            )
+            self._pending.clear()
+        await conn.commit()
+        logging.debug("Micro-lot écrit en base : %i ligne(s)", written)
+        return written
+
+    def _row(
+        self, key: StatusKey
+    ) -> tuple[str, str, int, float | None, float | None, float | None]:
+        schedule = self._schedules.get(key, Schedule())
+        return (
+            key[0],
+            key[1],
+            int(self._down.get(key, False)),
+            schedule.down_since,
+            schedule.backoff,
+            schedule.next_due,
+        )
+
+
+async def increment_counter(
+    conn: aiosqlite.Connection, name: str, by: int = 1
+) -> None:
+    """Incrémente un compteur opérationnel persistant (table counters)."""
+    await conn.execute(
+        """
+        INSERT INTO counters(name, value, updated_at)
+        VALUES (?, ?, datetime('now'))
+        ON CONFLICT(name) DO UPDATE
+          SET value = value + excluded.value,
+              updated_at = excluded.updated_at
+        """,
+        (name, by),
+    )
+
+
+async def ensure_column(
+    conn: aiosqlite.Connection, table: str, column: str, definition: str
+) -> None:
+    """Ajoute une colonne à une table existante si elle manque (migration)."""
+    rows = await conn.execute_fetchall(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in rows}:
+        logging.info("Migration: ajout de la colonne %s.%s", table, column)
+        await conn.execute(
+            f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+        )
@@ -0,0 +1,84 @@
+"""Durée des étapes d'un cycle et profilage d'une exécution.
+
+``StageTimer`` cumule le temps passé dans chaque étape (chargement de la
+configuration, pré-vérification, base, vérifications, écritures,
+notifications). Les écritures et les envois ont lieu pendant les
+vérifications: leurs durées se recouvrent avec celle de ``probes``.
+``Profile`` enregistre un profil cProfile de toute l'exécution
+(``--profile``), à lire avec ``python -m pstats``.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def format_stages(stages: dict[str, float]) -> str:
+    """Durées lisibles: ``init_db 0.012 s, probes 1.204 s``."""
+    return ", ".join(f"{name} {sec:.3f} s" for name, sec in stages.items())
+
+
+@dataclass
+class StageTimer:
+    """Durées cumulées, en secondes, par étape (ordre de première mesure)."""
+
+    stages: dict[str, float] = field(default_factory=dict)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Ajoute une durée à une étape."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mesure le bloc, même interrompu par une exception."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def rounded(self) -> dict[str, float]:
+        """Durées arrondies à la milliseconde."""
+        return {name: round(sec, 3) for name, sec in self.stages.items()}
+
+    def log(self) -> None:
+        """Journalise les durées, aussi en JSON dans ``extra["stages"]``."""
+        stages = self.rounded()
+        logging.info(
+            "Durées des étapes : %s",
+            json.dumps(stages),
+            extra={"stages": stages},
+        )
+
+
+class Profile:
+    """Profil cProfile d'une exécution, écrit dans un fichier à l'arrêt."""
+
+    def __init__(self, path: Path) -> None:
+        """Prépare le profil (``start`` l'active)."""
+        self.path = path
+        self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        """Active le profilage."""
+        self._profiler.enable()
+
+    def stop(self) -> None:
+        """Arrête le profilage et écrit le fichier."""
+        self._profiler.disable()
+        try:
+            self._profiler.dump_stats(self.path)
+        except OSError:
+            logging.exception("Impossible d'écrire le profil %s", self.path)
+            return
+        logging.info("Profil écrit dans %s", self.path)
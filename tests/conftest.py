@@ -1,7 +1,11 @@
 # ruff: noqa: D100
 import sys
+from collections.abc import Callable
 from pathlib import Path
 from types import ModuleType
+from typing import Any
+
+import pytest
 
 # Ensure src layout is importable without installing the package
 ROOT = Path(__file__).resolve().parents[1]
@@ -74,3 +78,58 @@ def _install_dummy_smsbox() -> None:
 # Provide dummies for optional third-party modules used in notify
 _install_dummy_aiontfy()
 _install_dummy_smsbox()
+
+# Imported once the dummies are in place
+from ip_monitor.config import Config, NotifyMethod  # noqa: E402
+from ip_monitor.monitoring import RuntimeParams  # noqa: E402
+
+
+@pytest.fixture
+def make_config(tmp_path: Path) -> Callable[..., Config]:
+    """Build a Config on a temporary DB, notifying through ntfy by default.
+
+    Keyword arguments are Config fields and override the defaults.
+    """
+
+    def make(**fields: Any) -> Config:
+        defaults: dict[str, Any] = {
+            "db_path": tmp_path / "db.sqlite",
+            "notify_method": NotifyMethod.NTFY_SH,
+            "ntfy": {"server": "http://s", "topic": "t"},
+        }
+        return Config(**(defaults | fields))
+
+    return make
+
+
+@pytest.fixture
+def make_params() -> Callable[..., RuntimeParams]:
+    """Build quiet RuntimeParams with short timeouts.
+
+    Keyword arguments are RuntimeParams fields and override the defaults.
+    """
+
+    def make(**fields: Any) -> RuntimeParams:
+        defaults: dict[str, Any] = {
+            "http_timeout": 1.0,
+            "http_connector_limit": 5,
+            "concurrency": 5,
+            "ping_timeout": 1.0,
+            "quiet": True,
+        }
+        return RuntimeParams(**(defaults | fields))
+
+    return make
+
+
+@pytest.fixture
+def sent(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Record notifications instead of sending them; all are delivered."""
+    messages: list[str] = []
+
+    async def notify_channel(session, channel, message: str) -> bool:
+        messages.append(message)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", notify_channel)
+    return messages
@@ -0,0 +1,197 @@
+"""Per-target timeouts: explicit, or learned from the latency history."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from aiohttp import ClientSession, ClientTimeout, web
+from aiohttp.test_utils import TestServer
+
+from ip_monitor import latency
+from ip_monitor.config import Config, IpInfo, NotifyMethod, UrlInfo
+from ip_monitor.latency import LatencyHistory, learned_timeout
+from ip_monitor.monitoring import (
+    ProbeContext,
+    RuntimeParams,
+    _run_all_checks,
+    check_url_status,
+    init_db,
+    ping,
+)
+
+
+def test_learned_timeout_is_clamped() -> None:
+    """The learned timeout is factor times p99, clamped to the bounds."""
+    history = LatencyHistory(
+        {
+            ("IP", "lan"): [0.001] * latency.MIN_SAMPLES,
+            ("URL", "far"): [2.0] * latency.MIN_SAMPLES,
+            ("URL", "mid"): [0.5] * latency.MIN_SAMPLES,
+        }
+    )
+    assert learned_timeout(history, ("IP", "lan"), 3, 1.0, 15) == 1.0
+    assert learned_timeout(history, ("URL", "far"), 5, 1.0, 7) == 7  # noqa: PLR2004
+    assert learned_timeout(history, ("URL", "mid"), 3, 1.0, 7) == 1.5  # noqa: PLR2004
+    assert learned_timeout(history, ("IP", "new"), 3, 1.0, 15) == 15  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_ping_stops_at_first_reply(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ping waits for one reply (up to 5 s) instead of five echoes."""
+    argv: list[str] = []
+
+    class _Proc:
+        returncode = 0
+
+        async def communicate(self):
+            return (b"", b"")
+
+    async def fake_create(*args, **kwargs):
+        argv.extend(args)
+        return _Proc()
+
+    monkeypatch.setattr("asyncio.create_subprocess_exec", fake_create)
+    assert await ping("192.0.2.1")
+    assert "-c1" in argv and "-w5" in argv
+
+
+@pytest.mark.asyncio
+async def test_ping_deadline_follows_target_timeout(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A target timeout sets -w, rounded up, so ping is not cut at 5 s."""
+    argv: list[str] = []
+
+    class _Proc:
+        returncode = 0
+
+        async def communicate(self):
+            return (b"", b"")
+
+    async def fake_create(*args, **kwargs):
+        argv.extend(args)
+        return _Proc()
+
+    monkeypatch.setattr("asyncio.create_subprocess_exec", fake_create)
+    assert await ping("192.0.2.1", 12.5)
+    assert await ping("192.0.2.2", 0.2)
+    assert [arg for arg in argv if arg.startswith("-w")] == ["-w13", "-w1"]
+
+
+@pytest.mark.asyncio
+async def test_dead_lan_host_detected_quickly(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A fast target with history times out long before ping_timeout."""
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        if ip == "dead":
+            await asyncio.sleep(10)
+        return True
+
+    async def fake_notify(session, channel, message: str) -> bool:
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
+    cfg = Config(
+        db_path=tmp_path / "db.sqlite",
+        notify_method=NotifyMethod.NTFY_SH,
+        ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
+        ips=[
+            IpInfo(ip="dead", description="dead"),
+            IpInfo(ip="pinned", description="pinned", timeout=0.2),
+            IpInfo(ip="new", description="new"),
+        ],
+        adaptive_timeout_factor=3,
+        adaptive_timeout_min=0.1,
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        history = LatencyHistory()
+        for _ in range(latency.MIN_SAMPLES):
+            history.record("IP", "dead", 0.001)
+        await history.flush(conn)
+        await conn.commit()
+        start = time.monotonic()
+        summary = await _run_all_checks(
+            conn,
+            cfg,
+            RuntimeParams(
+                http_timeout=1.0,
+                http_connector_limit=1,
+                concurrency=5,
+                ping_timeout=5.0,
+                quiet=True,
+            ),
+        )
+        elapsed = time.monotonic() - start
+        rows = await conn.execute_fetchall(
+            "SELECT address, COUNT(*) FROM latency GROUP BY address"
+        )
+    finally:
+        await conn.close()
+    assert summary.down == ["dead"]
+    assert elapsed < 1.0
+    # Successful probes feed the history; failures do not
+    assert dict(rows) == {"dead": latency.MIN_SAMPLES, "new": 1, "pinned": 1}
+
+
+@pytest.mark.asyncio
+async def test_explicit_url_timeout(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A URL slower than its own timeout is down."""
+
+    async def check_url(session, url: str, max_wait=None) -> bool:
+        await asyncio.sleep(10)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.check_url", check_url)
+    conn = await init_db(tmp_path / "db.sqlite")
+    down: list[str] = []
+    try:
+        result = await check_url_status(
+            ProbeContext(conn, down),
+            None,  # type: ignore[arg-type]
+            UrlInfo(url="u", description="site", timeout=0.05),
+        )
+    finally:
+        await conn.close()
+    assert result.is_down
+    assert down == ["site"]
+
+
+@pytest.mark.asyncio
+async def test_url_timeout_longer_than_session_timeout(
+    tmp_path: Path,
+) -> None:
+    """A URL timeout above http_timeout is not capped by the session."""
+
+    async def slow(request: web.Request) -> web.Response:
+        await asyncio.sleep(0.3)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_route("*", "/", slow)
+    conn = await init_db(tmp_path / "db.sqlite")
+    try:
+        async with (
+            TestServer(app) as server,
+            ClientSession(timeout=ClientTimeout(total=0.1)) as session,
+        ):
+            result = await check_url_status(
+                ProbeContext(conn),
+                session,
+                UrlInfo(
+                    url=str(server.make_url("/")),
+                    description="lent",
+                    timeout=2.0,
+                ),
+            )
+    finally:
+        await conn.close()
+    assert not result.is_down
@@ -0,0 +1,111 @@
+"""Library API: ``ip_monitor.probe`` streams results without the CLI."""
+
+import asyncio
+import os
+from contextlib import aclosing
+from pathlib import Path
+
+import pytest
+
+import ip_monitor
+from ip_monitor import IpInfo, ProbeLimits, TcpInfo, UrlInfo, probe
+from ip_monitor.config import Config, NotifyMethod
+
+
+@pytest.mark.asyncio
+async def test_results_stream_as_they_complete(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Fast targets come first; nothing is printed or written to disk."""
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        await asyncio.sleep(0.05 if ip == "slow" else 0)
+        return ip != "dead"
+
+    async def fake_check_url(session, url: str, max_wait=None) -> bool:
+        assert session is not None
+        return True
+
+    server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+    monkeypatch.setattr("ip_monitor.monitoring.check_url", fake_check_url)
+    monkeypatch.chdir(tmp_path)
+    try:
+        results = [
+            result
+            async for result in probe(
+                [
+                    IpInfo("slow", "lent"),
+                    IpInfo("dead", "mort"),
+                    UrlInfo("https://example.org", "site"),
+                    TcpInfo(f"127.0.0.1:{port}", "service"),
+                ]
+            )
+        ]
+    finally:
+        server.close()
+        await server.wait_closed()
+    assert results[-1].address == "slow"
+    by_address = {result.address: result for result in results}
+    assert not by_address["dead"].is_up
+    assert by_address["https://example.org"].is_up
+    assert by_address[f"127.0.0.1:{port}"].addr_type == "TCP"
+    assert by_address[f"127.0.0.1:{port}"].is_up
+    assert by_address["slow"].seconds >= 0.05  # noqa: PLR2004
+    assert capsys.readouterr().out == ""
+    assert os.listdir(tmp_path) == []
+    assert ip_monitor.probe is probe
+
+
+@pytest.mark.asyncio
+async def test_timeouts_errors_and_early_exit(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Timeouts and errors are reported; leaving the loop cancels the rest."""
+    cancelled: list[str] = []
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        if ip == "broken":
+            raise FileNotFoundError("ping")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(ip)
+            raise
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+    limits = ProbeLimits(concurrency=2, ping_timeout=10.0)
+    targets = [
+        IpInfo("broken", "cassée"),
+        IpInfo("hung", "bloquée", timeout=0.05),
+        IpInfo("pending", "en attente"),
+    ]
+    results = []
+    async with aclosing(probe(targets, limits)) as stream:
+        async for result in stream:
+            results.append(result)
+            if len(results) == 2:  # noqa: PLR2004
+                break
+    assert isinstance(results[0].error, FileNotFoundError)
+    assert results[1].address == "hung"
+    assert results[1].timed_out and not results[1].is_up
+    assert cancelled == ["hung", "pending"]
+
+
+def test_limits_from_config(tmp_path: Path) -> None:
+    """Limits can be taken from a loaded configuration."""
+    config = Config(
+        db_path=tmp_path / "db.sqlite",
+        notify_method=NotifyMethod.NTFY_SH,
+        ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
+        ips=[IpInfo("192.0.2.1", "a")],
+        concurrency=7,
+        tcp_timeout=2.0,
+    )
+    assert ProbeLimits.from_config(config) == ProbeLimits(
+        concurrency=7, tcp_timeout=2.0
+    )
@@ -0,0 +1,170 @@
+"""Exponential backoff of targets that stay down for a long time."""
+
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from ip_monitor.config import Config, IpInfo
+from ip_monitor.monitoring import RuntimeParams, _run_all_checks, init_db
+from ip_monitor.state import BackoffPolicy, Schedule, StatusState
+
+POLICY = BackoffPolicy(after=60, base=300, maximum=1000)
+
+
+def test_reschedule_doubles_up_to_the_ceiling() -> None:
+    """Down targets are first tracked, then spaced out, then reset on recovery."""
+    state = StatusState({("IP", "a"): True})
+    state.reschedule("IP", "a", 0.0, POLICY)
+    assert state._schedules["IP", "a"] == Schedule(down_since=0.0)
+    # Not down for long enough yet
+    state.reschedule("IP", "a", 30.0, POLICY)
+    assert state.is_due("IP", "a", 31.0)
+
+    intervals = []
+    now = 60.0
+    for _ in range(4):
+        state.reschedule("IP", "a", now, POLICY)
+        schedule = state._schedules["IP", "a"]
+        assert schedule.next_due is not None and schedule.backoff is not None
+        assert not state.is_due("IP", "a", schedule.next_due - 1)
+        assert state.is_due("IP", "a", schedule.next_due)
+        intervals.append(schedule.backoff)
+        now = schedule.next_due
+    assert intervals == [300, 600, 1000, 1000]
+
+    state.set_down("IP", "a", False)
+    state.reschedule("IP", "a", now, POLICY)
+    assert state._schedules["IP", "a"] == Schedule()
+    # Up targets are always due, whatever a stale schedule says
+    stale = StatusState(
+        {("IP", "b"): False}, {("IP", "b"): Schedule(0, 1, 9e9)}
+    )
+    assert stale.is_due("IP", "b", 0.0)
+
+
+IPS = [
+    IpInfo(ip="192.0.2.1", description="mort"),
+    IpInfo(ip="192.0.2.2", description="vivant"),
+]
+
+
+async def _cycle(cfg: Config, params: RuntimeParams) -> tuple[list[str], list]:
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(conn, cfg, params)
+        rows = await conn.execute_fetchall(
+            "SELECT address, down, backoff, next_due FROM status"
+        )
+    finally:
+        await conn.close()
+    return summary.deferred, list(rows)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_long_down_target_is_skipped_until_due(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Once backed off, the dead target is not probed until next_due."""
+    probed: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        probed.append(ip)
+        return ip != "192.0.2.1"
+
+    clock = [1000.0]
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    monkeypatch.setattr("ip_monitor.monitoring.time.time", lambda: clock[0])
+    cfg = make_config(
+        ips=IPS,
+        down_backoff_after=60,
+        down_backoff_base=300,
+        down_backoff_max=3600,
+    )
+    params = make_params()
+
+    # First failure: tracked, no backoff yet
+    deferred, rows = await _cycle(cfg, params)
+    assert deferred == []
+    assert ("192.0.2.1", 1, None, None) in rows
+
+    # Down for long enough: probed once more, then backed off
+    clock[0] += 60
+    await _cycle(cfg, params)
+    probed.clear()
+    clock[0] += 100
+    deferred, rows = await _cycle(cfg, params)
+    assert probed == ["192.0.2.2"]
+    assert deferred == ["mort"]
+    assert ("192.0.2.1", 1, 300.0, 1360.0) in rows
+
+    # Due again: probed, interval doubled
+    clock[0] = 1360.0
+    probed.clear()
+    _, rows = await _cycle(cfg, params)
+    assert sorted(probed) == ["192.0.2.1", "192.0.2.2"]
+    assert ("192.0.2.1", 1, 600.0, 1960.0) in rows
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_backoff_disabled_probes_everything(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Without down_backoff_after, a stale schedule is ignored."""
+    probed: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        probed.append(ip)
+        return False
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(ips=IPS)
+    conn = await init_db(cfg.db_path)
+    await conn.execute(
+        "INSERT INTO status(type, address, down, next_due)"
+        " VALUES ('IP', '192.0.2.1', 1, ?)",
+        (time.time() + 3600,),
+    )
+    await conn.commit()
+    await conn.close()
+    deferred, _ = await _cycle(cfg, make_params())
+    assert deferred == []
+    assert sorted(probed) == ["192.0.2.1", "192.0.2.2"]
+
+
+def test_backoff_settings_are_validated(make_config) -> None:
+    """Backoff delays must be positive."""
+    for field in (
+        "down_backoff_after",
+        "down_backoff_base",
+        "down_backoff_max",
+    ):
+        with pytest.raises(ValidationError, match=field):
+            make_config(ips=IPS, **{field: 0})
+
+
+@pytest.mark.asyncio
+async def test_recovery_resets_the_schedule(
+    make_config, make_params, sent: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A backed-off target found up when due is notified and reset."""
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(ips=IPS, down_backoff_after=60)
+    conn = await init_db(cfg.db_path)
+    await conn.execute(
+        "INSERT INTO status(type, address, down, down_since, backoff,"
+        " next_due) VALUES ('IP', '192.0.2.1', 1, 0, 600, ?)",
+        (time.time() - 1,),
+    )
+    await conn.commit()
+    await conn.close()
+    deferred, rows = await _cycle(cfg, make_params())
+    assert deferred == []
+    assert rows == [("192.0.2.1", 0, None, None)]
+    assert len(sent) == 1 and "mort" in sent[0]
@@ -0,0 +1,239 @@
+"""Notification channels: filters, fan-out, per-channel timeout, migration."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import aiosqlite
+import pytest
+from pydantic import ValidationError
+
+from ip_monitor.config import (
+    ChannelConfig,
+    IpInfo,
+    NotifyMethod,
+    Severity,
+    load_config,
+)
+from ip_monitor.monitoring import (
+    CheckResult,
+    _batch_messages,
+    _run_all_checks,
+    init_db,
+)
+from ip_monitor.notify import notify_channel
+from ip_monitor.outbox import OutboxWorker, RetryPolicy, enqueue
+from ip_monitor.shaping import NotificationShaper
+
+NTFY = {"server": "http://s", "topic": "t"}
+SMS = {"api_key": "k", "recipient": "r"}
+# Both backends configured, no legacy notify_method
+BACKENDS = {
+    "notify_method": None,
+    "ntfy": NTFY,
+    "smsbox": SMS,
+    "ips": [IpInfo(ip="192.0.2.1", description="d")],
+}
+
+
+def _channels() -> list[ChannelConfig]:
+    return [
+        ChannelConfig(name="all", method=NotifyMethod.NTFY_SH, ntfy=NTFY),  # type: ignore[arg-type]
+        ChannelConfig(
+            name="sms",
+            method=NotifyMethod.SMSBOX,
+            smsbox=SMS,  # type: ignore[arg-type]
+            min_severity=Severity.CRITICAL,
+        ),
+        ChannelConfig(
+            name="db-team",
+            method=NotifyMethod.NTFY_SH,
+            ntfy=NTFY,  # type: ignore[arg-type]
+            tags=["db"],
+        ),
+    ]
+
+
+def test_config_validation(make_config) -> None:
+    """A channel is required, names are unique and backends are provided."""
+    with pytest.raises(ValidationError, match="channels"):
+        make_config(**BACKENDS)
+    with pytest.raises(ValidationError, match="unique"):
+        make_config(**BACKENDS, channels=_channels()[:1] * 2)
+    with pytest.raises(ValidationError, match="smsbox configuration"):
+        ChannelConfig(name="x", method=NotifyMethod.SMSBOX)
+    with pytest.raises(ValueError, match="'fatal'"):
+        IpInfo(ip="192.0.2.1", description="d", severity="fatal")  # type: ignore[arg-type]
+
+
+def test_legacy_notify_method_is_a_single_channel(make_config) -> None:
+    """Without channels, notify_method yields one unfiltered channel."""
+    cfg = make_config(**BACKENDS | {"notify_method": NotifyMethod.SMSBOX})
+    (channel,) = cfg.notification_channels()
+    assert (channel.name, channel.method) == ("smsbox", NotifyMethod.SMSBOX)
+    assert channel.smsbox is not None
+    assert channel.matches([], Severity.INFO)
+
+
+def test_batch_messages_follow_channel_filters(make_config) -> None:
+    """Each channel only receives the targets matching its filter."""
+    cfg = make_config(**BACKENDS, channels=_channels())
+    results = [
+        CheckResult("IP", "a", "web", True, True),
+        CheckResult("IP", "b", "db", True, True, ["db"], Severity.CRITICAL),
+        CheckResult("URL", "c", "api", False, True, ["db"]),
+    ]
+    by_channel: dict[str, list[str]] = {}
+    shaper = NotificationShaper(cfg.notification_channels())
+    for channel, text in _batch_messages(shaper, results, 0.0):
+        by_channel.setdefault(channel, []).append(text.split(" le ")[0])
+    assert by_channel == {
+        "all": ["Erreur monitoring sur web, db", "api de nouveau up depuis"],
+        "sms": ["Erreur monitoring sur db"],
+        "db-team": ["Erreur monitoring sur db", "api de nouveau up depuis"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_load_config_reads_tags_and_severity(tmp_path: Path) -> None:
+    """Target tags/severity and channels are read from YAML."""
+    path = tmp_path / "config.yaml"
+    path.write_text(
+        f"""
+db_path: {tmp_path}/db.sqlite
+channels:
+  - name: sms
+    method: smsbox
+    smsbox: {{api_key: k, recipient: r}}
+    min_severity: critical
+    timeout: 3
+ips:
+  - ip: 192.0.2.1
+    description: d
+    tags: [core]
+    severity: critical
+"""
+    )
+    cfg = await load_config(str(path))
+    assert cfg.ips[0].severity is Severity.CRITICAL
+    assert cfg.ips[0].tags == ["core"]
+    assert cfg.channels[0].timeout == 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_notify_channel_timeout(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Each channel is bounded by its own timeout."""
+    sent: list[str] = []
+
+    async def fast(session, cfg, message: str) -> bool:
+        sent.append(message)
+        return True
+
+    async def slow(session, cfg, message: str) -> bool:
+        await asyncio.sleep(10)
+        return True
+
+    monkeypatch.setattr("ip_monitor.notify.notify_ntfy", fast)
+    monkeypatch.setattr("ip_monitor.notify.notify_smsbox", slow)
+    channels = _channels()
+    channels[1].timeout = 0.05
+
+    assert await notify_channel(None, channels[0], "m")  # type: ignore[arg-type]
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        await notify_channel(None, channels[1], "m")  # type: ignore[arg-type]
+    assert time.monotonic() - start < 1.0
+    assert sent == ["m"]
+
+
+@pytest.mark.asyncio
+async def test_slow_channel_does_not_block_other_deliveries() -> None:
+    """Outbox rows are delivered independently, per channel."""
+    conn = await init_db(Path(":memory:"))
+    release = asyncio.Event()
+    delivered: list[tuple[str, str]] = []
+
+    async def send(channel: str, message: str) -> bool:
+        if channel == "sms":
+            await release.wait()
+        delivered.append((channel, message))
+        return True
+
+    try:
+        await enqueue(conn, [("sms", "a")])
+        await conn.commit()
+        worker = OutboxWorker(conn, send, asyncio.Lock(), RetryPolicy())
+        worker.start()
+        await asyncio.sleep(0.01)
+        await enqueue(conn, [("ntfy", "b")])
+        await conn.commit()
+        worker.wake()
+        for _ in range(100):
+            if delivered:
+                break
+            await asyncio.sleep(0.01)
+        assert delivered == [("ntfy", "b")]
+        release.set()
+        await worker.close(drain_timeout=1.0)
+        assert delivered == [("ntfy", "b"), ("sms", "a")]
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_run_routes_alerts_to_matching_channels(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A critical target is sent on every channel, others skip the SMS."""
+    sent: list[tuple[str, set[str]]] = []
+
+    async def fake_notify(session, channel, message: str) -> bool:
+        names = message.split(" le ")[0].removeprefix("Erreur monitoring sur ")
+        sent.append((channel.name, set(names.split(", "))))
+        return True
+
+    async def ping_down(_ip: str) -> bool:
+        return False
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping_down)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
+    cfg = make_config(**BACKENDS, channels=_channels()[:2])
+    cfg.ips = [
+        IpInfo(
+            ip="192.0.2.1", description="routeur", severity=Severity.CRITICAL
+        ),
+        IpInfo(ip="192.0.2.2", description="imprimante"),
+    ]
+    conn = await init_db(cfg.db_path)
+    try:
+        await _run_all_checks(
+            conn, cfg, make_params(http_connector_limit=1, concurrency=2)
+        )
+    finally:
+        await conn.close()
+    assert sorted(sent) == [
+        ("all", {"routeur", "imprimante"}),
+        ("sms", {"routeur"}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_outbox_table_is_migrated(tmp_path: Path) -> None:
+    """An outbox table without the channel column gets it on init."""
+    db_path = tmp_path / "db.sqlite"
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.execute(
+            "CREATE TABLE outbox (id INTEGER PRIMARY KEY, created_at REAL"
+            " NOT NULL, message TEXT NOT NULL, attempts INTEGER NOT NULL"
+            " DEFAULT 0, next_attempt_at REAL NOT NULL, delivered_at REAL,"
+            " latency REAL, last_error TEXT)"
+        )
+        await conn.commit()
+    conn = await init_db(db_path)
+    try:
+        rows = await conn.execute_fetchall("PRAGMA table_info(outbox)")
+        assert "channel" in {row[1] for row in rows}
+    finally:
+        await conn.close()
@@ -1,33 +1,39 @@
 """Tests that check_ip handles timeouts and exceptions robustly."""
 
 import asyncio
+import logging
 from pathlib import Path
 
 import pytest
 
 from ip_monitor.config import IpInfo
-from ip_monitor.monitoring import check_ip, init_db
+from ip_monitor.monitoring import ProbeContext, check_ip, init_db
 
 
 @pytest.mark.asyncio
 async def test_check_ip_handles_timeout(
-    monkeypatch: pytest.MonkeyPatch,
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
 ) -> None:
-    """Timeout ping and treat the target as down."""
+    """Timeout ping and treat the target as down, without a traceback."""
     conn = await init_db(Path(":memory:"))
     try:
         ipi = IpInfo(ip="192.0.2.200", description="timeout-ip")
         down: list[str] = []
         up: list[str] = []
 
-        async def slow(_: str) -> bool:
+        async def slow(_: str, deadline: float | None = None) -> bool:
             await asyncio.sleep(10)
             return True
 
         # wait_for should timeout and exception is caught, treated as down
         monkeypatch.setattr("ip_monitor.monitoring.ping", slow)
-        await check_ip(conn, ipi, down, up, ping_timeout=0.01)
+        with caplog.at_level(logging.INFO):
+            await check_ip(ProbeContext(conn, down, up), ipi, ping_timeout=0.01)
         assert down == ["timeout-ip"]
         assert up == []
+        (record,) = [r for r in caplog.records if "pas de réponse" in r.message]
+        assert record.levelno == logging.INFO
+        assert record.exc_info is None
+        assert not any(r.levelno >= logging.ERROR for r in caplog.records)
     finally:
         await conn.close()
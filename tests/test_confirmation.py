@@ -0,0 +1,163 @@
+"""Confirmation re-probes of state changes on a priority lane."""
+
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from ip_monitor.config import Config, IpInfo, UrlInfo
+from ip_monitor.monitoring import (
+    ProbeContext,
+    ProbeLanes,
+    RuntimeParams,
+    _run_all_checks,
+    check_url_status,
+    init_db,
+)
+from ip_monitor.state import StatusState
+
+
+def _ips(addresses: list[str]) -> list[IpInfo]:
+    return [IpInfo(ip=ip, description=ip) for ip in addresses]
+
+
+async def _run(cfg: Config, params: RuntimeParams) -> list[tuple]:
+    conn = await init_db(cfg.db_path)
+    try:
+        await _run_all_checks(conn, cfg, params)
+        return list(
+            await conn.execute_fetchall("SELECT address, down FROM status")
+        )
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_not_committed(
+    make_config, make_params, sent: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A single lost probe is re-checked and ignored."""
+    probes: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        probes.append(ip)
+        return len(probes) > 1
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(
+        ips=_ips(["192.0.2.1"]), confirm_attempts=2, confirm_interval=0
+    )
+    rows = await _run(cfg, make_params())
+    assert probes == ["192.0.2.1", "192.0.2.1"]
+    assert rows == []
+    assert sent == []
+
+
+@pytest.mark.asyncio
+async def test_confirmed_transition_is_committed(
+    make_config, make_params, sent: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A failure confirmed by every re-probe flips the target to down."""
+    probes: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        probes.append(ip)
+        return ip == "192.0.2.2"
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(
+        ips=_ips(["192.0.2.1", "192.0.2.2"]),
+        confirm_attempts=2,
+        confirm_interval=0,
+    )
+    rows = await _run(cfg, make_params())
+    # Stable target: a single probe; failing target: 1 + 2 probes
+    assert probes.count("192.0.2.2") == 1
+    assert probes.count("192.0.2.1") == 3  # noqa: PLR2004
+    assert rows == [("192.0.2.1", 1)]
+    assert len(sent) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_confirmations_bypass_the_normal_queue(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Re-probes run on the priority lane while slow probes hold the slots."""
+    events: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        events.append(ip)
+        if ip != "flap":
+            await asyncio.sleep(0.05)
+            return True
+        return False
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(
+        ips=_ips(["flap", "s1", "s2", "s3"]),
+        confirm_attempts=1,
+        confirm_interval=0,
+    )
+    await _run(cfg, make_params(concurrency=1))
+    # The confirmation of "flap" does not wait for s2/s3
+    assert events.index("flap", 1) < events.index("s2")
+
+
+@pytest.mark.asyncio
+async def test_url_confirmation(monkeypatch: pytest.MonkeyPatch) -> None:
+    """URL recoveries are confirmed the same way."""
+    answers = iter([True, False])
+
+    async def check_url(session, url: str, max_wait=None) -> bool:
+        return next(answers)
+
+    monkeypatch.setattr("ip_monitor.monitoring.check_url", check_url)
+    lanes = ProbeLanes(asyncio.Semaphore(1), asyncio.Semaphore(1), 1, 0.0)
+    state = StatusState({("URL", "u"): True})
+    down: list[str] = []
+    up: list[str] = []
+    result = await check_url_status(
+        ProbeContext(None, down, up, state, lanes),  # type: ignore[arg-type]
+        None,  # type: ignore[arg-type]
+        UrlInfo(url="u", description="site"),
+    )
+    assert result.is_down and not result.changed
+    assert (down, up) == ([], [])
+
+
+@pytest.mark.asyncio
+async def test_timed_out_confirmation_keeps_the_recorded_state(
+    make_config, make_params, sent: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A recovery whose re-probe times out is not committed."""
+    probes: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        probes.append(ip)
+        if len(probes) > 1:
+            await asyncio.sleep(10)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(
+        ips=_ips(["192.0.2.1"]), confirm_attempts=1, confirm_interval=0
+    )
+    conn = await init_db(cfg.db_path)
+    await conn.execute(
+        "INSERT INTO status(type, address, down) VALUES ('IP', '192.0.2.1', 1)"
+    )
+    await conn.commit()
+    await conn.close()
+    rows = await _run(cfg, make_params(ping_timeout=0.05))
+    assert probes == ["192.0.2.1", "192.0.2.1"]
+    assert rows == [("192.0.2.1", 1)]
+    assert sent == []
+
+
+def test_confirmation_settings_are_validated(make_config) -> None:
+    """Negative attempts and an empty priority lane are rejected."""
+    with pytest.raises(ValidationError, match="confirm_attempts"):
+        make_config(ips=_ips(["a"]), confirm_attempts=-1)
+    with pytest.raises(ValidationError, match="confirm_concurrency"):
+        make_config(ips=_ips(["a"]), confirm_concurrency=0)
@@ -0,0 +1,205 @@
+"""Global cycle deadline: cancellation, partial results and summary."""
+
+import argparse
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from ip_monitor import monitoring
+from ip_monitor.config import IpInfo
+from ip_monitor.monitoring import (
+    _resolve_cycle_deadline,
+    _run_all_checks,
+    check_status,
+    init_db,
+    ping,
+    update_status,
+)
+
+IPS = [
+    IpInfo(ip="192.0.2.1", description="fast"),
+    IpInfo(ip="192.0.2.2", description="slow"),
+]
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_outstanding_probes(
+    make_config,
+    make_params,
+    sent: list[str],
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Completed results are notified; skipped targets keep their state."""
+    cancelled: list[str] = []
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        if ip == "192.0.2.2":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(ip)
+                raise
+            return True
+        return False
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+
+    cfg = make_config(ips=IPS)
+    conn = await init_db(cfg.db_path)
+    try:
+        # "slow" is known as down: an unknown result must not change it
+        await update_status(conn, "IP", "192.0.2.2", 1)
+        await conn.commit()
+
+        summary = await _run_all_checks(
+            conn,
+            cfg,
+            make_params(
+                ping_timeout=30.0,
+                notify_batch_window=60.0,
+                cycle_deadline=0.1,
+                quiet=False,
+            ),
+        )
+        assert summary.down == ["fast"]
+        assert summary.unknown == ["slow"]
+        assert cancelled == ["192.0.2.2"]
+        assert await check_status(conn, "IP", "192.0.2.2")
+    finally:
+        await conn.close()
+
+    assert len(sent) == 1 and "fast" in sent[0]
+    out = capsys.readouterr().out
+    assert "1 down, 0 up, 1 ignorée(s)" in out
+
+
+@pytest.mark.asyncio
+async def test_ping_kills_subprocess_on_cancel(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Cancelling ping() kills and reaps the child process."""
+    events: list[str] = []
+
+    class _Proc:
+        returncode: int | None = None
+
+        async def communicate(self):
+            await asyncio.sleep(10)
+
+        def kill(self) -> None:
+            events.append("kill")
+            self.returncode = -9
+
+        async def wait(self) -> int:
+            events.append("wait")
+            return -9
+
+    async def fake_create(*args, **kwargs):
+        return _Proc()
+
+    monkeypatch.setattr("asyncio.create_subprocess_exec", fake_create)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(ping("192.0.2.1"), timeout=0.05)
+    assert events == ["kill", "wait"]
+
+
+def test_resolve_cycle_deadline_priority(
+    make_config, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """CLI > ENV > YAML, None when nothing is set."""
+    monkeypatch.delenv("IPM_CYCLE_DEADLINE", raising=False)
+    assert (
+        _resolve_cycle_deadline(argparse.Namespace(), make_config(ips=IPS))
+        is None
+    )
+
+    cfg = make_config(ips=IPS, cycle_deadline=240.0)
+    assert _resolve_cycle_deadline(argparse.Namespace(), cfg) == 240.0  # noqa: PLR2004
+
+    monkeypatch.setenv("IPM_CYCLE_DEADLINE", "120")
+    assert _resolve_cycle_deadline(argparse.Namespace(), cfg) == 120.0  # noqa: PLR2004
+
+    args = argparse.Namespace(cycle_deadline=60.0)
+    assert _resolve_cycle_deadline(args, cfg) == 60.0  # noqa: PLR2004
+
+
+def test_invalid_cycle_deadline(
+    make_config,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """A bad IPM_CYCLE_DEADLINE falls back to YAML; YAML must be positive."""
+    cfg = make_config(ips=IPS, cycle_deadline=240.0)
+    monkeypatch.setenv("IPM_CYCLE_DEADLINE", "soon")
+    assert _resolve_cycle_deadline(argparse.Namespace(), cfg) == 240.0  # noqa: PLR2004
+    assert "IPM_CYCLE_DEADLINE" in caplog.text
+    with pytest.raises(ValidationError, match="cycle_deadline"):
+        make_config(ips=IPS, cycle_deadline=0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_crashed_probe_does_not_stop_the_cycle(
+    make_config,
+    make_params,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """A check raising before the deadline is logged; the others count."""
+
+    async def check_ip(context, ip: IpInfo, *args, **kwargs):
+        if ip.description == "slow":
+            raise RuntimeError("boom")
+        return await real_check_ip(context, ip, *args, **kwargs)
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        return False
+
+    real_check_ip = monitoring.check_ip
+    monkeypatch.setattr("ip_monitor.monitoring.check_ip", check_ip)
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+    cfg = make_config(ips=IPS)
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(
+            conn, cfg, make_params(cycle_deadline=5.0)
+        )
+    finally:
+        await conn.close()
+    assert summary.down == ["fast"]
+    assert summary.unknown == []
+    assert "Tâche en erreur" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_result_finished_during_flush_at_deadline_is_notified(
+    make_config, make_params, sent: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A probe ending while a batch is written is kept, not reported unknown."""
+    real_enqueue = monitoring.enqueue
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        if ip == "192.0.2.2":
+            await asyncio.sleep(0.1)
+        return False
+
+    async def slow_enqueue(conn, messages) -> None:
+        await asyncio.sleep(0.3)
+        await real_enqueue(conn, messages)
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+    monkeypatch.setattr("ip_monitor.monitoring.enqueue", slow_enqueue)
+    cfg = make_config(ips=IPS, flush_batch_size=1)
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(
+            conn, cfg, make_params(cycle_deadline=0.2, notify_batch_window=0.0)
+        )
+        assert await check_status(conn, "IP", "192.0.2.2")
+    finally:
+        await conn.close()
+    assert sorted(summary.down) == ["fast", "slow"]
+    assert summary.unknown == []
+    assert any("slow" in message for message in sent)
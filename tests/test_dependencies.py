@@ -0,0 +1,213 @@
+"""Dependency-aware probing: parents first, children skipped when down."""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from pydantic import ValidationError
+
+from ip_monitor.config import IpInfo, UrlInfo
+from ip_monitor.monitoring import _run_all_checks, init_db
+
+CHAIN = [
+    IpInfo(ip="192.0.2.1", description="a"),
+    IpInfo(ip="192.0.2.2", description="b", depends_on=["192.0.2.1"]),
+    IpInfo(ip="192.0.2.3", description="c", depends_on=["192.0.2.2"]),
+]
+
+
+def test_depends_on_validation(make_config) -> None:
+    """Unknown parents and cycles are rejected; a scalar is a single parent."""
+    assert IpInfo(ip="b", description="B", depends_on="a").depends_on == ["a"]  # type: ignore[arg-type]
+    with pytest.raises(ValidationError, match="unknown target"):
+        make_config(ips=[IpInfo(ip="b", description="B", depends_on=["a"])])
+    with pytest.raises(ValidationError, match="a -> c -> b -> a"):
+        make_config(
+            ips=[
+                IpInfo(ip="a", description="A", depends_on=["c"]),
+                IpInfo(ip="b", description="B", depends_on=["a"]),
+                IpInfo(ip="c", description="C", depends_on=["b"]),
+            ],
+        )
+    with pytest.raises(ValidationError, match="a -> a"):
+        make_config(ips=[IpInfo(ip="a", description="A", depends_on=["a"])])
+    # An IP and a URL may share an address without clashing
+    make_config(
+        ips=[IpInfo(ip="a", description="A", depends_on=["b"])],
+        urls=[UrlInfo(url="a", description="U"), UrlInfo("b", "B")],
+    )
+    # A URL may depend on an IP (diamond, no cycle)
+    make_config(
+        ips=[
+            IpInfo(ip="a", description="A"),
+            IpInfo(ip="b", description="B", depends_on=["a"]),
+        ],
+        urls=[UrlInfo(url="u", description="U", depends_on=["a", "b"])],
+    )
+
+
+@pytest.mark.asyncio
+async def test_children_of_down_parent_are_not_probed(
+    make_config,
+    make_params,
+    sent: list[str],
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Only the root cause is probed and notified; descendants are skipped."""
+    probed: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        probed.append(ip)
+        return ip != "192.0.2.1"
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(
+        ips=[
+            # Children listed first: they still wait for their parent
+            IpInfo(ip="192.0.2.3", description="nas", depends_on=["192.0.2.2"]),
+            IpInfo(
+                ip="192.0.2.2", description="switch", depends_on=["192.0.2.1"]
+            ),
+            IpInfo(ip="192.0.2.1", description="routeur"),
+            IpInfo(ip="192.0.2.9", description="autre"),
+        ],
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(
+            conn, cfg, make_params(concurrency=1, quiet=False)
+        )
+        rows = await conn.execute_fetchall("SELECT address, down FROM status")
+    finally:
+        await conn.close()
+
+    assert sorted(probed) == ["192.0.2.1", "192.0.2.9"]
+    assert summary.down == ["routeur"]
+    assert sorted(summary.unreachable) == ["nas", "switch"]
+    assert len(sent) == 1 and "routeur" in sent[0] and "nas" not in sent[0]
+    assert set(rows) == {("192.0.2.1", 1)}
+    assert "2 injoignable(s) (parent down)" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_children_are_probed_when_parent_is_up_or_fails(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A healthy or crashed parent does not block its children."""
+    probed: list[str] = []
+
+    async def check_ip(context, ip: IpInfo, *args, **kwargs):
+        if ip.ip == "192.0.2.1":
+            raise RuntimeError("boom")
+        await asyncio.sleep(0)
+        probed.append(ip.ip)
+
+    monkeypatch.setattr("ip_monitor.monitoring.check_ip", check_ip)
+    cfg = make_config(ips=CHAIN)
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(conn, cfg, make_params(concurrency=1))
+    finally:
+        await conn.close()
+    assert probed == ["192.0.2.2", "192.0.2.3"]
+    assert summary.unreachable == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_parent_timing_out_is_down(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A parent whose ping times out is down: its descendants are skipped."""
+    probed: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        probed.append(ip)
+        await asyncio.sleep(10)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(ips=CHAIN)
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(
+            conn, cfg, make_params(ping_timeout=0.05)
+        )
+    finally:
+        await conn.close()
+    assert probed == ["192.0.2.1"]
+    assert summary.down == ["a"]
+    assert sorted(summary.unreachable) == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_deferred_parent_keeps_children_unreachable(
+    make_config,
+    make_params,
+    sent: list[str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A parent skipped by backoff is still down for its children."""
+    probed: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        probed.append(ip)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(ips=CHAIN, down_backoff_after=60)
+    conn = await init_db(cfg.db_path)
+    try:
+        await conn.execute(
+            "INSERT INTO status(type, address, down, next_due)"
+            " VALUES ('IP', '192.0.2.1', 1, 9e9)"
+        )
+        await conn.commit()
+        summary = await _run_all_checks(conn, cfg, make_params())
+    finally:
+        await conn.close()
+    assert probed == []
+    assert summary.deferred == ["a"]
+    assert sorted(summary.unreachable) == ["b", "c"]
+    assert sent == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_parents_are_keyed_by_type_and_address(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """An IP and a URL sharing an address are both parents of a child."""
+
+    async def ok(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        # The IP target named like the URL is down, the child answers
+        return ip != shared
+
+    app = web.Application()
+    app.router.add_get("/", ok)
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    async with TestServer(app) as server:
+        shared = str(server.make_url("/"))
+        cfg = make_config(
+            ips=[
+                IpInfo(ip=shared, description="hôte"),
+                IpInfo(ip="192.0.2.9", description="enfant", depends_on=shared),  # type: ignore[arg-type]
+            ],
+            urls=[UrlInfo(url=shared, description="site")],
+        )
+        conn = await init_db(cfg.db_path)
+        try:
+            summary = await _run_all_checks(conn, cfg, make_params())
+            rows = await conn.execute_fetchall(
+                "SELECT type, down FROM status ORDER BY type"
+            )
+        finally:
+            await conn.close()
+    assert summary.down == ["hôte"]
+    assert summary.unreachable == ["enfant"]
+    assert list(rows) == [("IP", 1)]
@@ -42,7 +42,7 @@ precheck_enabled: false
 
     monkeypatch.setattr("ip_monitor.monitoring.check_ip", noop)
     monkeypatch.setattr("ip_monitor.monitoring.check_url_status", noop)
-    monkeypatch.setattr("ip_monitor.monitoring.notify", noop)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", noop)
     monkeypatch.setattr("sys.argv", ["ip-monitor", "-c", str(cfg)])
 
     await main()
@@ -39,7 +39,7 @@ ips:
     monkeypatch.setenv("IPM_PRECHECK_TIMEOUT", "0.123")
 
     # Fake ping (returns False) so main exits after precheck
-    async def fake_ping(_: str) -> bool:
+    async def fake_ping(_: str, deadline: float | None = None) -> bool:
         return False
 
     monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
@@ -0,0 +1,156 @@
+"""Latency history and hedged HTTP requests."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from ip_monitor import latency
+from ip_monitor.config import Config, NotifyMethod, UrlInfo
+from ip_monitor.latency import HedgeBudget, LatencyHistory, hedged
+from ip_monitor.monitoring import RuntimeParams, _run_all_checks, init_db
+
+
+def test_percentile_needs_enough_samples() -> None:
+    """Nearest-rank percentile, None below MIN_SAMPLES measurements."""
+    history = LatencyHistory({("URL", "u"): [0.1, 0.2, 0.3, 0.4]})
+    assert history.percentile("URL", "u", 95) is None
+    history.record("URL", "u", 1.0)
+    assert history.percentile("URL", "u", 95) == 1.0
+    assert history.percentile("URL", "u", 50) == 0.3  # noqa: PLR2004
+    assert history.percentile("URL", "other", 50) is None
+
+
+@pytest.mark.asyncio
+async def test_history_is_persisted_and_pruned(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Only the last HISTORY_SIZE samples of a target are kept."""
+    monkeypatch.setattr(latency, "HISTORY_SIZE", 3)
+    conn = await init_db(Path(":memory:"))
+    try:
+        history = await LatencyHistory.load(conn)
+        for seconds in (1.0, 2.0, 3.0, 4.0):
+            history.record("URL", "u", seconds)
+        history.record("IP", "i", 5.0)
+        await history.flush(conn)
+        await history.flush(conn)  # nothing pending: no-op
+        rows = await conn.execute_fetchall(
+            "SELECT type, address, seconds FROM latency ORDER BY id"
+        )
+        reloaded = await LatencyHistory.load(conn)
+    finally:
+        await conn.close()
+    assert list(rows) == [
+        ("URL", "u", 2.0),
+        ("URL", "u", 3.0),
+        ("URL", "u", 4.0),
+        ("IP", "i", 5.0),
+    ]
+    assert list(reloaded._samples["URL", "u"]) == [2.0, 3.0, 4.0]
+
+
+def test_budget_is_a_ratio_of_targets() -> None:
+    """Any non-zero ratio allows at least one hedge."""
+    assert HedgeBudget.for_targets(5, 0.1).remaining == 1
+    assert HedgeBudget.for_targets(100, 0.1).remaining == 10  # noqa: PLR2004
+    assert HedgeBudget.for_targets(0, 0.1).remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_first_answer_wins() -> None:
+    """A slow primary is raced by a secondary; the loser is cancelled."""
+    calls: list[str] = []
+    cancelled = asyncio.Event()
+
+    async def slow() -> bool:
+        calls.append("slow")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return False
+
+    async def fast() -> bool:
+        calls.append("fast")
+        return True
+
+    budget = HedgeBudget(1)
+    start = time.monotonic()
+    assert await hedged(slow, fast, 0.01, budget)
+    assert time.monotonic() - start < 1.0
+    assert cancelled.is_set()
+    assert budget.remaining == 0
+
+    # A quick primary never triggers the hedge
+    calls.clear()
+    assert await hedged(fast, slow, 1.0, HedgeBudget(1))
+    assert calls == ["fast"]
+
+
+@pytest.mark.asyncio
+async def test_hedged_without_budget_waits_for_primary() -> None:
+    """Once the budget is spent, the primary answer is awaited."""
+
+    async def primary() -> bool:
+        await asyncio.sleep(0.05)
+        return True
+
+    async def secondary() -> bool:
+        raise AssertionError("no budget left")
+
+    assert await hedged(primary, secondary, 0.01, HedgeBudget(0))
+
+
+@pytest.mark.asyncio
+async def test_cycle_hedges_slow_urls_within_budget(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Only hedge_max_ratio of the URLs get a second request per cycle."""
+    fresh: list[str] = []
+
+    async def check_url(session, url: str, max_wait=None) -> bool:
+        if session.connector.force_close:
+            fresh.append(url)
+            return True
+        await asyncio.sleep(0.3)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.check_url", check_url)
+    cfg = Config(
+        db_path=tmp_path / "db.sqlite",
+        notify_method=NotifyMethod.NTFY_SH,
+        ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
+        urls=[UrlInfo(url=u, description=u) for u in ("u1", "u2")],
+        hedge_percentile=95,
+        hedge_max_ratio=0.5,
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        history = LatencyHistory()
+        for url in ("u1", "u2"):
+            for _ in range(latency.MIN_SAMPLES):
+                history.record("URL", url, 0.01)
+        await history.flush(conn)
+        await conn.commit()
+        await _run_all_checks(
+            conn,
+            cfg,
+            RuntimeParams(
+                http_timeout=1.0,
+                http_connector_limit=5,
+                concurrency=5,
+                ping_timeout=1.0,
+                quiet=True,
+            ),
+        )
+        (count,) = next(
+            iter(await conn.execute_fetchall("SELECT COUNT(*) FROM latency"))
+        )
+    finally:
+        await conn.close()
+    assert len(fresh) == 1
+    # One new sample per URL
+    assert count == 2 * latency.MIN_SAMPLES + 2
@@ -0,0 +1,164 @@
+"""JSON Lines streaming output (``--output jsonl``)."""
+
+import asyncio
+import io
+import json
+import logging
+import os
+from pathlib import Path
+
+import pytest
+
+from ip_monitor import monitoring
+from ip_monitor.output import JsonlWriter
+
+
+async def _fake_ping(ip: str, deadline: float | None = None) -> bool:
+    return ip == "192.0.2.1"
+
+
+async def _fake_notify(session, channel, message: str) -> bool:
+    return True
+
+
+def _write_config(tmp_path: Path) -> Path:
+    cfg_path = tmp_path / "conf.yaml"
+    cfg_path.write_text(
+        f"""
+db_path: {tmp_path}/db.sqlite
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.1
+    description: routeur
+  - ip: 192.0.2.2
+    description: serveur
+  - ip: 192.0.2.3
+    description: derrière le serveur
+    depends_on: [192.0.2.2]
+precheck_enabled: false
+"""
+    )
+    return cfg_path
+
+
+@pytest.mark.asyncio
+async def test_stdout_stream(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """One object per probe, then the summary; nothing else on stdout."""
+    monkeypatch.setattr("ip_monitor.monitoring.ping", _fake_ping)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", _fake_notify)
+    monkeypatch.setattr(
+        "sys.argv",
+        ["ip-monitor", "-c", str(_write_config(tmp_path)), "--output", "jsonl"],
+    )
+    await monitoring.main()
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    *probes, summary = events
+    by_address = {event["address"]: event for event in probes}
+    assert {event["event"] for event in probes} == {"probe"}
+    assert by_address["192.0.2.1"]["outcome"] == "up"
+    assert by_address["192.0.2.1"]["latency"] is not None
+    assert by_address["192.0.2.2"]["outcome"] == "down"
+    assert by_address["192.0.2.2"]["transition"] == "down"
+    assert by_address["192.0.2.3"]["outcome"] == "unreachable"
+    assert by_address["192.0.2.3"]["latency"] is None
+    assert by_address["192.0.2.3"]["transition"] is None
+    assert by_address["192.0.2.3"]["description"] == "derrière le serveur"
+    assert summary["event"] == "summary"
+    assert summary["status"] == "ok"
+    assert summary["down"] == ["serveur"]
+    assert summary["unreachable"] == ["derrière le serveur"]
+    assert summary["probes"] == {"IP": 2}
+    assert summary["targets"] == 3  # noqa: PLR2004
+    assert "probes" in summary["stages"]
+
+
+@pytest.mark.asyncio
+async def test_precheck_failure_summary(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """A failed precheck yields a single summary; the message goes to logs."""
+
+    async def offline(ip: str) -> bool:
+        return False
+
+    cfg_path = _write_config(tmp_path)
+    cfg_path.write_text(
+        cfg_path.read_text().replace("precheck_enabled: false", "")
+    )
+    monkeypatch.setattr("ip_monitor.monitoring.ping", offline)
+    monkeypatch.setattr(
+        "sys.argv", ["ip-monitor", "-c", str(cfg_path), "--output", "jsonl"]
+    )
+    with caplog.at_level(logging.WARNING):
+        await monitoring.main()
+    (summary,) = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert summary["event"] == "summary"
+    assert summary["status"] == "precheck_failed"
+    assert summary["targets"] == 3  # noqa: PLR2004
+    assert summary["down"] == summary["up"] == []
+    assert "precheck" in summary["stages"]
+    assert "Pas de connexion à Internet" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_fifo_stream(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """--output-file streams to a FIFO; progress messages stay on stdout."""
+    monkeypatch.setattr("ip_monitor.monitoring.ping", _fake_ping)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", _fake_notify)
+    fifo = tmp_path / "results.fifo"
+    os.mkfifo(fifo)
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "ip-monitor",
+            "-c",
+            str(_write_config(tmp_path)),
+            "--output-file",
+            str(fifo),
+        ],
+    )
+
+    def read_fifo() -> list[str]:
+        with fifo.open(encoding="utf-8") as stream:
+            return stream.readlines()
+
+    reader = asyncio.create_task(asyncio.to_thread(read_fifo))
+    await monitoring.main()
+    lines = await reader
+    assert [json.loads(line)["event"] for line in lines] == [
+        *(["probe"] * 3),
+        "summary",
+    ]
+    assert "Terminé: 1 down, 0 up, 1 injoignable" in capsys.readouterr().out
+
+
+def test_reader_gone(caplog: pytest.LogCaptureFixture) -> None:
+    """A closed pipe disables the output with a single warning."""
+
+    class ClosedPipe(io.StringIO):
+        def write(self, s: str) -> int:
+            raise BrokenPipeError
+
+    writer = JsonlWriter(ClosedPipe(), owned=True)
+    with caplog.at_level(logging.WARNING):
+        writer.write("probe", address="a")
+        writer.write("probe", address="b")
+    writer.close()
+    assert writer.broken
+    assert caplog.text.count("sortie JSON Lines") == 1
@@ -0,0 +1,252 @@
+"""Inline connectivity check: concurrent anchors and local-outage discard."""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from aiohttp import ClientError
+
+from ip_monitor import monitoring
+from ip_monitor.config import IpInfo, PrecheckMode
+from ip_monitor.monitoring import (
+    _probe_anchors,
+    _resolve_precheck_mode,
+    _run_all_checks,
+    init_db,
+    update_status,
+)
+
+
+class _Response:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+class _Session:
+    def __init__(self, ok: bool) -> None:
+        self.ok = ok
+
+    def head(self, *a, **k):
+        if not self.ok:
+            raise ClientError("no route")
+        return _Response()
+
+
+def _ips(n: int = 3) -> list[IpInfo]:
+    return [IpInfo(ip=f"192.0.2.{i}", description=f"h{i}") for i in range(n)]
+
+
+def test_resolve_precheck_mode(
+    make_config, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """CLI > ENV > YAML; invalid ENV values are ignored."""
+    cfg = make_config(ips=_ips(), precheck_mode=PrecheckMode.INLINE)
+    monkeypatch.setenv("IPM_PRECHECK_MODE", "serial")
+    cli = argparse.Namespace(precheck_mode="inline")
+    assert _resolve_precheck_mode(cli, cfg) == PrecheckMode.INLINE
+    assert _resolve_precheck_mode(argparse.Namespace(), cfg) == "serial"
+    monkeypatch.setenv("IPM_PRECHECK_MODE", "bogus")
+    assert _resolve_precheck_mode(argparse.Namespace(), cfg) == "inline"
+
+
+@pytest.mark.asyncio
+async def test_probe_anchors_races_icmp_and_http(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The first anchor to answer wins; all failing (or too slow) is False."""
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        if ip == "slow":
+            await asyncio.sleep(10)
+        return ip == "ok"
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    up, down = _Session(ok=True), _Session(ok=False)
+
+    start = time.monotonic()
+    assert await _probe_anchors(down, ["slow", "ok"], 5)  # type: ignore[arg-type]
+    assert await _probe_anchors(up, ["slow", "https://a"], 5)  # type: ignore[arg-type]
+    assert time.monotonic() - start < 1.0
+    assert not await _probe_anchors(down, ["ko", "https://a"], 5)  # type: ignore[arg-type]
+    assert not await _probe_anchors(down, ["slow"], 0.05)  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+async def test_failed_anchors_discard_the_cycle(
+    make_config,
+    make_params,
+    sent: list[str],
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """No status is written and nothing is notified when anchors fail."""
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        return False
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(ips=_ips())
+    conn = await init_db(cfg.db_path)
+    try:
+        params = make_params(
+            precheck_anchors=["1.1.1.1"], precheck_timeout=1.0, quiet=False
+        )
+        summary = await _run_all_checks(conn, cfg, params)
+        status = await conn.execute_fetchall("SELECT * FROM status")
+        counters = await conn.execute_fetchall(
+            "SELECT name, value FROM counters WHERE name NOT GLOB 'metrics_*'"
+        )
+    finally:
+        await conn.close()
+    assert summary.local_outage
+    assert list(status) == []
+    assert list(counters) == [("local_outage", 1)]
+    assert sent == []
+    assert "Panne locale détectée" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_discarded_cycle_is_recorded_as_local_outage(
+    tmp_path: Path,
+    make_config,
+    make_params,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Results of a discarded cycle reach neither runs nor the metrics."""
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        # Anchor unreachable, but the known-down target answers
+        return ip != "1.1.1.1"
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    textfile = tmp_path / "ip_monitor.prom"
+    cfg = make_config(ips=_ips(1), metrics_textfile=textfile)
+    conn = await init_db(cfg.db_path)
+    try:
+        await update_status(conn, "IP", "192.0.2.0", 1)
+        await conn.commit()
+        params = make_params(precheck_anchors=["1.1.1.1"], precheck_timeout=1.0)
+        summary = await _run_all_checks(conn, cfg, params)
+        runs = await conn.execute_fetchall(
+            "SELECT down, up, local_outage FROM runs"
+        )
+    finally:
+        await conn.close()
+    assert (summary.down, summary.up) == ([], [])
+    assert list(runs) == [(0, 0, 1)]
+    assert 'address="192.0.2.0",description="h0"} 0' in textfile.read_text()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_writes_wait_for_anchor_confirmation(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Transitions are committed once an anchor answers."""
+    anchor_done = asyncio.Event()
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        if ip == "1.1.1.1":
+            await asyncio.sleep(0.05)
+            anchor_done.set()
+            return True
+        return False
+
+    flushed_after_anchor: list[bool] = []
+    real_flush = monitoring.StatusState.flush
+
+    async def flush(self, conn) -> int:
+        flushed_after_anchor.append(anchor_done.is_set())
+        return await real_flush(self, conn)
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    monkeypatch.setattr(monitoring.StatusState, "flush", flush)
+    cfg = make_config(ips=_ips(1))
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(
+            conn,
+            cfg,
+            make_params(
+                precheck_anchors=["1.1.1.1"],
+                precheck_timeout=1.0,
+                notify_batch_window=0.0,
+            ),
+        )
+        status = await conn.execute_fetchall("SELECT address, down FROM status")
+    finally:
+        await conn.close()
+    assert not summary.local_outage
+    assert flushed_after_anchor and all(flushed_after_anchor)
+    assert list(status) == [("192.0.2.0", 1)]
+
+
+@pytest.mark.parametrize(
+    ("down", "discarded"), [({0, 1, 2}, True), ({0}, False)]
+)
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_failure_ratio(
+    make_config,
+    make_params,
+    monkeypatch: pytest.MonkeyPatch,
+    down: set[int],
+    discarded: bool,
+) -> None:
+    """The cycle is discarded when the down ratio reaches the threshold."""
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        return int(ip.rsplit(".", 1)[1]) not in down
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(ips=_ips(), local_outage_ratio=0.9)
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(conn, cfg, make_params())
+        status = await conn.execute_fetchall("SELECT COUNT(*) FROM status")
+    finally:
+        await conn.close()
+    assert summary.local_outage is discarded
+    assert next(iter(status))[0] == (0 if discarded else len(down))
+
+
+@pytest.mark.asyncio
+async def test_main_inline_mode_skips_serial_precheck(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """With precheck_mode: inline, main() never runs the serial ping."""
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"""
+db_path: {tmp_path}/db.sqlite
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.1
+    description: d
+precheck_mode: inline
+precheck_anchors: [192.0.2.254]
+"""
+    )
+    anchors: list[str] = []
+
+    async def boom(*a, **k):
+        raise AssertionError("serial precheck must not run")
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        anchors.append(ip)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring._precheck_internet", boom)
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    monkeypatch.setattr("sys.argv", ["ip-monitor", "-c", str(cfg), "--quiet"])
+    await monitoring.main()
+    assert sorted(anchors) == ["192.0.2.1", "192.0.2.254"]
@@ -0,0 +1,95 @@
+"""Event-loop health: lag sampling, slow callbacks and saturation warning."""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+import aiosqlite
+import pytest
+
+from ip_monitor.config import Config, IpInfo, NotifyMethod
+from ip_monitor.loop_health import LoopMonitor
+from ip_monitor.monitoring import RuntimeParams, _run_all_checks, init_db
+from ip_monitor.runs import format_runs, recent_runs
+
+
+@pytest.mark.asyncio
+async def test_blocking_callback_is_detected() -> None:
+    """A callback blocking the loop shows up as lag and a slow callback."""
+    monitor = LoopMonitor(0.01)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    time.sleep(0.15)  # noqa: ASYNC251 - blocks the loop on purpose
+    await asyncio.sleep(0.03)
+    health = await monitor.stop()
+    assert health.lag_max >= 0.1  # noqa: PLR2004
+    assert health.slow_callbacks == 1
+    assert health.samples > 2  # noqa: PLR2004
+    assert 0 < health.lag_mean < health.lag_max
+    assert health.peak_tasks >= 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_saturated_cycle_is_reported(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Loop figures reach the runs table and the summary, with a warning."""
+
+    async def blocking_ping(ip: str, deadline: float | None = None) -> bool:
+        await asyncio.sleep(0.02)
+        time.sleep(0.15)  # noqa: ASYNC251 - a saturated loop
+        return True
+
+    async def fake_notify(session, channel, message: str) -> bool:
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", blocking_ping)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
+    cfg = Config(
+        db_path=tmp_path / "db.sqlite",
+        notify_method=NotifyMethod.NTFY_SH,
+        ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
+        ips=[IpInfo(ip="192.0.2.1", description="a")],
+        loop_monitor_interval=0.01,
+    )
+    params = RuntimeParams(
+        http_timeout=1.0,
+        http_connector_limit=1,
+        concurrency=5,
+        ping_timeout=1.0,
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        with caplog.at_level(logging.WARNING):
+            summary = await _run_all_checks(conn, cfg, params)
+        runs = await recent_runs(conn, 1)
+    finally:
+        await conn.close()
+    assert summary.loop is not None
+    assert summary.loop.slow_callbacks >= 1
+    assert "Boucle d'événements saturée" in caplog.text
+    assert "Boucle: retard max" in capsys.readouterr().out
+    assert runs[0]["loop_lag_max"] >= 0.1  # noqa: PLR2004
+    assert runs[0]["slow_callbacks"] >= 1
+    assert format_runs(runs).splitlines()[1].endswith("ms")
+
+
+@pytest.mark.asyncio
+async def test_runs_table_gains_loop_columns(tmp_path: Path) -> None:
+    """A runs table created before the loop columns is migrated."""
+    db_path = tmp_path / "db.sqlite"
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.execute(
+            "CREATE TABLE runs (id INTEGER PRIMARY KEY, started_at REAL)"
+        )
+        await conn.commit()
+    conn = await init_db(db_path)
+    try:
+        rows = await conn.execute_fetchall("PRAGMA table_info(runs)")
+    finally:
+        await conn.close()
+    assert {"loop_lag_max", "peak_tasks"} <= {row[1] for row in rows}
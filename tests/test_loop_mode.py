@@ -0,0 +1,136 @@
+"""Resident --loop mode: one HTTP session reused across cycles."""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from pydantic import ValidationError
+
+from ip_monitor import monitoring
+from ip_monitor.config import UrlInfo
+from ip_monitor.http_pool import HttpClient
+from ip_monitor.monitoring import (
+    LoopResources,
+    _http_options,
+    _resolve_loop_interval,
+    _run_all_checks,
+    init_db,
+)
+
+
+def _urls(*urls: str) -> list[UrlInfo]:
+    return [UrlInfo(url=u, description=u) for u in urls]
+
+
+def test_resolve_loop_interval(
+    make_config, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """CLI > ENV > YAML; a bad ENV value falls back; none means one cycle."""
+    cfg = make_config(urls=_urls("u"), loop_interval=60)
+    assert _resolve_loop_interval(argparse.Namespace(), cfg) == 60  # noqa: PLR2004
+    monkeypatch.setenv("IPM_LOOP_INTERVAL", "30")
+    assert _resolve_loop_interval(argparse.Namespace(), cfg) == 30  # noqa: PLR2004
+    cli = argparse.Namespace(loop_interval=10.0)
+    assert _resolve_loop_interval(cli, cfg) == 10  # noqa: PLR2004
+    monkeypatch.setenv("IPM_LOOP_INTERVAL", "often")
+    assert _resolve_loop_interval(argparse.Namespace(), cfg) == 60  # noqa: PLR2004
+    monkeypatch.delenv("IPM_LOOP_INTERVAL")
+    assert (
+        _resolve_loop_interval(
+            argparse.Namespace(), make_config(urls=_urls("u"))
+        )
+        is None
+    )
+
+
+def test_keepalive_outlives_the_interval(make_config, make_params) -> None:
+    """In loop mode idle connections are kept for two intervals by default."""
+    cfg = make_config(urls=_urls("u"), http_limit_per_host=2)
+    options = _http_options(cfg, make_params(), loop_interval=60)
+    assert options.keepalive_timeout == 120  # noqa: PLR2004
+    assert options.limit_per_host == 2  # noqa: PLR2004
+    assert _http_options(cfg, make_params()).keepalive_timeout is None
+    pinned = make_config(urls=_urls("u"), http_keepalive_timeout=30)
+    assert _http_options(pinned, make_params(), 60).keepalive_timeout == 30  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_shared_session_avoids_handshakes(
+    make_config, make_params
+) -> None:
+    """The second cycle reuses the connection opened by the first one."""
+
+    async def ok(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", ok)
+    async with TestServer(app) as server:
+        cfg = make_config(urls=_urls(str(server.make_url("/"))))
+        params = make_params(http_timeout=5.0)
+        client = HttpClient.open(_http_options(cfg, params, 60))
+        conn = await init_db(cfg.db_path)
+        try:
+            resources = LoopResources(client)
+            first = await _run_all_checks(conn, cfg, params, None, resources)
+            second = await _run_all_checks(conn, cfg, params, None, resources)
+        finally:
+            await conn.close()
+            await client.close()
+    assert (first.http_created, first.http_reused) == (1, 0)
+    assert (second.http_created, second.http_reused) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_main_loop_reuses_client_and_survives_errors(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Cycles run until cancelled, all with the same client; errors are logged."""
+    cfg_path = tmp_path / "conf.yaml"
+    cfg_path.write_text(
+        f"""
+db_path: {tmp_path}/db.sqlite
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+urls:
+  - url: example.org
+    description: d
+"""
+    )
+    clients: list[object] = []
+    three = asyncio.Event()
+
+    async def fake_run(conn, config, params, timer=None, resources=None):
+        clients.append(resources.http)
+        if len(clients) == 1:
+            raise RuntimeError("boom")
+        if len(clients) == 3:  # noqa: PLR2004
+            three.set()
+
+    async def precheck(*args, **kwargs) -> bool:
+        return True
+
+    monkeypatch.setattr(monitoring, "_run_all_checks", fake_run)
+    monkeypatch.setattr(monitoring, "_precheck_internet", precheck)
+    monkeypatch.setattr(
+        "sys.argv",
+        ["ip-monitor", "-c", str(cfg_path), "--quiet", "--loop", "0.01"],
+    )
+    task = asyncio.create_task(monitoring.main())
+    await asyncio.wait_for(three.wait(), 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert clients[0] is not None
+    assert all(c is clients[0] for c in clients)
+
+
+def test_loop_interval_must_be_positive(make_config) -> None:
+    """A zero or negative loop_interval is rejected at load time."""
+    with pytest.raises(ValidationError, match="loop_interval"):
+        make_config(urls=_urls("u"), loop_interval=0)
@@ -36,7 +36,7 @@ ips:
     monkeypatch.setattr(sys, "argv", ["ip-monitor", "-c", str(cfg_path)])
 
     # Force pre-check ping("1.1.1.1") to fail
-    async def fake_ping(ip: str) -> bool:
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
         return False
 
     monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
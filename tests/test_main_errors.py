@@ -76,3 +76,26 @@ ips:
     await main()
     out = capsys.readouterr().out
     assert "Pas de connexion à Internet." in out
+
+
+@pytest.mark.asyncio
+async def test_main_lock_unopenable(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Exit with code 1 and print the path when the lock cannot be opened."""
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"db_path: {tmp_path}/db.sqlite\nnotify_method: ntfy\nntfy:\n  server: http://s\n  topic: t\nips:\n  - ip: 192.0.2.1\n    description: d\n"
+    )
+    lock_path = tmp_path / "missing" / "db.sqlite.lock"
+    monkeypatch.setattr(
+        "ip_monitor.monitoring.lock_path_for", lambda db_path: lock_path
+    )
+    monkeypatch.setattr(sys, "argv", ["ip-monitor", "-c", str(cfg)])
+
+    with pytest.raises(SystemExit) as exc:
+        await main()
+    assert exc.value.code == 1
+    assert str(lock_path) in capsys.readouterr().err
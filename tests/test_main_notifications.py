@@ -32,15 +32,16 @@ precheck_enabled: false
     # Capture notifications
     messages: list[str] = []
 
-    async def fake_notify(session, config, message: str):
+    async def fake_notify(session, channel, message: str) -> bool:
         messages.append(message)
+        return True
 
     # Force ping failure to mark IP as down
-    async def ping_fail(_ip: str) -> bool:
+    async def ping_fail(_ip: str, deadline: float | None = None) -> bool:
         return False
 
     monkeypatch.setattr("ip_monitor.monitoring.ping", ping_fail)
-    monkeypatch.setattr("ip_monitor.monitoring.notify", fake_notify)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
     monkeypatch.setattr(sys, "argv", ["ip-monitor", "-c", str(cfg_path)])
 
     await main()
@@ -82,15 +83,16 @@ precheck_enabled: false
     # Capture notifications
     messages: list[str] = []
 
-    async def fake_notify(session, config, message: str):
+    async def fake_notify(session, channel, message: str) -> bool:
         messages.append(message)
+        return True
 
     # Force ping success so the IP transitions from down to up
-    async def ping_ok(_ip: str) -> bool:
+    async def ping_ok(_ip: str, deadline: float | None = None) -> bool:
         return True
 
     monkeypatch.setattr("ip_monitor.monitoring.ping", ping_ok)
-    monkeypatch.setattr("ip_monitor.monitoring.notify", fake_notify)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
     monkeypatch.setattr(sys, "argv", ["ip-monitor", "-c", str(cfg_path)])
 
     await main()
@@ -38,10 +38,10 @@ precheck_enabled: false
     monkeypatch.setattr("ip_monitor.monitoring.check_url_status", boom)
 
     # Avoid notifications
-    async def noop_notify(session, config, message):
-        return None
+    async def noop_notify(session, channel, message):
+        return True
 
-    monkeypatch.setattr("ip_monitor.notify.notify", noop_notify)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", noop_notify)
 
     await main()
     out = capsys.readouterr().out
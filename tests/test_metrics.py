@@ -0,0 +1,226 @@
+"""Prometheus metrics: textfile output and the /metrics endpoint."""
+
+import argparse
+import asyncio
+import logging
+import socket
+from pathlib import Path
+
+import aiohttp
+import pytest
+from pydantic import ValidationError
+
+from ip_monitor import monitoring
+from ip_monitor.config import IpInfo
+from ip_monitor.metrics import CONTENT_TYPE, Metrics, TargetState
+from ip_monitor.monitoring import (
+    _resolve_metrics_listen,
+    _run_all_checks,
+    init_db,
+)
+from ip_monitor.runs import RunRecord, RunStats
+
+IPS = [
+    IpInfo(ip="192.0.2.1", description="up"),
+    IpInfo(ip="192.0.2.2", description="dead"),
+]
+
+
+async def _fake_ping(ip: str, deadline: float | None = None) -> bool:
+    return ip != "192.0.2.2"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_render_accumulates_counters() -> None:
+    """Counters add up across cycles, values are not rounded."""
+    metrics = Metrics()
+    assert metrics.text == ""
+    stats = RunStats()
+    stats.probes["IP"] = 2
+    stats.timeouts = 1
+    stats.peak_concurrency = 2
+    stats.latencies["IP", "a"] = 0.1234567
+    target = TargetState("IP", "a", 'say "hi"\\', is_down=False)
+    metrics.update(
+        [target],
+        RunRecord(10.0, 12.0, 1, 0, 0, 0, stats, stages={"probes": 1.5}),
+    )
+    end = 1760000000.123456
+    metrics.update([target], RunRecord(end - 1, end, 1, 0, 0, 0, stats))
+    lines = metrics.text.splitlines()
+    labels = '{type="IP",address="a",description="say \\"hi\\"\\\\"}'
+    assert f"ip_monitor_target_up{labels} 1" in lines
+    assert f"ip_monitor_target_probe_seconds{labels} 0.1234567" in lines
+    assert "ip_monitor_cycles_total 2" in lines
+    assert 'ip_monitor_probes_total{type="IP"} 4' in lines
+    assert 'ip_monitor_probes_total{type="TCP"} 0' in lines
+    assert "ip_monitor_probe_timeouts_total 2" in lines
+    assert "ip_monitor_cycle_duration_seconds 1" in lines
+    assert f"ip_monitor_cycle_end_timestamp_seconds {end!r}" in lines
+    assert "# TYPE ip_monitor_probes_total counter" in lines
+    # The last cycle had no stage timings
+    assert "ip_monitor_cycle_stage_seconds" not in metrics.text
+
+
+def test_metrics_listen_resolution(
+    make_config,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """CLI > ENV > YAML; invalid addresses are rejected or ignored."""
+    cfg = make_config(ips=IPS, metrics_listen="0.0.0.0:9101")
+    assert _resolve_metrics_listen(argparse.Namespace(), cfg) == "0.0.0.0:9101"
+    monkeypatch.setenv("IPM_METRICS_LISTEN", "nope")
+    with caplog.at_level(logging.WARNING):
+        assert (
+            _resolve_metrics_listen(argparse.Namespace(), cfg) == "0.0.0.0:9101"
+        )
+    assert "IPM_METRICS_LISTEN invalide" in caplog.text
+    monkeypatch.setenv("IPM_METRICS_LISTEN", "[::1]:9102")
+    assert _resolve_metrics_listen(argparse.Namespace(), cfg) == "[::1]:9102"
+    cli = argparse.Namespace(metrics_listen="127.0.0.1:9103")
+    assert _resolve_metrics_listen(cli, cfg) == "127.0.0.1:9103"
+    with pytest.raises(ValidationError):
+        make_config(ips=IPS, metrics_listen="9101")
+    with pytest.raises(SystemExit):
+        monitoring.parser.parse_args(["--metrics-listen", "9101"])
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_textfile_written_atomically(
+    tmp_path: Path,
+    make_config,
+    make_params,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Each oneshot cycle replaces the textfile; totals survive the runs."""
+    monkeypatch.setattr("ip_monitor.monitoring.ping", _fake_ping)
+    textfile = tmp_path / "ip_monitor.prom"
+    textfile.write_text("stale\n")
+    params = make_params(http_connector_limit=1)
+    cfg = make_config(ips=IPS, metrics_textfile=textfile)
+    conn = await init_db(cfg.db_path)
+    try:
+        for _ in range(3):
+            await _run_all_checks(conn, cfg, params)
+        broken = make_config(
+            ips=IPS, metrics_textfile=tmp_path / "no" / "x.prom"
+        )
+        with caplog.at_level(logging.ERROR):
+            await _run_all_checks(conn, broken, params)
+    finally:
+        await conn.close()
+    text = textfile.read_text()
+    assert (
+        'ip_monitor_target_up{type="IP",address="192.0.2.1",description="up"} 1'
+        in text
+    )
+    assert (
+        'ip_monitor_target_up{type="IP",address="192.0.2.2",description="dead"} 0'
+        in text
+    )
+    assert "ip_monitor_cycles_total 3" in text
+    assert 'ip_monitor_probes_total{type="IP"} 6' in text
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "db.sqlite",
+        "ip_monitor.prom",
+    ]
+    assert "Impossible d'écrire les métriques" in caplog.text
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_loop_serves_metrics(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """In loop mode /metrics serves the state of the last cycle."""
+    cfg_path = tmp_path / "conf.yaml"
+    cfg_path.write_text(
+        f"""
+db_path: {tmp_path}/db.sqlite
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.2
+    description: dead
+precheck_enabled: false
+"""
+    )
+    monkeypatch.setattr("ip_monitor.monitoring.ping", _fake_ping)
+    port = _free_port()
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "ip-monitor",
+            "-c",
+            str(cfg_path),
+            "--quiet",
+            "--loop",
+            "0.05",
+            "--metrics-listen",
+            f"127.0.0.1:{port}",
+        ],
+    )
+    task = asyncio.create_task(monitoring.main())
+    text = ""
+    try:
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                await asyncio.sleep(0.05)
+                try:
+                    async with session.get(
+                        f"http://127.0.0.1:{port}/metrics"
+                    ) as response:
+                        text = await response.text()
+                        content_type = response.headers["Content-Type"]
+                except aiohttp.ClientConnectionError:
+                    continue
+                if "ip_monitor_cycles_total 2" in text:
+                    break
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert content_type == CONTENT_TYPE
+    assert 'description="dead"} 0' in text
+    assert "ip_monitor_cycles_total 2" in text
+
+
+@pytest.mark.asyncio
+async def test_oneshot_ignores_metrics_listen(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Without --loop the endpoint is not started, with a warning."""
+    cfg_path = tmp_path / "conf.yaml"
+    cfg_path.write_text(
+        f"""
+db_path: {tmp_path}/db.sqlite
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.1
+    description: up
+precheck_enabled: false
+metrics_listen: 127.0.0.1:9100
+"""
+    )
+    monkeypatch.setattr("ip_monitor.monitoring.ping", _fake_ping)
+    monkeypatch.setattr(
+        "sys.argv", ["ip-monitor", "-c", str(cfg_path), "--quiet"]
+    )
+    with caplog.at_level(logging.WARNING):
+        await monitoring.main()
+    assert "metrics_listen ignoré" in caplog.text
@@ -9,6 +9,7 @@ import pytest
 
 from ip_monitor.config import IpInfo, UrlInfo
 from ip_monitor.monitoring import (
+    ProbeContext,
     check_ip,
     check_url,
     check_url_status,
@@ -56,9 +57,9 @@ async def test_check_ip_down_then_up(monkeypatch: pytest.MonkeyPatch) -> None:
         # First: simulate down
         monkeypatch.setattr(
             "ip_monitor.monitoring.ping",
-            lambda ip: asyncio.sleep(0, result=False),
+            lambda ip, deadline: asyncio.sleep(0, result=False),
         )
-        await check_ip(conn, ipinfo, down, up, ping_timeout=0.5)
+        await check_ip(ProbeContext(conn, down, up), ipinfo, ping_timeout=0.5)
         assert down == ["my-ip"]
         assert up == []
 
@@ -66,9 +67,9 @@ async def test_check_ip_down_then_up(monkeypatch: pytest.MonkeyPatch) -> None:
         down.clear()
         monkeypatch.setattr(
             "ip_monitor.monitoring.ping",
-            lambda ip: asyncio.sleep(0, result=True),
+            lambda ip, deadline: asyncio.sleep(0, result=True),
         )
-        await check_ip(conn, ipinfo, down, up, ping_timeout=0.5)
+        await check_ip(ProbeContext(conn, down, up), ipinfo, ping_timeout=0.5)
         assert up == ["my-ip"]
         assert down == []
     finally:
@@ -88,7 +89,7 @@ async def test_check_url_status_down_then_up() -> None:
         session = _SessionStub(
             head_status=http_client.NOT_FOUND, get_status=http_client.NOT_FOUND
         )
-        await check_url_status(conn, session, url, down, up)
+        await check_url_status(ProbeContext(conn, down, up), session, url)
         assert down == ["site"] and up == []
 
         # Then up (HEAD 200)
@@ -97,7 +98,7 @@ async def test_check_url_status_down_then_up() -> None:
         session_ok = _SessionStub(
             head_status=http_client.OK, get_status=http_client.OK
         )
-        await check_url_status(conn, session_ok, url, down, up)
+        await check_url_status(ProbeContext(conn, down, up), session_ok, url)
         assert up == ["site"] and down == []
     finally:
         await conn.close()
@@ -35,7 +35,7 @@ async def test_init_update_check_status() -> None:
 
 @pytest.mark.asyncio
 async def test_remove_old_entries() -> None:
-    """Remove obsolete IP/URL entries, keep only current ones, then purge."""
+    """Remove obsolete IP/URL/TCP entries, keep only current ones, then purge."""
     conn = await init_db(Path(":memory:"))
     try:
         # Seed database with a mix of IPs and URLs
@@ -44,12 +44,15 @@ async def test_remove_old_entries() -> None:
             ("IP", "192.0.2.2"),
             ("URL", "a.example"),
             ("URL", "b.example"),
+            ("TCP", "db.example:5432"),
         ]:
             await update_status(conn, addr[0], addr[1], 1)
         await conn.commit()
 
-        # Keep only 192.0.2.2 and b.example
-        await remove_old_entries(conn, {"192.0.2.2"}, {"b.example"})
+        # Keep only 192.0.2.2, b.example and the TCP target
+        await remove_old_entries(
+            conn, {"192.0.2.2"}, {"b.example"}, {"db.example:5432"}
+        )
         await conn.commit()
 
         # Verify deletions
@@ -57,10 +60,14 @@ async def test_remove_old_entries() -> None:
             "SELECT type, address FROM status ORDER BY type, address"
         ) as cur:
             rows = await cur.fetchall()
-        assert rows == [("IP", "192.0.2.2"), ("URL", "b.example")]
+        assert rows == [
+            ("IP", "192.0.2.2"),
+            ("TCP", "db.example:5432"),
+            ("URL", "b.example"),
+        ]
 
         # If sets are empty, delete all of that type
-        await remove_old_entries(conn, set(), set())
+        await remove_old_entries(conn, set(), set(), set())
         await conn.commit()
         async with conn.execute("SELECT COUNT(*) FROM status") as cur:
             c = (await cur.fetchone())[0]
@@ -5,7 +5,7 @@ from pathlib import Path
 import pytest
 
 from ip_monitor.config import Config, NotifyMethod, NtfyConfig, SMSBoxConfig
-from ip_monitor.notify import notify, notify_ntfy, notify_smsbox
+from ip_monitor.notify import notify_channel, notify_ntfy, notify_smsbox
 
 
 class _Session:
@@ -87,7 +87,7 @@ async def test_notify_smsbox_sends(monkeypatch: pytest.MonkeyPatch) -> None:
 async def test_notify_dispatch(
     monkeypatch: pytest.MonkeyPatch, tmp_path: Path
 ) -> None:
-    """Dispatch to the proper backend based on notify_method."""
+    """Dispatch to the proper backend based on the channel method."""
     calls: list[str] = []
 
     async def f_ntfy(session: _Session, cfg: NtfyConfig, message: str):
@@ -106,7 +106,8 @@ async def test_notify_dispatch(
         ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
         ips=[{"ip": "1.1.1.1", "description": "d"}],  # type: ignore[list-item]
     )
-    await notify(session, cfg_ntfy, "A")
+    (channel,) = cfg_ntfy.notification_channels()
+    await notify_channel(session, channel, "A")  # type: ignore[arg-type]
 
     cfg_sms = Config(
         db_path=tmp_path / "y.db",
@@ -114,6 +115,7 @@ async def test_notify_dispatch(
         smsbox={"api_key": "k", "recipient": "r"},  # type: ignore[arg-type]
         ips=[{"ip": "1.1.1.1", "description": "d"}],  # type: ignore[list-item]
     )
-    await notify(session, cfg_sms, "B")
+    (channel,) = cfg_sms.notification_channels()
+    await notify_channel(session, channel, "B")  # type: ignore[arg-type]
 
     assert calls == ["ntfy:A", "sms:B"]
@@ -30,8 +30,13 @@ async def test_notify_ntfy_exception(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr("ip_monitor.notify.Message", StubMessage)
     monkeypatch.setattr("ip_monitor.notify.Ntfy", StubNtfy)
 
-    # Should not raise
-    await notify_ntfy(_Session(), NtfyConfig(server="http://s", topic="t"), "m")
+    # Should not raise, but report the failure
+    assert (
+        await notify_ntfy(
+            _Session(), NtfyConfig(server="http://s", topic="t"), "m"
+        )
+        is False
+    )
 
 
 @pytest.mark.asyncio
@@ -47,7 +52,10 @@ async def test_notify_smsbox_exception(monkeypatch: pytest.MonkeyPatch) -> None:
 
     monkeypatch.setattr("ip_monitor.notify.Client", StubClient)
 
-    # Should not raise
-    await notify_smsbox(
-        _Session(), SMSBoxConfig(api_key="k", recipient="r"), "m"
+    # Should not raise, but report the failure
+    assert (
+        await notify_smsbox(
+            _Session(), SMSBoxConfig(api_key="k", recipient="r"), "m"
+        )
+        is False
     )
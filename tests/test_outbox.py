@@ -0,0 +1,236 @@
+"""Persistent notification outbox: delivery, retries and statistics."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from ip_monitor.config import Config, IpInfo, NotifyMethod
+from ip_monitor.monitoring import RuntimeParams, _run_all_checks, init_db
+from ip_monitor.outbox import OutboxWorker, RetryPolicy, enqueue
+
+
+async def _rows(conn) -> list[tuple]:
+    return list(
+        await conn.execute_fetchall(
+            "SELECT message, attempts, delivered_at IS NOT NULL, last_error"
+            " FROM outbox ORDER BY id"
+        )
+    )
+
+
+def test_retry_policy_is_exponential_and_capped() -> None:
+    """Delays double after each failure up to backoff_max."""
+    policy = RetryPolicy(max_attempts=5, backoff_base=2.0, backoff_max=5.0)
+    assert [policy.delay(n) for n in (1, 2, 3)] == [2.0, 4.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_worker_delivers_and_records_latency() -> None:
+    """Committed messages are sent concurrently and marked delivered."""
+    conn = await init_db(Path(":memory:"))
+    sent: list[str] = []
+
+    async def send(channel: str, message: str) -> bool:
+        await asyncio.sleep(0.01)
+        sent.append(message)
+        return True
+
+    try:
+        await enqueue(conn, [("ntfy", "a"), ("ntfy", "b")])
+        await conn.commit()
+        worker = OutboxWorker(conn, send, asyncio.Lock(), RetryPolicy())
+        worker.start()
+        await worker.close(drain_timeout=1.0)
+
+        assert sorted(sent) == ["a", "b"]
+        assert worker.stats.delivered == 2  # noqa: PLR2004
+        assert worker.stats.failures == 0
+        assert all(lat >= 0 for lat in worker.stats.latencies)
+        assert await _rows(conn) == [("a", 1, 1, None), ("b", 1, 1, None)]
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_with_backoff() -> None:
+    """A failed send is retried after its backoff delay and counted."""
+    conn = await init_db(Path(":memory:"))
+    calls: list[str] = []
+
+    async def flaky(channel: str, message: str) -> bool:
+        calls.append(message)
+        return len(calls) > 1
+
+    try:
+        await enqueue(conn, [("ntfy", "m")])
+        await conn.commit()
+        worker = OutboxWorker(
+            conn, flaky, asyncio.Lock(), RetryPolicy(backoff_base=0.05)
+        )
+        worker.start()
+        await worker.close(drain_timeout=1.0)
+
+        assert calls == ["m", "m"]
+        assert worker.stats.failures == 1
+        assert worker.stats.delivered == 1
+        rows = await _rows(conn)
+        assert rows[0][:3] == ("m", 2, 1)
+        counters = await conn.execute_fetchall(
+            "SELECT value FROM counters WHERE name = 'notify_failures'"
+        )
+        assert next(iter(counters))[0] == 1
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_gives_up_and_keeps_error() -> None:
+    """Exceptions count as failures; rows stop after max_attempts."""
+    conn = await init_db(Path(":memory:"))
+
+    async def boom(channel: str, message: str) -> bool:
+        raise RuntimeError("server down")
+
+    try:
+        await enqueue(conn, [("ntfy", "m")])
+        await conn.commit()
+        worker = OutboxWorker(
+            conn,
+            boom,
+            asyncio.Lock(),
+            RetryPolicy(max_attempts=2, backoff_base=0.01),
+        )
+        worker.start()
+        await worker.close(drain_timeout=1.0)
+
+        assert worker.stats.failures == 2  # noqa: PLR2004
+        message, attempts, delivered, error = (await _rows(conn))[0]
+        assert (message, attempts, delivered) == ("m", 2, 0)
+        assert "server down" in error
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_close_leaves_late_retries_for_next_run() -> None:
+    """Retries due after the drain window are not awaited."""
+    conn = await init_db(Path(":memory:"))
+
+    async def nok(channel: str, message: str) -> bool:
+        return False
+
+    try:
+        await enqueue(conn, [("ntfy", "m")])
+        await conn.commit()
+        worker = OutboxWorker(
+            conn, nok, asyncio.Lock(), RetryPolicy(backoff_base=60)
+        )
+        worker.start()
+        start = time.monotonic()
+        await worker.close(drain_timeout=5.0)
+        assert time.monotonic() - start < 1.0
+        assert (await _rows(conn))[0][:3] == ("m", 1, 0)
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_rows_are_sent_at_start_of_next_run(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """An undelivered alert from a previous run is retried first."""
+    sent: list[str] = []
+
+    async def fake_notify(session, channel, message: str) -> bool:
+        sent.append(message)
+        return True
+
+    async def ping_ok(_ip: str, deadline: float | None = None) -> bool:
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping_ok)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
+
+    cfg = Config(
+        db_path=tmp_path / "db.sqlite",
+        notify_method=NotifyMethod.NTFY_SH,
+        ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
+        ips=[IpInfo(ip="192.0.2.1", description="d")],
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        await enqueue(conn, [("ntfy", "alerte perdue")])
+        await conn.commit()
+        await _run_all_checks(
+            conn,
+            cfg,
+            RuntimeParams(
+                http_timeout=1.0,
+                http_connector_limit=1,
+                concurrency=1,
+                ping_timeout=1.0,
+                quiet=True,
+            ),
+        )
+        assert sent == ["alerte perdue"]
+        assert (await _rows(conn))[0][2] == 1
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_uncommitted_rows_are_not_sent() -> None:
+    """Rows of a transaction still holding the lock are never read."""
+    conn = await init_db(Path(":memory:"))
+    lock = asyncio.Lock()
+    sent: list[str] = []
+
+    async def send(channel: str, message: str) -> bool:
+        sent.append(message)
+        return True
+
+    try:
+        worker = OutboxWorker(conn, send, lock, RetryPolicy())
+        async with lock:
+            await enqueue(conn, [("ntfy", "annulé")])
+            worker.start()
+            await asyncio.sleep(0.05)
+            await conn.rollback()
+        await worker.close(drain_timeout=1.0)
+        assert sent == []
+        assert await _rows(conn) == []
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_finished_rows_are_purged(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Only the latest finished rows are kept; pending ones always stay."""
+    monkeypatch.setattr("ip_monitor.outbox.OUTBOX_KEPT", 1)
+    conn = await init_db(Path(":memory:"))
+
+    async def nok(channel: str, message: str) -> bool:
+        return False
+
+    try:
+        await enqueue(conn, [("ntfy", m) for m in "abcd"])
+        await conn.execute(
+            "UPDATE outbox SET delivered_at = 1 WHERE message IN ('a', 'c')"
+        )
+        # b: abandoned, d: still to be retried later
+        await conn.execute("UPDATE outbox SET attempts = 8 WHERE message = 'b'")
+        await conn.execute(
+            "UPDATE outbox SET next_attempt_at = ? WHERE message = 'd'",
+            (time.time() + 60,),
+        )
+        await conn.commit()
+        worker = OutboxWorker(conn, nok, asyncio.Lock(), RetryPolicy())
+        worker.start()
+        await worker.close(drain_timeout=1.0)
+        assert [row[0] for row in await _rows(conn)] == ["c", "d"]
+    finally:
+        await conn.close()
@@ -0,0 +1,47 @@
+"""Ping hot path: prepared environment, output captured only for DEBUG."""
+
+import asyncio
+import logging
+
+import pytest
+
+from ip_monitor import monitoring
+from ip_monitor.monitoring import ping
+
+
+@pytest.mark.asyncio
+async def test_output_captured_only_for_debug(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Stdout goes to /dev/null unless DEBUG logging needs it."""
+    calls: list[dict] = []
+
+    class _Proc:
+        returncode = 0
+
+        async def communicate(self):
+            if calls[-1]["stdout"] == asyncio.subprocess.PIPE:
+                return (b"1 received\n", None)
+            return (None, None)
+
+    async def fake_create(*args, **kwargs):
+        calls.append(kwargs)
+        return _Proc()
+
+    monkeypatch.setattr("asyncio.create_subprocess_exec", fake_create)
+    monitoring._ping_env.cache_clear()
+    with caplog.at_level(logging.WARNING):
+        assert await ping("192.0.2.1")
+        assert await ping("192.0.2.2")
+    with caplog.at_level(logging.DEBUG):
+        assert await ping("192.0.2.3")
+    monitoring._ping_env.cache_clear()
+    assert [call["stdout"] for call in calls] == [
+        asyncio.subprocess.DEVNULL,
+        asyncio.subprocess.DEVNULL,
+        asyncio.subprocess.PIPE,
+    ]
+    # The environment is prepared once and shared by every ping
+    assert calls[0]["env"] is calls[1]["env"] is calls[2]["env"]
+    assert calls[0]["env"]["LC_ALL"]
+    assert "Sortie ping brute :\n1 received" in caplog.text
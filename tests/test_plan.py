@@ -0,0 +1,199 @@
+"""Capacity planner: schedule simulation and the ``plan`` subcommand."""
+
+from pathlib import Path
+
+import aiosqlite
+import pytest
+
+from ip_monitor.config import IpInfo
+from ip_monitor.latency import LatencyHistory
+from ip_monitor.monitoring import _run_all_checks, init_db, main
+from ip_monitor.plan import PlannedProbe, estimate, recommend, simulate
+
+
+def test_estimate_sources() -> None:
+    """History median, defaults for new targets, timeouts for down ones."""
+    history = LatencyHistory({("URL", "u"): [0.1, 0.2, 0.3, 0.4, 0.5]})
+    assert estimate(
+        "URL", "u", history=history, is_down=False, timeout=7.0
+    ) == PlannedProbe("URL", 0.3, "history")
+    assert estimate(
+        "TCP", "t", history=history, is_down=False, timeout=0.01
+    ) == PlannedProbe("TCP", 0.01, "default")
+    # A dead host takes its whole timeout (capped at -w5 by the caller)
+    assert estimate(
+        "IP", "i", history=history, is_down=True, timeout=12.0
+    ) == PlannedProbe("IP", 12.0, "down")
+    down_url = estimate("URL", "u", history=history, is_down=True, timeout=7.0)
+    assert down_url.seconds == 7.0  # noqa: PLR2004
+
+
+def test_simulate_slots_and_connections() -> None:
+    """Probes take the first free slot; URLs also wait for a connection."""
+    probes = [
+        PlannedProbe("IP", 1.0, "default"),
+        PlannedProbe("IP", 1.0, "default"),
+        PlannedProbe("URL", 1.0, "default"),
+        PlannedProbe("URL", 1.0, "default"),
+    ]
+    schedule = simulate(probes, 2)
+    assert schedule.wall == 2.0  # noqa: PLR2004
+    assert schedule.peak_subprocesses == 2  # noqa: PLR2004
+    assert schedule.peak_sockets == 2  # noqa: PLR2004
+    # One HTTP connection serialises the URLs behind the pings
+    assert simulate(probes, 4, connector_limit=1).wall == 2.0  # noqa: PLR2004
+    assert simulate(probes, 4).wall == 1.0
+
+
+def test_recommend_smallest_concurrency() -> None:
+    """The smallest concurrency that fits wins; None if nothing fits."""
+    probes = [PlannedProbe("IP", 1.0, "default")] * 10
+    schedule = recommend(probes, 3.0)
+    assert schedule is not None
+    assert (schedule.concurrency, schedule.wall) == (4, 3.0)
+    assert recommend([PlannedProbe("URL", 7.0, "down")], 5.0) is None
+
+
+@pytest.mark.asyncio
+async def test_plan_subcommand(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """``ip-monitor plan`` reports the estimate without probing anything."""
+    db_path = tmp_path / "db.sqlite"
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"""
+db_path: {db_path}
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.1
+    description: dead
+  - ip: 192.0.2.2
+    description: new
+urls:
+  - url: https://example.org
+    description: site
+loop_interval: 6.5
+"""
+    )
+    conn = await init_db(db_path)
+    try:
+        await conn.execute(
+            "INSERT INTO status(type, address, down)"
+            " VALUES ('IP', '192.0.2.1', 1)"
+        )
+        await conn.executemany(
+            "INSERT INTO latency(type, address, seconds, measured_at)"
+            " VALUES ('URL', 'https://example.org', ?, 0)",
+            [(0.5,)] * 5,
+        )
+        await conn.commit()
+    finally:
+        await conn.close()
+
+    async def no_probe(*args, **kwargs):
+        raise AssertionError("plan must not probe")
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", no_probe)
+    monkeypatch.setattr("ip_monitor.monitoring.check_url", no_probe)
+    monkeypatch.setattr(
+        "sys.argv", ["ip-monitor", "--concurrency", "1", "plan", "-c", str(cfg)]
+    )
+    await main()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == (
+        "Cibles: 3 (IP 2, URL 1, TCP 0); estimations: 1 historique,"
+        " 1 par défaut, 1 down"
+    )
+    assert "concurrency 1, http_connector_limit 50" in lines[1]
+    assert "cycle estimé 5.5 s" in lines[1]
+    assert lines[2].endswith("le cycle ne tient pas")
+    assert lines[3].startswith("Recommandé: concurrency 2,")
+
+    monkeypatch.setattr(
+        "sys.argv", ["ip-monitor", "plan", "-c", str(cfg), "--interval", "2"]
+    )
+    await main()
+    out = capsys.readouterr().out
+    assert "Aucune concurrence ne suffit" in out
+    assert "Attention: 1 cible(s) sans historique" in out
+
+    # A zero interval is rejected, not replaced by loop_interval
+    monkeypatch.setattr(
+        "sys.argv", ["ip-monitor", "plan", "-c", str(cfg), "--interval", "0"]
+    )
+    with pytest.raises(SystemExit) as exc:
+        await main()
+    assert exc.value.code == 2  # noqa: PLR2004
+    assert "--interval" in capsys.readouterr().err
+
+
+@pytest.mark.asyncio
+async def test_plan_leaves_the_database_alone(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """A missing database is not created, an old one is not migrated."""
+    db_path = tmp_path / "db.sqlite"
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"""
+db_path: {db_path}
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.1
+    description: new
+"""
+    )
+    monkeypatch.setattr("sys.argv", ["ip-monitor", "plan", "-c", str(cfg)])
+    await main()
+    assert not db_path.exists()
+    assert "1 par défaut" in capsys.readouterr().out
+    assert "absente" in caplog.text
+
+    # A database from before the latency table
+    conn = await aiosqlite.connect(db_path)
+    await conn.execute("CREATE TABLE status (type, address, down)")
+    await conn.commit()
+    await conn.close()
+    await main()
+    assert "Attention: 1 cible(s)" in capsys.readouterr().out
+    assert "illisible" in caplog.text
+    async with aiosqlite.connect(db_path) as conn:
+        tables = await conn.execute_fetchall(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    assert [row[0] for row in tables] == ["status"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_latency_recorded_without_hedging(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Every cycle feeds the latency history used by ``plan``."""
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(ips=[IpInfo(ip="192.0.2.1", description="a")])
+    assert cfg.hedge_percentile is cfg.adaptive_timeout_factor is None
+    conn = await init_db(cfg.db_path)
+    try:
+        for _ in range(2):
+            await _run_all_checks(conn, cfg, make_params())
+        rows = await conn.execute_fetchall("SELECT type, address FROM latency")
+    finally:
+        await conn.close()
+    assert list(rows) == [("IP", "192.0.2.1")] * 2
@@ -30,3 +30,20 @@ async def test_precheck_internet_fail(monkeypatch: pytest.MonkeyPatch, capsys):
     assert await monitoring._precheck_internet(0.01) is False
     out = capsys.readouterr().out
     assert "Pas de connexion" in out
+
+
+@pytest.mark.asyncio
+async def test_precheck_internet_fail_quiet(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """In quiet mode a failure (or crash) is logged, never printed."""
+
+    async def boom(_ip: str) -> bool:
+        raise OSError("no ping")
+
+    monkeypatch.setattr(monitoring, "ping", boom)
+    assert await monitoring._precheck_internet(0.01, quiet=True) is False
+    assert capsys.readouterr().out == ""
+    assert "Pas de connexion à Internet" in caplog.text
@@ -0,0 +1,119 @@
+"""Dispatch order by priority and state, and shedding near the deadline."""
+
+import asyncio
+
+import pytest
+
+from ip_monitor.config import IpInfo, Severity
+from ip_monitor.monitoring import _run_all_checks, init_db
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_dispatch_order(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Priority first, then known-down targets, then severity."""
+    order: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        order.append(ip)
+        return ip != "down"
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(
+        ips=[
+            IpInfo(ip="routine", description="r"),
+            IpInfo(ip="down", description="d"),
+            IpInfo(ip="critical", description="c", severity=Severity.CRITICAL),
+            IpInfo(ip="vip", description="v", priority=10),
+        ],
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        await conn.execute(
+            "INSERT INTO status(type, address, down) VALUES ('IP', 'down', 1)"
+        )
+        await conn.commit()
+        await _run_all_checks(conn, cfg, make_params(concurrency=1))
+    finally:
+        await conn.close()
+    assert order == ["vip", "down", "critical", "routine"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_low_priority_targets_are_shed_near_deadline(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Routine targets still queued in the shed window are not probed."""
+    order: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        order.append(ip)
+        await asyncio.sleep(0.2)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    cfg = make_config(
+        ips=[
+            IpInfo(ip="r1", description="r1"),
+            IpInfo(ip="r2", description="r2"),
+            IpInfo(ip="important", description="i", priority=1),
+            IpInfo(ip="r3", description="r3"),
+        ],
+        deadline_shed_margin=0.7,
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(
+            conn, cfg, make_params(concurrency=1, cycle_deadline=1.0)
+        )
+    finally:
+        await conn.close()
+    # "important" and r1 start before the shed window (0.3 s); the others
+    # get their slot later and are shed without waiting for the deadline
+    assert order == ["important", "r1"]
+    assert summary.unknown == ["r2", "r3"]
+
+
+def test_priority_is_read_from_yaml_values() -> None:
+    """Priorities given as strings in YAML are normalised to int."""
+    assert IpInfo(ip="a", description="A", priority="3").priority == 3  # type: ignore[arg-type]  # noqa: PLR2004
+    with pytest.raises(ValueError, match="invalid literal"):
+        IpInfo(ip="a", description="A", priority="high")  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sent")
+async def test_no_shedding_without_deadline_or_for_priority_targets(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The shed margin needs a cycle deadline and spares priority > 0."""
+    order: list[str] = []
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        order.append(ip)
+        await asyncio.sleep(0.1)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    ips = [IpInfo(ip=f"p{i}", description=f"p{i}", priority=1) for i in (1, 2)]
+    cfg = make_config(ips=ips, deadline_shed_margin=10)
+    conn = await init_db(cfg.db_path)
+    try:
+        # Deadline inside the margin from the start: priority targets run
+        summary = await _run_all_checks(
+            conn, cfg, make_params(concurrency=1, cycle_deadline=1.0)
+        )
+        assert summary.unknown == []
+        # No cycle deadline: the margin is ignored, routine targets run too
+        order.clear()
+        routine = make_config(
+            ips=[IpInfo(ip="r", description="r")], deadline_shed_margin=10
+        )
+        summary = await _run_all_checks(conn, routine, make_params())
+    finally:
+        await conn.close()
+    assert order == ["r"]
+    assert summary.unknown == []
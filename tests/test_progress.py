@@ -0,0 +1,54 @@
+"""Aggregated progress reporter (status line on TTYs, periodic lines else)."""
+
+import asyncio
+import io
+
+import pytest
+
+from ip_monitor.progress import LOG_REFRESH, TTY_REFRESH, ProgressReporter
+from ip_monitor.runs import RunStats
+
+
+class _Tty(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def test_refresh_rate_depends_on_output() -> None:
+    """Terminals are redrawn often, logs only get periodic summaries."""
+    assert ProgressReporter(RunStats(), _Tty()).refresh == TTY_REFRESH
+    assert ProgressReporter(RunStats(), io.StringIO()).refresh == LOG_REFRESH
+
+
+def test_unchanged_state_is_not_rewritten() -> None:
+    """Only a change in the counters produces output."""
+    stats = RunStats()
+    stream = io.StringIO()
+    progress = ProgressReporter(stats, stream)
+    progress.add(3)
+    progress.render()
+    progress.render()
+    stats.in_flight = 1
+    progress.finished(is_down=True)
+    progress.render()
+    assert stream.getvalue().splitlines() == [
+        "Progression: 0/3 terminée(s), 0 en cours, 0 down",
+        "Progression: 1/3 terminée(s), 1 en cours, 1 down",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_tty_status_line_is_redrawn_and_cleared() -> None:
+    """On a TTY one line is redrawn in place, then erased on close."""
+    stream = _Tty()
+    progress = ProgressReporter(RunStats(), stream, refresh=0.01)
+    progress.add(2)
+    progress.start()
+    await asyncio.sleep(0.05)
+    progress.finished(is_down=False)
+    await asyncio.sleep(0.05)
+    await progress.close()
+    text = stream.getvalue()
+    assert "\n" not in text
+    assert text.count("\r\x1b[K") == 3  # noqa: PLR2004
+    assert text.endswith("1/2 terminée(s), 0 en cours, 0 down\r\x1b[K")
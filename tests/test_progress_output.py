@@ -1,5 +1,6 @@
 """Progress printing tests (default verbose and quiet)."""
 
+import logging
 from pathlib import Path
 
 import pytest
@@ -8,10 +9,10 @@ from ip_monitor.monitoring import main
 
 
 @pytest.mark.asyncio
-async def test_progress_default_prints_tasks_and_summary(
-    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys
+async def test_progress_default_prints_config_and_summary(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys, caplog
 ) -> None:
-    """By default, print config line, task starts, and summary."""
+    """By default, print config line and summary; task starts are DEBUG."""
     cfg = tmp_path / "conf.yaml"
     cfg.write_text(
         f"""
@@ -39,12 +40,14 @@ precheck_enabled: false
     monkeypatch.setenv("PYTHONWARNINGS", "ignore")
     monkeypatch.setattr("sys.argv", ["ip-monitor", "-c", str(cfg)])
 
-    await main()
+    with caplog.at_level(logging.DEBUG):
+        await main()
     out = capsys.readouterr().out
     assert "Config:" in out
     assert "IPs: 1, URLs: 1" in out
-    assert "IP 192.0.2.3" in out and "démarré" in out
-    assert "URL example.org" in out and "démarré" in out
+    assert "démarré" not in out
+    assert "IP 192.0.2.3 — test: démarré" in caplog.text
+    assert "URL example.org — site: démarré" in caplog.text
     assert "Terminé:" in out and "0 down, 0 up" in out
 
 
@@ -0,0 +1,183 @@
+"""Single-instance run lock: policies, stale takeover and overlap counters."""
+
+import asyncio
+import signal
+import time
+from pathlib import Path
+
+import pytest
+
+from ip_monitor import lock as lock_mod
+from ip_monitor.config import LockPolicy
+from ip_monitor.lock import RunLock, acquire_run_lock, lock_path_for
+from ip_monitor.monitoring import init_db, main
+
+
+def test_lock_is_exclusive(tmp_path: Path) -> None:
+    """A second lock on the same file fails until the first is released."""
+    path = lock_path_for(tmp_path / "db.sqlite")
+    assert path.name == "db.sqlite.lock"
+    first, second = RunLock(path), RunLock(path)
+    assert first.try_acquire() and first.held
+    assert first.holder() is not None
+    assert not second.try_acquire()
+    first.release()
+    first.release()  # idempotent
+    assert second.try_acquire()
+    second.release()
+
+
+@pytest.mark.asyncio
+async def test_policies(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Skip returns at once, wait polls until release or timeout."""
+    monkeypatch.setattr(lock_mod, "_POLL_INTERVAL", 0.01)
+    path = tmp_path / "x.lock"
+    holder = RunLock(path)
+    assert holder.try_acquire()
+    try:
+        other = RunLock(path)
+        assert (
+            await acquire_run_lock(other, LockPolicy.SKIP, 1, 60) == "skipped"
+        )
+        assert (
+            await acquire_run_lock(other, LockPolicy.WAIT, 0.05, 60)
+            == "timeout"
+        )
+        assert not other.held
+
+        asyncio.get_running_loop().call_later(0.05, holder.release)
+        assert await acquire_run_lock(other, LockPolicy.WAIT, 1, 60) == "waited"
+        assert other.held
+        other.release()
+    finally:
+        holder.release()
+
+
+@pytest.mark.asyncio
+async def test_takeover_terminates_stale_holder(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A holder older than stale_after receives SIGTERM."""
+    monkeypatch.setattr(lock_mod, "_POLL_INTERVAL", 0.01)
+    path = tmp_path / "x.lock"
+    holder = RunLock(path)
+    assert holder.try_acquire()
+    # Simulate another, long-running process owning the lock
+    path.write_text("99999 0\n")
+
+    killed: list[tuple[int, int]] = []
+
+    def fake_kill(pid: int, sig: int) -> None:
+        killed.append((pid, sig))
+        holder.release()
+
+    monkeypatch.setattr(lock_mod.os, "kill", fake_kill)
+    other = RunLock(path)
+    event = await acquire_run_lock(other, LockPolicy.TAKEOVER, 1, 60)
+    assert event == "took_over"
+    assert killed == [(99999, signal.SIGTERM)]
+    other.release()
+
+
+@pytest.mark.asyncio
+async def test_main_skips_and_records_overlap(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """main() skips the cycle when locked and counts the overlap."""
+    db_path = tmp_path / "db.sqlite"
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"""
+db_path: {db_path}
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.1
+    description: d
+precheck_enabled: false
+"""
+    )
+
+    async def boom(*a, **k):
+        raise AssertionError("no check expected while locked")
+
+    monkeypatch.setattr("ip_monitor.monitoring.check_ip", boom)
+    monkeypatch.setattr("sys.argv", ["ip-monitor", "-c", str(cfg)])
+
+    holder = RunLock(lock_path_for(db_path))
+    assert holder.try_acquire()
+    try:
+        await main()
+    finally:
+        holder.release()
+
+    assert "Une autre instance" in capsys.readouterr().out
+    conn = await init_db(db_path)
+    try:
+        rows = await conn.execute_fetchall("SELECT name, value FROM counters")
+    finally:
+        await conn.close()
+    assert list(rows) == [("overlap_skipped", 1)]
+
+
+@pytest.mark.asyncio
+async def test_loop_heartbeat_prevents_takeover(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A resident loop refreshes the lock, so takeover leaves it alone."""
+    db_path = tmp_path / "db.sqlite"
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"""
+db_path: {db_path}
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.1
+    description: d
+precheck_enabled: false
+lock_stale_after: 0.2
+"""
+    )
+    cycles = asyncio.Event()
+    count = 0
+
+    async def fake_run(*args, **kwargs) -> None:
+        nonlocal count
+        count += 1
+        if count == 10:  # noqa: PLR2004
+            cycles.set()
+
+    killed: list[int] = []
+    monkeypatch.setattr("ip_monitor.monitoring._run_all_checks", fake_run)
+    monkeypatch.setattr(
+        lock_mod.os, "kill", lambda pid, sig: killed.append(pid)
+    )
+    monkeypatch.setattr(
+        "sys.argv", ["ip-monitor", "-c", str(cfg), "--quiet", "--loop", "0.05"]
+    )
+    task = asyncio.create_task(main())
+    try:
+        # Ten cycles: the loop has been running for longer than stale_after
+        await asyncio.wait_for(cycles.wait(), 5)
+        other = RunLock(lock_path_for(db_path))
+        holder = other.holder()
+        assert holder is not None
+        assert time.time() - holder.started_at < 0.2  # noqa: PLR2004
+        with monkeypatch.context() as patch:
+            # Seen from another process
+            patch.setattr(lock_mod.os, "getpid", lambda: -1)
+            assert not lock_mod._terminate_stale_holder(other, 0.2)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert killed == []
@@ -0,0 +1,177 @@
+"""Per-cycle run summaries (runs table) and the ``runs`` subcommand."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from ip_monitor import runs
+from ip_monitor.config import Config, IpInfo, NotifyMethod, UrlInfo
+from ip_monitor.monitoring import RuntimeParams, _run_all_checks, init_db, main
+from ip_monitor.runs import RunRecord, RunStats, recent_runs, record_run
+
+
+@pytest.mark.asyncio
+async def test_cycle_is_recorded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Probes, timeouts, killed pings and notifications are counted."""
+    real_exec = asyncio.create_subprocess_exec
+
+    async def slow_ping(*args, **kwargs):
+        # Stands in for a ping that never answers
+        return await real_exec("sleep", "10", **kwargs)
+
+    async def check_url(session, url: str, max_wait=None) -> bool:
+        return True
+
+    async def fake_notify(session, channel, message: str) -> bool:
+        return True
+
+    monkeypatch.setattr("asyncio.create_subprocess_exec", slow_ping)
+    monkeypatch.setattr("ip_monitor.monitoring.check_url", check_url)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
+    cfg = Config(
+        db_path=tmp_path / "db.sqlite",
+        notify_method=NotifyMethod.NTFY_SH,
+        ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
+        ips=[IpInfo(ip="192.0.2.1", description="dead")],
+        urls=[UrlInfo(url="u", description="site")],
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        await _run_all_checks(
+            conn,
+            cfg,
+            RuntimeParams(
+                http_timeout=1.0,
+                http_connector_limit=1,
+                concurrency=5,
+                ping_timeout=0.2,
+                quiet=True,
+            ),
+        )
+        (run,) = await recent_runs(conn, 5)
+    finally:
+        await conn.close()
+    assert run["targets"] == 2  # noqa: PLR2004
+    assert (run["probes_ip"], run["probes_url"], run["probes_tcp"]) == (1, 1, 0)
+    assert (run["down"], run["up"]) == (1, 0)
+    assert (run["timeouts"], run["killed"]) == (1, 1)
+    assert run["notifications"] == 1
+    assert run["notify_latency"] is not None
+    assert run["concurrency"] == 2  # noqa: PLR2004
+    assert run["ended_at"] >= run["started_at"]
+    assert '"probes"' in str(run["stages"])
+
+
+@pytest.mark.asyncio
+async def test_old_runs_are_pruned(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Only the last RUNS_KEPT cycles are kept, listed oldest first."""
+    monkeypatch.setattr(runs, "RUNS_KEPT", 2)
+    conn = await init_db(Path(":memory:"))
+    try:
+        for started in (1.0, 2.0, 3.0):
+            await record_run(
+                conn, RunRecord(started, started + 1, 1, 0, 0, 0, RunStats())
+            )
+        kept = await recent_runs(conn, 10)
+        last = await recent_runs(conn, 1)
+    finally:
+        await conn.close()
+    assert [r["started_at"] for r in kept] == [2.0, 3.0]
+    assert [r["started_at"] for r in last] == [3.0]
+    assert kept[0]["notify_latency"] is None
+
+
+@pytest.mark.asyncio
+async def test_runs_subcommand(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """``ip-monitor runs --last N`` prints the latest cycles as a table."""
+    db_path = tmp_path / "db.sqlite"
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"""
+db_path: {db_path}
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.3
+    description: test
+"""
+    )
+    monkeypatch.setattr("sys.argv", ["ip-monitor", "runs", "-c", str(cfg)])
+    await main()
+    assert capsys.readouterr().out == "Aucun cycle enregistré.\n"
+
+    conn = await init_db(db_path)
+    try:
+        stats = RunStats()
+        stats.probes["IP"] = 3
+        await record_run(
+            conn,
+            RunRecord(10.0, 12.5, 3, 1, 0, 0, stats, [0.25], local_outage=True),
+        )
+        await record_run(conn, RunRecord(20.0, 21.0, 3, 0, 1, 0, RunStats()))
+        await conn.commit()
+    finally:
+        await conn.close()
+    monkeypatch.setattr(
+        "sys.argv", ["ip-monitor", "-c", str(cfg), "runs", "--last", "2"]
+    )
+    await main()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("Début")
+    assert len(lines) == 3  # noqa: PLR2004
+    assert "2.50s" in lines[1] and "0.25s" in lines[1]
+    assert lines[1].endswith("panne locale")
+    assert " - " in lines[2]
+
+
+@pytest.mark.asyncio
+async def test_precheck_failure_is_recorded(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """A cycle skipped by a failed precheck still gets a runs row."""
+
+    async def offline(ip: str, deadline: float | None = None) -> bool:
+        return False
+
+    db_path = tmp_path / "db.sqlite"
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"""
+db_path: {db_path}
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.3
+    description: test
+"""
+    )
+    monkeypatch.setattr("ip_monitor.monitoring.ping", offline)
+    monkeypatch.setattr("sys.argv", ["ip-monitor", "-c", str(cfg), "--quiet"])
+    await main()
+    conn = await init_db(db_path)
+    try:
+        (run,) = await recent_runs(conn, 5)
+    finally:
+        await conn.close()
+    assert run["precheck_failed"] == 1
+    assert run["targets"] == 1
+    assert (run["probes_ip"], run["down"], run["up"]) == (0, 0, 0)
+    assert '"precheck"' in str(run["stages"])
+
+    monkeypatch.setattr("sys.argv", ["ip-monitor", "-c", str(cfg), "runs"])
+    await main()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[-1].endswith("pré-vérification échouée")
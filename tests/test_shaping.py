@@ -0,0 +1,121 @@
+"""Notification shaping: size budgets, chunking and per-channel rate limit."""
+
+from pathlib import Path
+
+import pytest
+
+from ip_monitor.config import ChannelConfig, NotifyMethod
+from ip_monitor.monitoring import init_db
+from ip_monitor.shaping import (
+    NotificationShaper,
+    TokenBucket,
+    chunk_items,
+    fits,
+    sms_segments,
+)
+
+NTFY = {"server": "http://s", "topic": "t"}
+SMS = {"api_key": "k", "recipient": "r"}
+
+
+def _sms(**kwargs) -> ChannelConfig:
+    return ChannelConfig(
+        name="sms",
+        method=NotifyMethod.SMSBOX,
+        smsbox=SMS,  # type: ignore[arg-type]
+        **kwargs,
+    )
+
+
+def test_sms_segments() -> None:
+    """GSM-7 and UCS-2 texts use their own segment sizes."""
+    assert sms_segments("a" * 160) == 1
+    assert sms_segments("a" * 161) == 2  # noqa: PLR2004
+    # Extension characters take two septets
+    assert sms_segments("€" * 80) == 1
+    assert sms_segments("€" * 81) == 2  # noqa: PLR2004
+    assert sms_segments("ê" * 70) == 1
+    assert sms_segments("ê" * 71) == 2  # noqa: PLR2004
+
+
+def test_fits_uses_backend_budget() -> None:
+    """Ntfy is limited in bytes, SMS in segments."""
+    ntfy = ChannelConfig(
+        name="n",
+        method=NotifyMethod.NTFY_SH,
+        ntfy=NTFY,  # type: ignore[arg-type]
+        max_message_bytes=4,
+    )
+    assert fits(ntfy, "abcd")
+    assert not fits(ntfy, "abcé")
+    assert fits(_sms(max_sms_segments=1), "a" * 160)
+    assert not fits(_sms(max_sms_segments=1), "a" * 161)
+
+
+def test_chunk_items_splits_within_budget() -> None:
+    """Large digests are split into numbered messages under the budget."""
+    items = [f"hôte-{i:03}" for i in range(100)]
+
+    def render(s: str) -> str:
+        return f"Erreur sur {s}"
+
+    def budget(t: str) -> bool:
+        return len(t) <= 120  # noqa: PLR2004
+
+    chunks = chunk_items(items, render, budget)
+    assert len(chunks) > 1
+    assert sum(count for _, count in chunks) == len(items)
+    assert all(budget(text) for text, _ in chunks)
+    assert chunks[0][0].endswith(f"(1/{len(chunks)})")
+    assert chunk_items(["a"], render, budget) == [("Erreur sur a", 1)]
+    assert chunk_items([], render, budget) == []
+
+
+def test_token_bucket_refills() -> None:
+    """Tokens are consumed then refilled at the configured rate."""
+    bucket = TokenBucket(capacity=2, rate=1.0, tokens=2, updated_at=0.0)
+    assert bucket.take(0.0) and bucket.take(0.0)
+    assert not bucket.take(0.5)
+    assert bucket.take(1.0)
+
+
+def test_rate_limit_suppresses_then_summarises() -> None:
+    """Excess messages are counted and reported once a token is available."""
+    channel = _sms(rate_limit=3600, rate_burst=1)
+    shaper = NotificationShaper([channel], {"sms": TokenBucket(1, 1.0, 1, 0.0)})
+    first = shaper.shape({"sms": ["a"]}, {"sms": ["b", "c"]}, "d", 0.0)
+    assert first == [("sms", "Erreur monitoring sur a le d")]
+    assert shaper.buckets["sms"].suppressed == 2  # noqa: PLR2004
+
+    # Still limited: nothing, not even the summary
+    assert shaper.shape({}, {}, "d", 0.5) == []
+    (summary,) = shaper.shape({}, {}, "d", 1.0)
+    assert summary == (
+        "sms",
+        "2 autre(s) transition(s) non notifiée(s) (limite de débit du canal)",
+    )
+    assert shaper.buckets["sms"].suppressed == 0
+
+
+@pytest.mark.asyncio
+async def test_bucket_state_persists_across_cycles() -> None:
+    """The bucket is saved to rate_limits and reloaded by the next cycle."""
+    conn = await init_db(Path(":memory:"))
+    channels = [_sms(rate_limit=1, rate_burst=1)]
+    try:
+        shaper = await NotificationShaper.load(conn, channels, now=100.0)
+        assert shaper.buckets["sms"].tokens == 1
+        assert (
+            len(shaper.shape({"sms": ["a"]}, {"sms": ["b"]}, "d", 100.0)) == 1
+        )
+        await shaper.save(conn)
+        await conn.commit()
+
+        again = await NotificationShaper.load(conn, channels, now=200.0)
+        assert again.buckets["sms"].tokens < 1
+        assert again.buckets["sms"].suppressed == 1
+        # Unlimited channels have no bucket
+        unlimited = await NotificationShaper.load(conn, [_sms()], now=200.0)
+        assert unlimited.buckets == {}
+    finally:
+        await conn.close()
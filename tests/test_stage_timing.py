@@ -0,0 +1,80 @@
+"""Per-stage timings of a cycle and the --profile flag."""
+
+import logging
+import pstats
+from pathlib import Path
+
+import pytest
+
+from ip_monitor.monitoring import main
+from ip_monitor.timing import Profile, StageTimer, format_stages
+
+
+def test_stage_timer_accumulates() -> None:
+    """Repeated stages add up, interrupted ones are still counted."""
+    timer = StageTimer()
+    timer.add("flush", 0.25)
+    timer.add("flush", 0.5)
+    with pytest.raises(RuntimeError), timer.stage("probes"):
+        raise RuntimeError("boom")
+    assert list(timer.stages) == ["flush", "probes"]
+    assert timer.rounded()["flush"] == 0.75  # noqa: PLR2004
+    assert format_stages({"init_db": 0.0123}) == "init_db 0.012 s"
+
+
+def test_profile_write_error_is_logged(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """An unwritable profile path does not break the run."""
+    profile = Profile(tmp_path / "missing" / "run.prof")
+    profile.start()
+    with caplog.at_level(logging.ERROR):
+        profile.stop()
+    assert "Impossible d'écrire le profil" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_summary_lists_stages_and_profile_is_written(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Main and cycle stages reach the summary, the log and the profile."""
+    cfg = tmp_path / "conf.yaml"
+    cfg.write_text(
+        f"""
+db_path: {tmp_path / "db.sqlite"}
+notify_method: ntfy
+ntfy:
+  server: http://s
+  topic: t
+ips:
+  - ip: 192.0.2.3
+    description: test
+"""
+    )
+
+    async def ping(ip: str, deadline: float | None = None) -> bool:
+        return True
+
+    async def precheck(*args, **kwargs) -> bool:
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", ping)
+    monkeypatch.setattr("ip_monitor.monitoring._precheck_internet", precheck)
+    prof = tmp_path / "run.prof"
+    monkeypatch.setattr(
+        "sys.argv", ["ip-monitor", "-c", str(cfg), "--profile", str(prof)]
+    )
+
+    with caplog.at_level(logging.INFO):
+        await main()
+    out = capsys.readouterr().out
+    summary = next(line for line in out.splitlines() if "Terminé" in line)
+    for stage in ("load_config", "precheck", "init_db", "probes", "drain"):
+        assert f"{stage} " in summary
+    (record,) = [r for r in caplog.records if hasattr(r, "stages")]
+    assert set(record.stages) >= {"load_config", "remove_old_entries"}
+    stats = pstats.Stats(str(prof))
+    assert any(func[2] == "_run_all_checks" for func in stats.stats)  # type: ignore[attr-defined]
@@ -0,0 +1,192 @@
+"""Streaming consumption of results: micro-batches and early notifications."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from ip_monitor import monitoring
+from ip_monitor.config import IpInfo
+from ip_monitor.monitoring import (
+    _run_all_checks,
+    check_status,
+    init_db,
+    update_status,
+)
+from ip_monitor.state import StatusState
+
+
+def _ips(count: int) -> list[IpInfo]:
+    return [
+        IpInfo(ip=f"192.0.2.{i}", description=f"h{i}")
+        for i in range(1, count + 1)
+    ]
+
+
+def _params(make_params, **fields):
+    return make_params(**{"concurrency": 10, "ping_timeout": 2.0} | fields)
+
+
+@pytest.mark.asyncio
+async def test_down_notified_before_slow_target_completes(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A fast failure is committed and notified while a slow probe runs."""
+    slow_done = asyncio.Event()
+    seen: list[tuple[str, bool]] = []
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        if ip == "192.0.2.2":
+            await asyncio.sleep(0.3)
+            slow_done.set()
+            return True
+        return False
+
+    async def fake_notify(session, channel, message: str) -> bool:
+        seen.append((message, slow_done.is_set()))
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
+
+    cfg = make_config(
+        ips=[
+            IpInfo(ip="192.0.2.1", description="fast"),
+            IpInfo(ip="192.0.2.2", description="slow"),
+        ]
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(
+            conn, cfg, _params(make_params, notify_batch_window=0.0)
+        )
+        assert summary.down == ["fast"] and summary.up == []
+        assert len(seen) == 1
+        message, slow_finished = seen[0]
+        assert "fast" in message
+        assert slow_finished is False
+        assert await check_status(conn, "IP", "192.0.2.1")
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_batches_flushed_by_count(
+    make_config, make_params, sent: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Transitions are grouped by flush_batch_size."""
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        await asyncio.sleep(0.02 * int(ip.rsplit(".", 1)[1]))
+        return False
+
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+
+    cfg = make_config(ips=_ips(3))
+    conn = await init_db(cfg.db_path)
+    try:
+        await _run_all_checks(
+            conn,
+            cfg,
+            _params(make_params, flush_batch_size=2, notify_batch_window=60),
+        )
+    finally:
+        await conn.close()
+
+    assert len(sent) == 2  # noqa: PLR2004
+    assert "h1, h2" in sent[0]
+    assert "h3" in sent[1]
+
+
+@pytest.mark.asyncio
+async def test_status_state_load_and_flush() -> None:
+    """Load the status table once and write pending transitions in bulk."""
+    conn = await init_db(Path(":memory:"))
+    try:
+        await update_status(conn, "IP", "192.0.2.1", 1)
+        await conn.commit()
+
+        state = await StatusState.load(conn)
+        assert state.is_down("IP", "192.0.2.1")
+        assert not state.is_down("URL", "example.org")
+
+        state.set_down("IP", "192.0.2.1", False)
+        state.set_down("URL", "example.org", True)
+        assert state.pending == 2  # noqa: PLR2004
+        assert await state.flush(conn) == 2  # noqa: PLR2004
+        assert state.pending == 0
+
+        assert not await check_status(conn, "IP", "192.0.2.1")
+        assert await check_status(conn, "URL", "example.org")
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_crashed_task_does_not_block_the_batch(
+    make_config,
+    make_params,
+    sent: list[str],
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """A probe raising is logged; the other results are still flushed."""
+
+    async def check_ip(context, ip: IpInfo, *args, **kwargs):
+        if ip.description == "h2":
+            raise RuntimeError("boom")
+        return await real_check_ip(context, ip, *args, **kwargs)
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        return False
+
+    real_check_ip = monitoring.check_ip
+    monkeypatch.setattr("ip_monitor.monitoring.check_ip", check_ip)
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+    cfg = make_config(ips=_ips(3))
+    conn = await init_db(cfg.db_path)
+    try:
+        summary = await _run_all_checks(
+            conn, cfg, _params(make_params, flush_batch_size=2)
+        )
+        assert sorted(summary.down) == ["h1", "h3"]
+        assert await check_status(conn, "IP", "192.0.2.3")
+        assert not await check_status(conn, "IP", "192.0.2.2")
+    finally:
+        await conn.close()
+    assert "Tâche en erreur" in caplog.text
+    assert len(sent) == 1 and "h2" not in sent[0]
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_still_commits_the_state(
+    make_config, make_params, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A refused notification stays queued; the transition is recorded."""
+
+    async def refuse(session, channel, message: str) -> bool:
+        return False
+
+    async def fake_ping(ip: str, deadline: float | None = None) -> bool:
+        return False
+
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", refuse)
+    monkeypatch.setattr("ip_monitor.monitoring.ping", fake_ping)
+    cfg = make_config(ips=_ips(1), outbox_drain_timeout=0.1)
+    conn = await init_db(cfg.db_path)
+    try:
+        await _run_all_checks(conn, cfg, _params(make_params))
+        assert await check_status(conn, "IP", "192.0.2.1")
+        rows = await conn.execute_fetchall(
+            "SELECT delivered_at FROM outbox WHERE message LIKE '%h1%'"
+        )
+        assert [row[0] for row in rows] == [None]
+    finally:
+        await conn.close()
+
+
+def test_flush_batch_size_must_be_positive(make_config) -> None:
+    """A zero flush_batch_size is rejected at load time."""
+    with pytest.raises(ValidationError, match="flush_batch_size"):
+        make_config(ips=_ips(1), flush_batch_size=0)
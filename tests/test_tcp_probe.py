@@ -0,0 +1,143 @@
+"""TCP connect probes (host:port targets)."""
+
+import asyncio
+import socket
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from ip_monitor.config import Config, NotifyMethod, TcpInfo, split_host_port
+from ip_monitor.monitoring import (
+    ProbeContext,
+    RuntimeParams,
+    _run_all_checks,
+    check_tcp,
+    init_db,
+    remove_old_entries,
+    tcp_connect,
+)
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_split_host_port() -> None:
+    """Hosts, IPv4 and bracketed IPv6 are accepted; bad ports are not."""
+    assert split_host_port("db.lan:5432") == ("db.lan", 5432)
+    assert split_host_port("[2001:db8::1]:22") == ("2001:db8::1", 22)
+    for bad in ("db.lan", ":22", "db.lan:ssh", "db.lan:0", "db.lan:70000"):
+        with pytest.raises(ValueError, match="expected host:port"):
+            split_host_port(bad)
+    with pytest.raises(ValidationError):
+        Config(
+            db_path=Path("x"),
+            notify_method=NotifyMethod.NTFY_SH,
+            ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
+            tcp=[{"tcp": "nope", "description": "d"}],  # type: ignore[list-item]
+        )
+
+
+@pytest.mark.asyncio
+async def test_tcp_connect_stops_at_handshake() -> None:
+    """An open port answers, no byte is sent; a closed port does not."""
+    received: list[bytes] = []
+    accepted = asyncio.Event()
+
+    async def handle(reader: asyncio.StreamReader, writer) -> None:
+        received.append(await reader.read())
+        accepted.set()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        assert await tcp_connect("127.0.0.1", port)
+        await asyncio.wait_for(accepted.wait(), 5)
+    assert received == [b""]
+    assert not await tcp_connect("127.0.0.1", _closed_port())
+
+
+@pytest.mark.asyncio
+async def test_check_tcp_times_out(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A silent (filtered) port is down after the target timeout."""
+
+    async def tcp_connect(host: str, port: int) -> bool:
+        await asyncio.sleep(10)
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.tcp_connect", tcp_connect)
+    conn = await init_db(tmp_path / "db.sqlite")
+    down: list[str] = []
+    try:
+        result = await check_tcp(
+            ProbeContext(conn, down),
+            TcpInfo(tcp="192.0.2.1:22", description="ssh"),
+            0.05,
+        )
+    finally:
+        await conn.close()
+    assert result.is_down and result.changed
+    assert down == ["ssh"]
+
+
+@pytest.mark.asyncio
+async def test_tcp_targets_share_the_cycle(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """TCP targets are scheduled, stored and cleaned up like the others."""
+
+    async def fake_notify(session, channel, message: str) -> bool:
+        return True
+
+    monkeypatch.setattr("ip_monitor.monitoring.notify_channel", fake_notify)
+    server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+    open_addr = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    closed_addr = f"127.0.0.1:{_closed_port()}"
+    cfg = Config(
+        db_path=tmp_path / "db.sqlite",
+        notify_method=NotifyMethod.NTFY_SH,
+        ntfy={"server": "http://s", "topic": "t"},  # type: ignore[arg-type]
+        tcp=[
+            TcpInfo(tcp=open_addr, description="ssh"),
+            TcpInfo(tcp=closed_addr, description="smtp"),
+            TcpInfo(
+                tcp="127.0.0.1:1", description="db", depends_on=[closed_addr]
+            ),
+        ],
+        adaptive_timeout_factor=3,
+    )
+    conn = await init_db(cfg.db_path)
+    try:
+        async with server:
+            summary = await _run_all_checks(
+                conn,
+                cfg,
+                RuntimeParams(
+                    http_timeout=1.0,
+                    http_connector_limit=1,
+                    concurrency=5,
+                    ping_timeout=1.0,
+                    quiet=True,
+                ),
+            )
+        status = await conn.execute_fetchall(
+            "SELECT type, address, down FROM status"
+        )
+        latency = await conn.execute_fetchall(
+            "SELECT type, address FROM latency"
+        )
+        await remove_old_entries(conn, set(), set(), set())
+        left = await conn.execute_fetchall("SELECT COUNT(*) FROM status")
+    finally:
+        await conn.close()
+    assert summary.down == ["smtp"]
+    assert summary.unreachable == ["db"]
+    assert list(status) == [("TCP", closed_addr, 1)]
+    assert list(latency) == [("TCP", open_addr)]
+    assert next(iter(left))[0] == 0